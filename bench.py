@@ -0,0 +1,723 @@
+import importlib.machinery
+import importlib.util
+import os
+import py_compile
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import tython.main
+from tython.lex import Lexer, SourceFile
+from tython.parser import Parser, IncrementalParser, StatementReader
+from tython.parser import BinOpNode, UnaryOpNode, IntNode, FloatNode, Operator
+from tython.cache import ASTCache
+from tython.context import Context
+from tython.interpreter import Interpreter
+from tython.tiered import TieredInterpreter, Tiers
+from tython.vm import VirtualMachine
+from tython.optimizer import Optimizer, NO_OPT, FOLD, REWRITE, INLINE_SIZE
+from tython.checker import TypeChecker
+from tython import project
+from tython import transpiler
+
+
+############################################
+# CORPUS
+############################################
+
+SNIPPET = """def fib_{n}(n)
+    if n < 2: return n
+    return fib_{n}(n - 1) + fib_{n}(n - 2)
+stop
+
+int total_{n} = 0
+for i = 0 to 100 step 2:
+    var total_{n} = total_{n} + i * {n} ^ 2
+stop
+
+str label_{n} = "item number {n}"
+float ratio_{n} = {n}.25 / 3.5
+while total_{n} >= 10 and not total_{n} == 0: int total_{n} = total_{n} - 10
+print([label_{n}, ratio_{n}, fib_{n}(5)])
+
+"""
+
+
+EXPRESSION_SNIPPET = """var x_{n} = (a + {n}) * -b ^ 2 / (c - 1.5) >= d and not e == f or g < h + i * j
+var y_{n} = ((((x_{n} - 1) * 2 + 3) / 4 - 5) ^ 2) != - - k and (m or not n <= 0)
+
+"""
+
+
+STREAM_SNIPPET = """var total = ({n} * 2 - 1) / 4 + 3 ^ 2
+if total > 1000: var total = total - 1000
+
+"""
+
+
+COLD_SNIPPET = """def count_{n}(x)
+    if x < 1: return 0
+    return count_{n}(x - 1) + 1
+stop
+int value_{n} = count_{n}(5)
+for i = 0 to 20: var value_{n} = value_{n} + i
+
+"""
+
+
+LOOP_PROGRAM = """int total = 0
+for i = 0 to 20000:
+    var total = total + i * 2
+    if total > 100000: var total = total - 100000
+stop
+int n = 0
+while n < 20000: var n = n + 1
+"""
+
+
+RECURSION_PROGRAM = """def fib(n)
+    if n < 2: return n
+    return fib(n - 1) + fib(n - 2)
+stop
+fib(18)
+"""
+
+
+DEEP_PROGRAM = """def count(n)
+    if n == 0: return 0
+    return 1 + count(n - 1)
+stop
+count(%d)
+"""
+
+
+def make_corpus(size, snippet=SNIPPET):
+    parts = []
+    length = 0
+    n = 0
+    while length < size:
+        part = snippet.format(n=n)
+        parts.append(part)
+        length += len(part)
+        n += 1
+    return "".join(parts)
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+############################################
+# BENCHMARKS
+############################################
+
+
+def bench_lexer(size=4_000_000, repeat=3):
+    text = make_corpus(size)
+    elapsed = best_of(repeat, lambda: Lexer(SourceFile("<bench>", text)).make_tokens())
+    print(f"lexer: {len(text) / elapsed / 1e6:.2f} MB/s ({len(text)} bytes)")
+
+
+def bench_tokens(size=1_000_000):
+    text = make_corpus(size)
+    tracemalloc.start()
+    tokens, _ = Lexer(SourceFile("<bench>", text)).make_tokens()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"tokens: {len(tokens)} tokens, {current / len(tokens):.1f} bytes/token "
+        f"retained, {peak / len(tokens):.1f} bytes/token peak"
+    )
+
+
+def bench_parser(size=1_000_000, repeat=3):
+    text = make_corpus(size)
+    tokens, _ = Lexer(SourceFile("<bench>", text)).make_tokens()
+    elapsed = best_of(repeat, lambda: Parser(tokens).parse())
+    print(f"parser: {len(tokens) / elapsed / 1e3:.0f}k tokens/s ({len(tokens)} tokens)")
+
+
+def bench_expressions(size=1_000_000, repeat=3):
+    text = make_corpus(size, EXPRESSION_SNIPPET)
+    tokens, _ = Lexer(SourceFile("<bench>", text)).make_tokens()
+    elapsed = best_of(repeat, lambda: Parser(tokens).parse())
+    print(
+        f"expressions: {len(tokens) / elapsed / 1e3:.0f}k tokens/s "
+        f"({len(tokens)} tokens)"
+    )
+
+
+def bench_nodes(size=1_000_000):
+    text = make_corpus(size)
+    tokens, _ = Lexer(SourceFile("<bench>", text)).make_tokens()
+    lines = text.count("\n")
+    tracemalloc.start()
+    res = Parser(tokens).parse()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"nodes: {current / lines:.0f} bytes/line retained by the AST ({lines} lines)"
+    )
+
+
+def bench_cache(size=1_000_000, repeat=3):
+    text = make_corpus(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        fn = os.path.join(tmp, "bench.ty")
+        with open(fn, "w") as f:
+            f.write(text)
+
+        ast_cache = tython.main.ast_cache
+        try:
+            tython.main.ast_cache = ASTCache(enabled=False)
+            cold = best_of(
+                repeat, lambda: tython.main.parse_source(SourceFile.open(fn), NO_OPT)
+            )
+
+            tython.main.ast_cache = ASTCache()
+            tython.main.parse_source(SourceFile.open(fn), NO_OPT)
+            warm = best_of(
+                repeat, lambda: tython.main.parse_source(SourceFile.open(fn), NO_OPT)
+            )
+        finally:
+            tython.main.ast_cache = ast_cache
+
+    print(
+        f"cache: {cold * 1000:.0f} ms lex+parse, {warm * 1000:.0f} ms from the "
+        f"cache ({len(text)} bytes)"
+    )
+
+
+def bench_check(files=400, size=20_000):
+    text = make_corpus(size)
+    cache = ASTCache(enabled=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in range(files):
+            with open(os.path.join(tmp, f"script_{n}.ty"), "w") as f:
+                f.write(text)
+        fns = project.find_scripts([tmp])
+
+        jobs = os.cpu_count() or 1
+        serial = best_of(1, lambda: project.check_scripts(fns, cache, jobs=1))
+        pooled = best_of(1, lambda: project.check_scripts(fns, cache, jobs=jobs))
+
+    print(
+        f"check: {files} scripts in {serial:.2f} s with 1 job, {pooled:.2f} s "
+        f"with {jobs} ({serial / pooled:.1f}x)"
+    )
+
+
+def bench_make(modules=500):
+    snippet = SNIPPET.format(n=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ASTCache(prefix=os.path.join(tmp, "cache"))
+        root = os.path.join(tmp, "project")
+        os.makedirs(root)
+        for n in range(modules):
+            with open(os.path.join(root, f"module_{n}.ty"), "w") as f:
+                f.write(f'run("module_{n // 10}.ty")\n' if n else "")
+                f.write(snippet)
+
+        start = time.perf_counter()
+        project.Project(root, cache).build()
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        project.Project(root, cache).build()
+        noop = time.perf_counter() - start
+
+        with open(os.path.join(root, f"module_{modules - 1}.ty"), "a") as f:
+            f.write("print(1)\n")
+        start = time.perf_counter()
+        processed = project.Project(root, cache).build()
+        edit = time.perf_counter() - start
+
+    print(
+        f"make: {modules} modules, {full * 1000:.0f} ms full build, "
+        f"{noop * 1000:.1f} ms no-op, {edit * 1000:.1f} ms after editing "
+        f"one module ({len(processed)} re-processed)"
+    )
+
+
+def bench_incremental(size=100_000, repeat=20):
+    text = make_corpus(size)
+    full = best_of(
+        3, lambda: Parser(Lexer(SourceFile("<bench>", text)).make_tokens()[0]).parse()
+    )
+
+    parser = IncrementalParser("<bench>", text)
+    offset = text.index("int total_", len(text) // 2) + len("int total_")
+
+    def edit():
+        parser.edit(offset, 0, "9")
+        parser.edit(offset, 1, "")
+
+    elapsed = best_of(repeat, edit) / 2
+    print(
+        f"incremental: {elapsed * 1000:.2f} ms per edit, "
+        f"{full * 1000:.2f} ms full parse ({len(text)} bytes)"
+    )
+
+
+def bench_stream(size=2_000_000):
+    text = "int total = 0\n" + make_corpus(size, STREAM_SNIPPET)
+    with tempfile.TemporaryDirectory() as tmp:
+        fn = os.path.join(tmp, "bench.ty")
+        with open(fn, "w") as f:
+            f.write(text)
+
+        start = time.perf_counter()
+        with open(fn, "rb") as f:
+            next(iter(StatementReader(fn, f)))
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tython.main.parse(SourceFile.open(fn))
+        parsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        with open(fn, "rb") as f:
+            tython.main.run_stream(fn, f)
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        ast_cache = tython.main.ast_cache
+        try:
+            tython.main.ast_cache = ASTCache(enabled=False)
+            tython.main.run_file(fn)
+        finally:
+            tython.main.ast_cache = ast_cache
+        _, whole_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(
+        f"stream: first statement after {first * 1000:.1f} ms ({parsed * 1000:.0f} ms "
+        f"to parse all), peak {stream_peak / 1e6:.1f} MB streamed vs "
+        f"{whole_peak / 1e6:.1f} MB whole ({len(text)} bytes)"
+    )
+
+
+def bench_engines(repeat=3):
+    source = {"loops": LOOP_PROGRAM, "recursion": RECURSION_PROGRAM}
+    for name, text in source.items():
+        node, _ = tython.main.parse(SourceFile("<bench>", text))
+        times = {}
+        for engine, engine_class in tython.main.ENGINES.items():
+
+            def run():
+                context = Context("<program>")
+                context.symbol_table = tython.main.global_symbol_table
+                engine_class().visit(node, context)
+
+            times[engine] = best_of(repeat, run)
+
+        base = times["interpreter"]
+        print(
+            f"engines ({name}): "
+            + ", ".join(
+                f"{engine} {elapsed * 1000:.0f} ms ({base / elapsed:.1f}x)"
+                for engine, elapsed in times.items()
+            )
+        )
+
+
+def bench_tiered(size=100_000, repeat=3):
+    text = make_corpus(size, COLD_SNIPPET)
+    node, _ = tython.main.parse(SourceFile("<bench>", text))
+    times = {}
+    for engine in ("interpreter", "tiered", "closures"):
+
+        def run():
+            context = Context("<program>")
+            context.symbol_table = tython.main.global_symbol_table
+            tython.main.ENGINES[engine]().visit(node, context)
+
+        times[engine] = best_of(repeat, run)
+
+    tiered = TieredInterpreter()
+    context = Context("<program>")
+    context.symbol_table = tython.main.global_symbol_table
+    tiered.visit(node, context)
+    print(
+        "tiered (cold code): "
+        + ", ".join(
+            f"{engine} {elapsed * 1000:.0f} ms" for engine, elapsed in times.items()
+        )
+        + f", {len(tiered.tiers.stats())} of {len(tiered.tiers.functions)} functions "
+        f"and {len(tiered.tiers.loops)} loops compiled ({len(text)} bytes)"
+    )
+
+
+NUMERIC_PROGRAM = """float x = 0.5
+int hits = 0
+for i = 0 to 50000:
+    var x = x * 3.9 * (1.0 - x)
+    if x > 0.5: var hits = hits + 1
+stop
+int n = 0
+int steps = 0
+while n < 5000:
+    var n = n + 1
+    var m = n
+    while m > 1: var m = m / 2 - 1
+    var steps = steps + m * m
+stop
+"""
+
+
+def bench_trace(repeat=3):
+    node, _ = tython.main.parse(SourceFile("<bench>", NUMERIC_PROGRAM))
+    engines = {
+        "interpreter": Interpreter,
+        "closures": tython.main.ENGINES["closures"],
+        "tiered without traces": lambda: TieredInterpreter(Tiers(tracing=False)),
+        "tiered": TieredInterpreter,
+    }
+    times = {}
+    for engine, engine_class in engines.items():
+
+        def run():
+            context = Context("<program>")
+            context.symbol_table = tython.main.global_symbol_table
+            engine_class().visit(node, context)
+
+        times[engine] = best_of(repeat, run)
+
+    base = times["interpreter"]
+    print(
+        "trace (numeric loops): "
+        + ", ".join(
+            f"{engine} {elapsed * 1000:.0f} ms ({base / elapsed:.1f}x)"
+            for engine, elapsed in times.items()
+        )
+    )
+
+
+CONSTANT_PROGRAM = """int total = 0
+str unit = ""
+for i = 0 to 20000:
+    int total = total + (i - 0) * 1 + 60 * 60 * 24 - 2 ^ 10 + (3 * 4 - 2) * 1
+    str unit = "k" * 3 + "b"
+stop
+"""
+
+
+INVARIANT_PROGRAM = """def grid(rows, columns)
+    int total = 0
+    for i = 0 to rows :
+        for j = 0 to columns :
+            if 0: print("never")
+            int total = total + i * 4 * 10 + j
+            if i * 3 > 150: int total = total - 1
+        stop
+    stop
+    return total
+stop
+grid(100, 100)
+"""
+
+COMMON_PROGRAM = """def distances(points)
+    int total = 0
+    for i = 0 to points :
+        int x = i * 3
+        int y = i * 2 - 5
+        int total = total + (x * x + y * y) * 2 - (x * x + y * y) * i
+        if (x - y) * (x - y) > 1000: int total = total - (x - y) * (x - y)
+    stop
+    return total
+stop
+distances(20000)
+"""
+
+INLINE_PROGRAM = """def add(a, b) -> a + b
+def square(x) -> x * x
+int total = 0
+for i = 0 to 20000:
+    int total = add(total, square(i)) - add(i, 1)
+stop
+"""
+
+OPTIMIZED_PROGRAMS = {
+    "constant loop": CONSTANT_PROGRAM,
+    "invariant loops": INVARIANT_PROGRAM,
+    "common subexpressions": COMMON_PROGRAM,
+    "small functions": INLINE_PROGRAM,
+}
+
+
+def bench_optimize(repeat=3):
+    for name, program in OPTIMIZED_PROGRAMS.items():
+        times = {}
+        changed = {}
+        for level in (NO_OPT, FOLD, REWRITE):
+            node, _ = tython.main.parse(SourceFile("<bench>", program))
+            optimizer = Optimizer(level)
+            node = optimizer.optimize(node)
+            changed[level] = optimizer.changed
+
+            def run():
+                context = Context("<program>")
+                context.symbol_table = tython.main.global_symbol_table
+                Interpreter().visit(node, context)
+
+            times[level] = best_of(repeat, run)
+
+        base = times[NO_OPT]
+        print(
+            f"optimize ({name}): "
+            + ", ".join(
+                f"-O{level} {elapsed * 1000:.0f} ms, {changed[level]} nodes "
+                f"changed ({base / elapsed:.1f}x)"
+                for level, elapsed in times.items()
+            )
+        )
+
+
+def bench_common(size=100_000):
+    corpora = {
+        "corpus": SNIPPET,
+        "expressions": EXPRESSION_SNIPPET,
+        "stream": STREAM_SNIPPET,
+        "cold": COLD_SNIPPET,
+    }
+    counts = []
+    for name, snippet in corpora.items():
+        node, _ = tython.main.parse(SourceFile("<bench>", make_corpus(size, snippet)))
+        optimizer = Optimizer(REWRITE)
+        optimizer.optimize(node)
+        counts.append(f"{name} {optimizer.saved}")
+    for name, program in OPTIMIZED_PROGRAMS.items():
+        node, _ = tython.main.parse(SourceFile("<bench>", program))
+        optimizer = Optimizer(REWRITE)
+        optimizer.optimize(node)
+        counts.append(f"{name} {optimizer.saved}")
+    print(
+        f"common subexpressions: operators saved at -O{REWRITE} ({size} byte "
+        f"corpora): " + ", ".join(counts)
+    )
+
+
+def bench_inline(repeat=3):
+    engines = {"interpreter": Interpreter, "tiered": TieredInterpreter}
+    results = []
+    for engine, engine_class in engines.items():
+        times = {}
+        for inline_size in (0, INLINE_SIZE):
+            node, _ = tython.main.parse(SourceFile("<bench>", INLINE_PROGRAM))
+            node = Optimizer(REWRITE, inline_size).optimize(node)
+
+            def run():
+                context = Context("<program>")
+                context.symbol_table = tython.main.global_symbol_table
+                engine_class().visit(node, context)
+
+            times[inline_size] = best_of(repeat, run)
+        called = times[0]
+        inlined = times[INLINE_SIZE]
+        results.append(
+            f"{engine} {called * 1000:.0f} ms called, {inlined * 1000:.0f} ms "
+            f"inlined ({called / inlined:.1f}x)"
+        )
+    print(f"inline (small functions at -O{REWRITE}): " + ", ".join(results))
+
+
+TRUSTED_PROGRAM = """def sums(n)
+    int total = 0
+    int squares = 0
+    for i = 0 to n :
+        int total = total + i * 2 - 1
+        int squares = squares + i * i
+    stop
+    return total + squares
+stop
+sums(30000)
+"""
+
+
+def bench_trusted(repeat=3):
+    times = {}
+    for trusted in (False, True):
+        node, _ = tython.main.parse(SourceFile("<bench>", TRUSTED_PROGRAM))
+        if trusted:
+            checker = TypeChecker()
+            node = checker.check(node)
+
+        def run():
+            context = Context("<program>")
+            context.symbol_table = tython.main.global_symbol_table
+            Interpreter().visit(node, context)
+
+        times[trusted] = best_of(repeat, run)
+    checked = times[False]
+    trusted = times[True]
+    print(
+        f"trusted (typed loop, {checker.trusted} nodes trusted): interpreter "
+        f"{checked * 1000:.0f} ms checked, {trusted * 1000:.0f} ms trusted "
+        f"({checked / trusted:.1f}x)"
+    )
+
+
+FRAME_LOOP = """int total = 0
+int stride = 3
+for i = 0 to 20000 :
+    var total = total + stride * i - stride
+stop
+"""
+FRAME_PROGRAM = (
+    "def body()\n"
+    + "".join(f"    {line}\n" for line in FRAME_LOOP.splitlines())
+    + "    return total\nstop\nbody()\n"
+)
+
+
+def bench_frames(repeat=3):
+    times = {}
+    for name, program in (
+        ("locals", FRAME_PROGRAM),
+        ("globals", FRAME_LOOP),
+    ):
+        node, _ = tython.main.parse(SourceFile("<bench>", program))
+
+        def run():
+            context = Context("<program>")
+            context.symbol_table = tython.main.global_symbol_table
+            Interpreter().visit(node, context)
+
+        times[name] = best_of(repeat, run)
+    print(
+        f"frames (the same loop): interpreter {times['locals'] * 1000:.0f} ms on "
+        f"a function's slots, {times['globals'] * 1000:.0f} ms on globals"
+    )
+
+
+def bench_operators(size=200_000, repeat=3):
+    """
+    The interpreter's cost of one operation, operands included, for the
+    first and last operators it used to test for and for a unary one
+    """
+    context = Context("<program>")
+    context.symbol_table = tython.main.global_symbol_table
+    interpreter = Interpreter()
+    nodes = {
+        "+": BinOpNode(IntNode(7, 0), Operator.PLUS, IntNode(3, 0)),
+        "<": BinOpNode(IntNode(7, 0), Operator.LT, IntNode(3, 0)),
+        "or": BinOpNode(IntNode(7, 0), Operator.OR, IntNode(3, 0)),
+        "-x": UnaryOpNode(Operator.MINUS, FloatNode(7.5, 0), 0),
+    }
+    results = []
+    for name, node in nodes.items():
+
+        def run():
+            visit = interpreter.visit
+            for _ in range(size):
+                visit(node, context)
+
+        elapsed = best_of(repeat, run)
+        results.append(f"{name} {elapsed / size * 1e9:.0f} ns")
+    print("operators (interpreter, per operation): " + ", ".join(results))
+
+
+def bench_deep(depth=50_000, repeat=3):
+    node, _ = tython.main.parse(SourceFile("<bench>", DEEP_PROGRAM % depth))
+
+    def run(engine):
+        context = Context("<program>")
+        context.symbol_table = tython.main.global_symbol_table
+        return engine.visit(node, context)
+
+    elapsed = best_of(repeat, lambda: run(VirtualMachine()))
+    try:
+        error = run(Interpreter()).error
+        interpreted = f"interpreter {'fails' if error else 'runs'}"
+    except RecursionError:
+        interpreted = "interpreter: RecursionError"
+
+    limit = 16 * 1024 * 1024
+    error = run(VirtualMachine(memory_limit=limit)).error
+    print(
+        f"deep: vm {depth} nested calls in {elapsed * 1000:.0f} ms "
+        f"({elapsed / depth * 1e6:.1f} us/call), {interpreted}; "
+        f"with a {limit // 1024 // 1024} MB limit: {error.details if error else 'no error'}"
+    )
+
+
+def load_module(fn, loader=None):
+    spec = importlib.util.spec_from_file_location("bench_module", fn, loader=loader)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_build(size=100_000, repeat=3):
+    text = make_corpus(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = SourceFile("<bench>", text)
+        parse = best_of(repeat, lambda: tython.main.parse(source))
+        fn = os.path.join(tmp, "corpus.py")
+        transpiler.build(source, tython.main.parse(source)[0], fn)
+        imported = best_of(repeat, lambda: load_module(fn))
+        pyc_fn = py_compile.compile(fn, os.path.join(tmp, "corpus.pyc"))
+        loader = importlib.machinery.SourcelessFileLoader("bench_module", pyc_fn)
+        cached = best_of(repeat, lambda: load_module(pyc_fn, loader))
+        print(
+            f"build (startup): {parse * 1000:.0f} ms to lex+parse, "
+            f"{imported * 1000:.0f} ms to import the built module, "
+            f"{cached * 1000:.0f} ms from its bytecode ({len(text)} bytes)"
+        )
+
+        programs = {"loops": LOOP_PROGRAM, "recursion": RECURSION_PROGRAM}
+        for name, text in programs.items():
+            source = SourceFile("<bench>", text)
+            node, _ = tython.main.parse(source)
+            fn = os.path.join(tmp, f"{name}.py")
+            transpiler.build(source, node, fn)
+            module = load_module(fn)
+
+            def interpret():
+                context = Context("<program>", source=source)
+                context.symbol_table = tython.main.global_symbol_table
+                Interpreter().visit(node, context)
+
+            interpreted = best_of(repeat, interpret)
+            built = best_of(repeat, module.run)
+            print(
+                f"build ({name}): interpreter {interpreted * 1000:.0f} ms, "
+                f"built module {built * 1000:.0f} ms ({interpreted / built:.1f}x)"
+            )
+
+
+BENCHMARKS = {
+    "lexer": bench_lexer,
+    "tokens": bench_tokens,
+    "parser": bench_parser,
+    "expressions": bench_expressions,
+    "nodes": bench_nodes,
+    "cache": bench_cache,
+    "check": bench_check,
+    "make": bench_make,
+    "incremental": bench_incremental,
+    "stream": bench_stream,
+    "engines": bench_engines,
+    "tiered": bench_tiered,
+    "trace": bench_trace,
+    "optimize": bench_optimize,
+    "common": bench_common,
+    "inline": bench_inline,
+    "trusted": bench_trusted,
+    "frames": bench_frames,
+    "operators": bench_operators,
+    "deep": bench_deep,
+    "build": bench_build,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
@@ -0,0 +1,336 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import signal
+import sys
+
+import tython.main
+from tython.errors import StaticTypeError
+from tython.tiered import TieredInterpreter, Tiers
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+OPT_LEVELS = (0, 1, 2)
+# Longest the interpreter may run a generated program; one that runs longer
+# is left out. Other engines get COMPARE_TIMEOUT before they count as hung.
+TIMEOUT = 0.5
+COMPARE_TIMEOUT = 10.0
+
+# How the outcome of a run failing with a Python exception starts
+CRASH = "!! crash "
+
+# Besides main.ENGINES, programs run with the tiered engine compiling and
+# tracing what has run once or twice and dropping traces after two side
+# exits, which the usual thresholds leave to far longer programs
+EAGER_TIERED = "tiered-eager"
+EAGER_TIERS = dict(call_threshold=1, loop_threshold=2, side_exit_limit=2)
+ENGINES = (*tython.main.ENGINES, EAGER_TIERED)
+
+
+############################################
+# RUNNING
+############################################
+
+
+class Timeout(Exception):
+    pass
+
+
+def on_alarm(signum, frame):
+    raise Timeout()
+
+
+if hasattr(signal, "setitimer"):
+    signal.signal(signal.SIGALRM, on_alarm)
+
+
+def set_timer(seconds):
+    if hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+
+
+# What the builtins leave in the global table; every program starts from it
+GLOBALS = dict(tython.main.global_symbol_table.symbols)
+
+
+def run(name, text, engine="interpreter", opt_level=0, trusted=False, timeout=None):
+    """
+    The outcome of running text: what it printed, then "=> " and the repr
+    of its value or "!! " and its error, or "!! crash " and the Python
+    exception it failed with. Addresses in reprs are left out. None when it
+    ran out of time or of Python's stack, which only the interpreter at -O0
+    is asked about.
+    """
+    symbols = tython.main.global_symbol_table.symbols
+    symbols.clear()
+    symbols.update(GLOBALS)
+
+    output = io.StringIO()
+    try:
+        set_timer(timeout or 0)
+        with contextlib.redirect_stdout(output):
+            value, error = tython.main.run(
+                name, text, make_engine(engine), opt_level, trusted
+            )
+        if error is not None:
+            if isinstance(error, StaticTypeError):
+                outcome = f"!! static {error!r}"
+            else:
+                outcome = f"!! {error!r}"
+        else:
+            outcome = f"=> {value!r}"
+    except (Timeout, RecursionError):
+        return None
+    except Exception as e:
+        outcome = f"{CRASH}{type(e).__name__}: {e}"
+    finally:
+        set_timer(0)
+
+    return re.sub(r"0x[0-9a-f]+", "0x?", output.getvalue() + outcome + "\n")
+
+
+def make_engine(engine):
+    if engine == EAGER_TIERED:
+        return TieredInterpreter(Tiers(**EAGER_TIERS))
+    return engine
+
+
+def modes():
+    """
+    Every way of running a program, but for the interpreter at -O0 which
+    they are all compared against
+    """
+    for trusted in (False, True):
+        for engine in ENGINES:
+            for opt_level in OPT_LEVELS:
+                if trusted or engine != "interpreter" or opt_level:
+                    yield engine, opt_level, trusted
+
+
+def describe(engine, opt_level, trusted):
+    return f"{engine} -O{opt_level}" + (" --trusted" if trusted else "")
+
+
+def compare(name, text, expected, timeout=None):
+    """
+    The modes whose outcome for text is not expected, each with that
+    outcome. In trusted mode a program may instead stop at a static type
+    error before it runs.
+    """
+    failed = []
+    for mode in modes():
+        outcome = run(name, text, *mode, timeout=timeout)
+        if outcome == expected:
+            continue
+        if mode[2] and outcome is not None and outcome.startswith("!! static "):
+            continue
+        failed.append((mode, outcome))
+    return failed
+
+
+############################################
+# CORPUS
+############################################
+
+
+def corpus_programs(names=None):
+    """
+    (name, text, path of the expected outcome) of the programs in corpus/
+    """
+    programs = []
+    for fn in sorted(os.listdir(CORPUS_DIR)):
+        name, ext = os.path.splitext(fn)
+        if ext != ".ty" or names and name not in names:
+            continue
+        path = os.path.join(CORPUS_DIR, fn)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        programs.append((name, text, os.path.join(CORPUS_DIR, name + ".out")))
+    return programs
+
+
+# Pieces of the random programs generated on top of the corpus. A name
+# takes in a ":" right after it, so one is written after a space.
+ATOMS = ("1", "2", "0", "3.5", "0.0", "x", "y", '"s"', "z", "True", "l")
+BINARY_OPERATORS = (
+    *("+", "-", "*", "/", "^"),
+    *("==", "!=", "<", ">", "<=", ">="),
+    *("and", "or"),
+)
+UNARY_OPERATORS = ("-", "not ", "+")
+CALLEES = ("f", "g", "len", "type")
+TYPES = ("int", "var", "float", "num", "str")
+WHILE_LOOPS = ("while x < 3: var x = x + 1", "while 0: 1", "while x < 3: break")
+JUMPS = ("break", "continue", "return")
+PRELUDE = 'var x = 1\nvar y = 2.5\nvar l = [1]\nvar z = "s"\n'
+# What may be slipped into a generated program, so that errors are covered
+# as well
+TYPOS = ("", "(", ")", ":", "stop", "\n", ",", "=", "+")
+
+
+def generate_expression(r, depth=0):
+    choice = r.random()
+    if depth > 3 or choice < 0.3:
+        return r.choice(ATOMS)
+    depth += 1
+    if choice < 0.55:
+        left = generate_expression(r, depth)
+        right = generate_expression(r, depth)
+        return f"{left} {r.choice(BINARY_OPERATORS)} {right}"
+    if choice < 0.65:
+        return f"({generate_expression(r, depth)})"
+    if choice < 0.7:
+        # Not every unary operator may follow a binary one
+        return f"({r.choice(UNARY_OPERATORS)}{generate_expression(r, depth)})"
+    if choice < 0.8:
+        args = ", ".join(generate_expression(r, depth) for _ in range(r.randint(0, 2)))
+        return f"{r.choice(CALLEES)}({args})"
+    if choice < 0.85:
+        elements = (generate_expression(r, depth) for _ in range(r.randint(0, 3)))
+        return f"[{', '.join(elements)}]"
+    if choice < 0.9:
+        condition, then, otherwise = (generate_expression(r, depth) for _ in range(3))
+        return f"if {condition} : {then} else {otherwise}"
+    return generate_expression(r, depth)
+
+
+def generate_statement(r, depth=0):
+    choice = r.random()
+    if depth < 2 and choice < 0.1:
+        body = generate_block(r, depth + 1)
+        return f"for i = {r.randint(0, 2)} to {r.randint(0, 4)}:\n{body}\nstop"
+    if depth < 2 and choice < 0.18:
+        condition = generate_expression(r, 2)
+        then, otherwise = generate_block(r, depth + 1), generate_block(r, depth + 1)
+        return f"if {condition} :\n{then}\nelse\n{otherwise}\nstop"
+    if depth < 2 and choice < 0.23:
+        body = generate_block(r, depth + 1)
+        return f"def {r.choice(('f', 'g'))}(a, b)\n{body}\nstop"
+    if choice < 0.27:
+        return f"def {r.choice(('f', 'g'))}(a) -> {generate_expression(r, 1)}"
+    if choice < 0.3:
+        return r.choice((f"return {generate_expression(r, 2)}", *JUMPS))
+    if choice < 0.55:
+        var_type, var_name = r.choice(TYPES), r.choice(("x", "y", "z", "l"))
+        return f"{var_type} {var_name} = {generate_expression(r, 1)}"
+    if choice < 0.6:
+        return r.choice(WHILE_LOOPS)
+    return generate_expression(r)
+
+
+def generate_block(r, depth=0):
+    return "\n".join(generate_statement(r, depth) for _ in range(r.randint(1, 4)))
+
+
+def generated_programs(count, seed=0):
+    """
+    (name, text) of count random programs, some with a typo slipped in
+    """
+    r = random.Random(seed)
+    programs = []
+    for idx in range(count):
+        text = PRELUDE + generate_block(r)
+        if r.random() < 0.3:
+            at = r.randint(0, len(text))
+            text = text[:at] + r.choice(TYPOS) + text[at + r.randint(0, 3) :]
+        programs.append((f"generated-{seed}-{idx}", text))
+    return programs
+
+
+############################################
+# MAIN
+############################################
+
+
+def report(name, text, failed):
+    print(f"FAIL {name}")
+    for line in text.splitlines():
+        print(f"    | {line}")
+    for mode, outcome in failed:
+        print(f"  {describe(*mode)}:")
+        for line in (outcome or "ran out of time or stack\n").splitlines():
+            print(f"    {line}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Runs the behaviour corpus with every engine at every "
+        "optimization level, in trusted mode too, and compares what each "
+        "prints and returns with what the interpreter does at -O0."
+    )
+    parser.add_argument(
+        "names", nargs="*", metavar="NAME", help="corpus programs to run (default: all)"
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="write what the interpreter does at -O0 as the expected outcome "
+        "of each corpus program instead of checking it",
+    )
+    parser.add_argument(
+        "--generated",
+        type=int,
+        default=1500,
+        metavar="N",
+        help="also compare N random programs (default: 1500)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    tython.main.ast_cache.enabled = False
+    sys.setrecursionlimit(3000)
+
+    failures = 0
+    programs = corpus_programs(args.names)
+    for name, text, expected_path in programs:
+        expected = run(name, text)
+        if args.update:
+            with open(expected_path, "w", encoding="utf-8") as f:
+                f.write(expected)
+            continue
+
+        failed = []
+        if f"\n{CRASH}" in "\n" + expected:
+            failed.append((("interpreter", 0, False), expected))
+        elif not os.path.exists(expected_path):
+            failed.append((("interpreter", 0, False), expected))
+        else:
+            with open(expected_path, encoding="utf-8") as f:
+                if f.read() != expected:
+                    failed.append((("interpreter", 0, False), expected))
+        failed += compare(name, text, expected)
+        if failed:
+            failures += 1
+            report(name, text, failed)
+
+    if args.update:
+        print(f"{len(programs)} expected outcomes written")
+        return 0
+
+    generated = [] if args.names else generated_programs(args.generated, args.seed)
+    skipped = crashed = 0
+    for name, text in generated:
+        expected = run(name, text, timeout=TIMEOUT)
+        if expected is None:
+            skipped += 1
+            continue
+        # Every engine fails the same way when the value classes do
+        crashed += f"\n{CRASH}" in "\n" + expected
+        failed = compare(name, text, expected, COMPARE_TIMEOUT)
+        if failed:
+            failures += 1
+            report(name, text, failed)
+
+    count = len(programs) + len(generated) - skipped
+    modes_count = len(list(modes()))
+    print(
+        f"{count} programs run {modes_count} more ways each, {failures} failed; "
+        f"{crashed} generated ones crash the interpreter itself"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
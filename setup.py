@@ -28,4 +28,5 @@ setup(
     url=URL,
     install_requires=INSTALL_REQUIRES,
     packages=find_packages(),
+    entry_points={"console_scripts": ["tython=tython.__main__:main"]},
 )
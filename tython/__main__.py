@@ -0,0 +1,331 @@
+import argparse
+import os
+import sys
+
+from tython import main as tython_main
+from tython import project
+from tython import transpiler
+from tython.errors import (
+    ExpectedCharError,
+    IllegalCharError,
+    StaticTypeError,
+    SyntaxError,
+)
+from tython.lex import SourceFile
+from tython.checker import TypeChecker
+from tython.optimizer import Optimizer, OPT_LEVEL, INLINE_SIZE
+from tython.tiered import TieredInterpreter
+from tython.vm import VirtualMachine
+
+COMMANDS = ("run", "check", "compile", "make", "clean", "build")
+# Errors found in a script before any of it runs
+SCRIPT_ERRORS = (IllegalCharError, ExpectedCharError, SyntaxError, StaticTypeError)
+
+
+def add_opt_level(command):
+    command.add_argument(
+        "-O",
+        "--opt-level",
+        type=int,
+        choices=(0, 1, 2),
+        default=OPT_LEVEL,
+        metavar="LEVEL",
+        help="optimize the parsed script: 0 not at all, 1 fold constants and "
+        f"drop dead code (default: {OPT_LEVEL}), 2 also simplify algebraic "
+        "identities, hoist invariant expressions out of loops, share common "
+        "subexpressions and inline small functions",
+    )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="tython",
+        description="Runs a script; `tython SCRIPT` is short for `tython run SCRIPT`.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="neither read nor write cached ASTs (also TYTHON_NO_CACHE=1)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run a script")
+    run.add_argument("script", help="script to run, or - to read it from stdin")
+    run.add_argument(
+        "--stream",
+        action="store_true",
+        help="run each top-level statement as soon as it has been read "
+        "(always so for stdin)",
+    )
+    run.add_argument(
+        "--engine",
+        choices=tython_main.ENGINES,
+        default=None,
+        help="what runs the parsed script: the tree-walking interpreter "
+        "(default), the AST compiled to closures or bytecode on a stack VM, "
+        "or the interpreter compiling hot functions and loops to closures",
+    )
+    run.add_argument(
+        "--tier-stats",
+        action="store_true",
+        help="run with the tiered engine (implies --engine tiered), then list "
+        "the functions and loops it compiled",
+    )
+    run.add_argument(
+        "--memory-limit",
+        type=int,
+        metavar="MB",
+        help="run on the stack VM (implies --engine vm), letting nested calls "
+        "take up to MB megabytes; a deeper call is a RuntimeError",
+    )
+    add_opt_level(run)
+    run.add_argument(
+        "--no-inline",
+        action="store_true",
+        help="at -O2, keep calling small functions instead of inlining them",
+    )
+    run.add_argument(
+        "--trusted",
+        action="store_true",
+        help="check the script's types first, stopping at a type or arity "
+        "error before it runs, and skip the checks of what they prove",
+    )
+    run.add_argument(
+        "--opt-report",
+        action="store_true",
+        help="after running, tell how many nodes the optimizer changed",
+    )
+
+    for name, help in (
+        ("check", "lex and parse scripts and report their errors"),
+        ("compile", "check scripts and cache the AST of every valid one"),
+    ):
+        command = commands.add_parser(name, help=help)
+        command.add_argument("paths", nargs="+", metavar="PATH")
+        command.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=None,
+            help="worker processes (default: one per core)",
+        )
+        if name == "check":
+            command.add_argument(
+                "--types",
+                action="store_true",
+                help="also report the type and arity errors the type checker finds",
+            )
+
+    make = commands.add_parser(
+        "make", help="check a project, re-processing only what changed since last time"
+    )
+    make.add_argument(
+        "root",
+        nargs="?",
+        default=".",
+        metavar="DIR",
+        help="directory the scripts are run from (default: .)",
+    )
+    make.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="worker processes (default: one per core)",
+    )
+
+    clean = commands.add_parser("clean", help="remove stale cache entries")
+    clean.add_argument("root", nargs="?", default=".", metavar="DIR")
+
+    build = commands.add_parser(
+        "build", help="translate a script into a Python module that runs it"
+    )
+    build.add_argument("script")
+    build.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        metavar="FILE",
+        help="module to write (default: the script's name with .py)",
+    )
+    add_opt_level(build)
+
+    # `tython SCRIPT` runs the script
+    for idx, arg in enumerate(argv):
+        if arg == "-" or not arg.startswith("-"):
+            if arg not in COMMANDS:
+                argv = [*argv[:idx], "run", *argv[idx:]]
+            break
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        # --tier-stats and --memory-limit each pick an engine of their own
+        picks = [
+            (flag, engine)
+            for flag, engine, given in (
+                (f"--engine {args.engine}", args.engine, args.engine),
+                ("--tier-stats", "tiered", args.tier_stats),
+                ("--memory-limit", "vm", args.memory_limit is not None),
+            )
+            if given
+        ]
+        if len({engine for _, engine in picks}) > 1:
+            flags = " and ".join(flag for flag, _ in picks)
+            parser.error(f"{flags} pick different engines")
+        args.engine = picks[0][1] if picks else "interpreter"
+    return args
+
+
+def run(args):
+    engine = args.engine
+    if args.tier_stats:
+        engine = TieredInterpreter()
+    elif args.memory_limit is not None:
+        engine = VirtualMachine(memory_limit=args.memory_limit * 1024 * 1024)
+    optimizer = Optimizer(args.opt_level, 0 if args.no_inline else INLINE_SIZE)
+    checker = args.trusted and TypeChecker()
+    # Only failing to open the script is a load error; what the script
+    # itself raises is not
+    try:
+        if args.script == "-":
+            stream = sys.stdin.buffer
+        elif args.stream:
+            stream = open(args.script, "rb")
+        else:
+            source = SourceFile.open(args.script)
+    except OSError as e:
+        print(f'Failed to load script "{args.script}"\n{e}')
+        return 1
+
+    if args.script == "-":
+        _, error = tython_main.run_stream("<stdin>", stream, engine, optimizer, checker)
+    elif args.stream:
+        with stream:
+            _, error = tython_main.run_stream(
+                args.script, stream, engine, optimizer, checker
+            )
+    else:
+        _, error = tython_main.run_source(source, engine, optimizer, checker)
+
+    if args.opt_report:
+        print(
+            f"{optimizer.changed} nodes changed by the optimizer "
+            f"(level {optimizer.level}), {optimizer.saved} operators saved "
+            f"by sharing common subexpressions, {optimizer.inlined} calls "
+            f"inlined",
+            file=sys.stderr,
+        )
+        if checker:
+            print(
+                f"{checker.trusted} nodes trusted by the type checker", file=sys.stderr
+            )
+
+    stats = args.tier_stats and engine.tiers.stats()
+    if stats or args.tier_stats and not isinstance(error, SCRIPT_ERRORS):
+        print(f"{len(stats)} functions and loops compiled", file=sys.stderr)
+        for profile in stats:
+            print(f"  {profile}", file=sys.stderr)
+
+    if error:
+        print(error)
+        return 1
+    return 0
+
+
+def check(args, compile=False):
+    fns = project.find_scripts(args.paths)
+    cache = tython_main.ast_cache
+    if compile:
+        results = project.compile_scripts(fns, cache, args.jobs)
+    else:
+        results = project.check_scripts(fns, cache, jobs=args.jobs, types=args.types)
+
+    failed = 0
+    for result in results:
+        if result.errors:
+            failed += 1
+            for error in result.errors:
+                print(error)
+
+    print(f"{len(results)} scripts checked, {failed} with errors")
+    return 1 if failed else 0
+
+
+def make(args):
+    build = project.Project(args.root, tython_main.ast_cache)
+    processed = build.build(args.jobs)
+
+    failed = 0
+    for name in sorted(build.modules):
+        errors = build.modules[name].errors
+        if errors:
+            failed += 1
+            for error in errors:
+                print(error)
+
+    print(
+        f"{len(build.modules)} modules, {len(processed)} re-processed, "
+        f"{failed} with errors"
+    )
+    return 1 if failed else 0
+
+
+def clean(args):
+    for path in tython_main.ast_cache.clean(args.root):
+        print(f"removed {path}")
+    return 0
+
+
+def build(args):
+    out_fn = args.output or os.path.splitext(args.script)[0] + ".py"
+    try:
+        source = SourceFile.open(args.script)
+    except OSError as e:
+        print(f'Failed to load script "{args.script}"\n{e}')
+        return 1
+
+    node, error = tython_main.parse_source(source, args.opt_level)
+    if not error:
+        try:
+            error = transpiler.build(source, node, out_fn)
+        except OSError as e:
+            error = f'Failed to write "{out_fn}"\n{e}'
+
+    if error:
+        print(error)
+        return 1
+    print(f"wrote {out_fn}")
+    return 0
+
+
+def main(argv=None):
+    try:
+        args = parse_args(sys.argv[1:] if argv is None else argv)
+    except SystemExit as e:
+        return e.code
+
+    if args.no_cache:
+        tython_main.ast_cache.enabled = False
+
+    if args.command == "run":
+        try:
+            return run(args)
+        except BrokenPipeError:
+            # Whatever reads the output stopped (say `| head`): stop as well,
+            # sending what is still buffered nowhere, so that flushing it at
+            # exit does not fail again
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+    if args.command == "check":
+        return check(args)
+    if args.command == "compile":
+        return check(args, compile=True)
+    if args.command == "make":
+        return make(args)
+    if args.command == "build":
+        return build(args)
+    return clean(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
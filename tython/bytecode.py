@@ -0,0 +1,457 @@
+from array import array
+
+from tython.parser import *
+from tython.types import Types
+
+
+############################################
+# OPCODES
+############################################
+
+(
+    # Push a constant of the type the opcode names
+    INT,
+    FLOAT,
+    NUMBER,
+    ANY,
+    STRING,
+    NULL,
+    # Variables: the argument is the name's constant
+    LOAD,
+    STORE,
+    STORE_TYPED,
+    # Operators: BINARY's argument indexes BINARY_METHODS
+    BINARY,
+    NEGATE,
+    NOT,
+    SET_POS,
+    BUILD_LIST,
+    POP,
+    JUMP,
+    JUMP_IF_FALSE,
+    # Loops
+    NEW_ELEMENTS,
+    LIST_APPEND,
+    MAKE_LIST,
+    FOR_SETUP,
+    FOR_ITER,
+    BREAK,
+    CONTINUE,
+    # Functions
+    MAKE_FUNCTION,
+    CALL,
+    RETURN,
+    END,
+) = range(28)
+
+OPCODE_NAMES = (
+    "INT FLOAT NUMBER ANY STRING NULL LOAD STORE STORE_TYPED BINARY NEGATE NOT "
+    "SET_POS BUILD_LIST POP JUMP JUMP_IF_FALSE NEW_ELEMENTS LIST_APPEND MAKE_LIST "
+    "FOR_SETUP FOR_ITER BREAK CONTINUE MAKE_FUNCTION CALL RETURN END"
+).split()
+
+# How many values each opcode adds to the stack; None for CALL and
+# BUILD_LIST, whose arguments say
+STACK_EFFECTS = (1, 1, 1, 1, 1, 1, 1, 0, 0, -1, 0, 0, 0, None, -1, 0, -1) + (
+    1,
+    -1,
+    0,
+    -2,
+    0,
+    1,
+    1,
+    1,
+    None,
+    0,
+    0,
+)
+
+# The method of the left operand each binary operator calls
+BINARY_METHODS = (
+    "add",
+    "subtract",
+    "multiply",
+    "divide",
+    "power",
+    "compare_eq",
+    "compare_ne",
+    "compare_lt",
+    "compare_gt",
+    "compare_lte",
+    "compare_gte",
+    "and_",
+    "not_",
+    "or_",
+)
+BINARY_OPERATORS = {
+    Operator.PLUS: 0,
+    Operator.MINUS: 1,
+    Operator.MUL: 2,
+    Operator.DIV: 3,
+    Operator.POWER: 4,
+    Operator.EE: 5,
+    Operator.NE: 6,
+    Operator.LT: 7,
+    Operator.GT: 8,
+    Operator.LTE: 9,
+    Operator.GTE: 10,
+    Operator.AND: 11,
+    Operator.NOT: 12,
+    Operator.OR: 13,
+}
+
+CONSTANT_OPCODES = {
+    AnyNode: ANY,
+    IntNode: INT,
+    FloatNode: FLOAT,
+    StringNode: STRING,
+    NumberNode: NUMBER,
+}
+
+
+############################################
+# CODE
+############################################
+
+
+class Code:
+    """
+    A compiled script or function body. Instruction pc is ops[pc] with
+    argument args[pc], and the values it makes or the errors it reports
+    span starts[pc]:ends[pc] in the source. Names, literals and the bodies
+    of nested functions are in consts.
+
+    Every loop has five entries in loops: the first and the last + 1
+    instruction of its body, the stack depth inside it and where continue
+    and break go. Inner loops come before the loops around them.
+
+    Code holds nothing but arrays, strings, numbers and other Code, so it
+    pickles compactly and can be cached like an AST.
+    """
+
+    __slots__ = ("name", "ops", "args", "starts", "ends", "consts", "loops")
+
+    def __init__(self, name):
+        self.name = name
+        self.ops = array("B")
+        self.args = array("i")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.consts = []
+        self.loops = array("I")
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self) -> str:
+        return f"<code {self.name}, {len(self.ops)} instructions>"
+
+    def disassemble(self):
+        """
+        One line per instruction, for debugging
+        """
+        lines = []
+        for pc, op in enumerate(self.ops):
+            arg = self.args[pc]
+            line = f"{pc:5} {OPCODE_NAMES[op]:<14} {arg}"
+            if op <= STRING or op in (
+                LOAD,
+                STORE,
+                STORE_TYPED,
+                FOR_SETUP,
+                MAKE_FUNCTION,
+            ):
+                line += f" ({self.consts[arg]!r})"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class FunctionInfo:
+    """
+    What MAKE_FUNCTION needs: the name, argument names and compiled body of
+    a function definition
+    """
+
+    __slots__ = ("name", "arg_names", "code", "should_auto_return")
+
+    def __init__(self, name, arg_names, code, should_auto_return):
+        self.name = name
+        self.arg_names = arg_names
+        self.code = code
+        self.should_auto_return = should_auto_return
+
+    def __getstate__(self):
+        return (self.name, self.arg_names, self.code, self.should_auto_return)
+
+    def __setstate__(self, state):
+        self.name, self.arg_names, self.code, self.should_auto_return = state
+
+    def __repr__(self) -> str:
+        return f"<function {self.name}>"
+
+
+############################################
+# BYTECODE COMPILER
+############################################
+
+
+class BytecodeCompiler:
+    """
+    Compiles an AST to Code. Every node leaves exactly one value on the
+    stack, so the compiler knows the stack depth at every instruction; a
+    loop records it for break and continue to cut the stack back to.
+    """
+
+    def __init__(self, name="<program>"):
+        self.code = Code(name)
+        self.const_index = {}
+        self.depth = 0
+
+    @classmethod
+    def compile_program(cls, node):
+        compiler = cls()
+        compiler.compile(node)
+        compiler.emit(END, 0, node.pos_start, node.pos_end)
+        return compiler.code
+
+    def compile(self, node):
+        method_name = f"compile_{type(node).__name__}"
+        method = getattr(self, method_name, self.no_compile_method)
+        method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f"No compile_{type(node).__name__} method defined")
+
+    ############################################
+
+    def emit(self, op, arg, pos_start=0, pos_end=0):
+        """
+        Appends an instruction and returns its pc
+        """
+        code = self.code
+        code.ops.append(op)
+        code.args.append(arg)
+        code.starts.append(pos_start)
+        code.ends.append(pos_end)
+
+        effect = STACK_EFFECTS[op]
+        if effect is None:
+            effect = 1 - arg if op == BUILD_LIST else -(arg >> 1)
+        self.depth += effect
+        return len(code.ops) - 1
+
+    def const(self, value):
+        """
+        Index of value in the constant pool, adding it on first use
+        """
+        key = (type(value), value)
+        if type(value) is float:
+            # 0.0 and -0.0 are equal, but not the same constant
+            key = (float, repr(value))
+        try:
+            return self.const_index[key]
+        except (KeyError, TypeError):
+            pass
+        index = len(self.code.consts)
+        self.code.consts.append(value)
+        try:
+            self.const_index[key] = index
+        except TypeError:
+            pass
+        return index
+
+    def label(self):
+        return len(self.code.ops)
+
+    def patch(self, pc, target):
+        self.code.args[pc] = target
+
+    ############################################
+
+    def compile_constant(self, node):
+        self.emit(
+            CONSTANT_OPCODES[type(node)],
+            self.const(node.value),
+            node.pos_start,
+            node.pos_end,
+        )
+
+    compile_AnyNode = compile_constant
+    compile_IntNode = compile_constant
+    compile_FloatNode = compile_constant
+    compile_StringNode = compile_constant
+    compile_NumberNode = compile_constant
+
+    def compile_ListNode(self, node):
+        for element in node.element_nodes:
+            self.compile(element)
+        self.emit(BUILD_LIST, len(node.element_nodes), node.pos_start, node.pos_end)
+
+    def compile_BinOpNode(self, node):
+        self.compile(node.left_node)
+        self.compile(node.right_node)
+        self.emit(BINARY, BINARY_OPERATORS[node.op], node.pos_start, node.pos_end)
+
+    # A trusted operation runs the same BINARY instruction
+    compile_TrustedBinOpNode = compile_BinOpNode
+
+    def compile_UnaryOpNode(self, node):
+        self.compile(node.node)
+        if node.op is Operator.MINUS:
+            op = NEGATE
+        elif node.op is Operator.NOT:
+            op = NOT
+        else:
+            op = SET_POS
+        self.emit(op, 0, node.pos_start, node.pos_end)
+
+    def compile_VarAccessNode(self, node):
+        self.emit(LOAD, self.const(node.var_name), node.pos_start, node.pos_end)
+
+    def compile_VarAssignNode(self, node):
+        self.compile(node.value_node)
+        var_name = node.var_name
+        pos_start = node.pos_start
+        if node.var_type == Types.Any:
+            self.emit(STORE, self.const(var_name), pos_start, pos_start)
+        else:
+            self.emit(
+                STORE_TYPED,
+                self.const((var_name, node.var_type)),
+                pos_start,
+                pos_start + len(var_name),
+            )
+
+    # A frame's slots are the interpreter's: the VM's calls keep their
+    # variables by name
+    compile_LocalAccessNode = compile_VarAccessNode
+    compile_LocalAssignNode = compile_VarAssignNode
+
+    def compile_branch(self, node, should_return_null):
+        self.compile(node)
+        if should_return_null:
+            self.emit(POP, 0)
+            self.emit(NULL, 0)
+
+    def compile_IfNode(self, node):
+        ends = []
+        for condition, expr, should_return_null in node.cases:
+            self.compile(condition)
+            next_case = self.emit(JUMP_IF_FALSE, 0)
+            self.compile_branch(expr, should_return_null)
+            ends.append(self.emit(JUMP, 0))
+            self.depth -= 1
+            self.patch(next_case, self.label())
+
+        if node.else_case:
+            self.compile_branch(*node.else_case)
+        else:
+            self.emit(NULL, 0)
+
+        for pc in ends:
+            self.patch(pc, self.label())
+
+    def compile_loop_body(self, body_node, should_return_null, elements_depth):
+        """
+        Compiles a loop body, whose value goes in the loop's elements
+        elements_depth values down the stack, and returns where it starts
+        """
+        body_start = self.label()
+        self.compile(body_node)
+        if should_return_null:
+            self.emit(POP, 0)
+        else:
+            self.emit(LIST_APPEND, elements_depth)
+        return body_start
+
+    def add_loop(self, body_start, body_end, depth, continue_pc, break_pc):
+        self.code.loops.extend((body_start, body_end, depth, continue_pc, break_pc))
+
+    def finish_loop(self, node):
+        if node.should_return_null:
+            self.emit(NULL, 0)
+        else:
+            self.emit(MAKE_LIST, 0, node.pos_start, node.pos_end)
+
+    def compile_ForNode(self, node):
+        if not node.should_return_null:
+            self.emit(NEW_ELEMENTS, 0)
+
+        self.compile(node.start_value_node)
+        self.compile(node.end_value_node)
+        if node.step_value_node:
+            self.compile(node.step_value_node)
+        else:
+            self.emit(INT, self.const(1))
+        self.emit(FOR_SETUP, self.const(node.var_name))
+
+        loop = self.emit(FOR_ITER, 0)
+        depth = self.depth
+        body_start = self.compile_loop_body(node.body_node, node.should_return_null, 2)
+        self.emit(JUMP, loop)
+        exit_ = self.emit(POP, 0)
+
+        self.patch(loop, exit_)
+        self.add_loop(body_start, exit_, depth, loop, exit_)
+        self.finish_loop(node)
+
+    def compile_WhileNode(self, node):
+        if not node.should_return_null:
+            self.emit(NEW_ELEMENTS, 0)
+
+        loop = self.label()
+        depth = self.depth
+        self.compile(node.condition_node)
+        exit_jump = self.emit(JUMP_IF_FALSE, 0)
+        body_start = self.compile_loop_body(node.body_node, node.should_return_null, 1)
+        self.emit(JUMP, loop)
+
+        exit_ = self.label()
+        self.patch(exit_jump, exit_)
+        self.add_loop(body_start, exit_, depth, loop, exit_)
+        self.finish_loop(node)
+
+    def compile_FuncDefNode(self, node):
+        compiler = BytecodeCompiler(node.var_name or "<anonymous>")
+        body_node = node.body_node
+        compiler.compile(body_node)
+        if not node.should_auto_return:
+            compiler.emit(POP, 0)
+            compiler.emit(NULL, 0)
+        compiler.emit(END, 0, body_node.pos_start, body_node.pos_end)
+
+        info = FunctionInfo(
+            node.var_name, node.arg_names, compiler.code, node.should_auto_return
+        )
+        self.emit(MAKE_FUNCTION, self.const(info), node.pos_start, node.pos_end)
+
+    def compile_CallNode(self, node):
+        self.compile(node.node_to_call)
+        for arg_node in node.arg_nodes:
+            self.compile(arg_node)
+
+        # A variable's value comes out as a fresh copy already
+        fresh = isinstance(node.node_to_call, VarAccessNode)
+        self.emit(CALL, len(node.arg_nodes) << 1 | fresh, node.pos_start, node.pos_end)
+
+    def compile_InlinedCallNode(self, node):
+        # A call between VMFunctions only pushes a frame: the call itself
+        # runs
+        self.compile(node.call_node)
+
+    def compile_ReturnNode(self, node):
+        if node.node_to_return:
+            self.compile(node.node_to_return)
+        else:
+            self.emit(NULL, 0)
+        self.emit(RETURN, 0, node.pos_start, node.pos_end)
+
+    def compile_ContinueNode(self, node):
+        self.emit(CONTINUE, 0, node.pos_start, node.pos_end)
+
+    def compile_BreakNode(self, node):
+        self.emit(BREAK, 0, node.pos_start, node.pos_end)
@@ -0,0 +1,236 @@
+############################################
+# AST CACHE
+############################################
+
+import gc
+import hashlib
+import os
+import pickle
+import tempfile
+
+from tython import __version__
+
+# Bump FORMAT whenever the nodes or the bytecode change shape, so older
+# entries are ignored
+FORMAT = 4
+CACHE_TAG = f"tython-{__version__}-{FORMAT}"
+CACHE_DIRNAME = "__tycache__"
+CACHE_SUFFIX = ".tyc"
+# What an entry can hold: the AST of a script or its bytecode
+CACHE_KINDS = ("ast", "code")
+
+
+def _read_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# mkstemp() makes files only their owner can read; entries get the mode a
+# new file would have instead, so other accounts running the same scripts
+# can read them
+FILE_MODE = 0o666 & ~_read_umask()
+
+
+def text_digest(text):
+    """
+    Hash of a script's text, a str or bytes. Offsets into bytes and into a
+    str differ, so the kind of text is part of it.
+    """
+    if isinstance(text, str):
+        digest = hashlib.sha256(b"str\0")
+        digest.update(text.encode("utf-8", "surrogatepass"))
+    else:
+        digest = hashlib.sha256(b"bytes\0")
+        digest.update(text)
+    return digest.hexdigest()
+
+
+def write_atomic(path, *chunks):
+    """
+    Writes chunks to a temporary file that then replaces path in one step,
+    so readers never see half of it. Returns whether it worked; failing to
+    write a cache file is not an error.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + ".", dir=os.path.dirname(path)
+        )
+    except OSError:
+        return False
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+class ASTCache:
+    """
+    Keeps the parsed AST of every script run from a file, like __pycache__
+    does for Python modules. An entry sits in a __tycache__ directory next
+    to the script, or under prefix (mirroring the script's absolute path)
+    when one is set, and starts with a header holding the Tython version
+    and a hash of the text it was parsed from. Any other text or version
+    is a miss.
+
+    TYTHON_CACHE_DIR sets the prefix and a non-empty TYTHON_NO_CACHE turns
+    the cache off.
+    """
+
+    def __init__(self, prefix=None, enabled=True):
+        self.prefix = prefix
+        self.enabled = enabled
+
+    @classmethod
+    def from_environ(cls, environ=os.environ):
+        return cls(
+            prefix=environ.get("TYTHON_CACHE_DIR") or None,
+            enabled=not environ.get("TYTHON_NO_CACHE"),
+        )
+
+    def cache_dir(self, directory):
+        """
+        Where the entries of the scripts in directory go
+        """
+        directory = os.path.abspath(directory)
+        if self.prefix:
+            directory = os.path.splitdrive(directory)[1].lstrip(os.sep)
+            return os.path.join(self.prefix, directory)
+        return os.path.join(directory, CACHE_DIRNAME)
+
+    def cache_path(self, fn, kind="ast"):
+        head, tail = os.path.split(os.path.abspath(fn))
+        if kind != "ast":
+            tail = f"{tail}.{kind}"
+        return os.path.join(self.cache_dir(head), f"{tail}.{CACHE_TAG}{CACHE_SUFFIX}")
+
+    def load(self, source, kind="ast"):
+        """
+        The cached AST (or with kind="code", the bytecode and the number of
+        nodes the optimizer changed) of source, or None
+        """
+        if not self.enabled or not os.path.isfile(source.fn):
+            return None
+
+        digest = text_digest(source.text)
+        try:
+            with open(self.cache_path(source.fn, kind), "rb") as f:
+                tag, is_bytes, entry_digest, _ = pickle.load(f)
+                if tag != CACHE_TAG or entry_digest != digest:
+                    return None
+
+                # The tree holds no reference cycles, see Parser.parse()
+                gc_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    entry = pickle.load(f)
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+        except Exception:
+            # Missing, unreadable or corrupt entries are misses
+            return None
+
+        # A hit is not lexed, so nothing more is read from a mapped file
+        source.close()
+        return entry
+
+    def store(self, source, node, kind="ast"):
+        """
+        Writes the AST (or bytecode) of source to its entry. Failing to
+        write is not an error.
+        """
+        if not self.enabled or not os.path.isfile(source.fn):
+            return
+
+        try:
+            data = pickle.dumps(node, pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError):
+            # The tree is nested too deeply to pickle
+            return
+
+        self.store_data(
+            source.fn, source.is_bytes, text_digest(source.text), data, kind
+        )
+
+    def store_data(self, fn, is_bytes, digest, data, kind="ast"):
+        """
+        Writes an AST pickled elsewhere (e.g. by a worker process) as the
+        entry of the script fn, whose text hashed to digest
+        """
+        if not self.enabled:
+            return
+
+        path = self.cache_path(fn, kind)
+        header = (CACHE_TAG, is_bytes, digest, os.path.abspath(fn))
+        write_atomic(path, pickle.dumps(header, pickle.HIGHEST_PROTOCOL), data)
+
+    ############################################
+
+    def entries(self, root):
+        """
+        Every cache entry under root, or under the prefix when one is set,
+        including temporary files of unfinished writes
+        """
+        root = self.prefix or root
+        for dirpath, _, filenames in os.walk(root):
+            if not self.prefix and os.path.basename(dirpath) != CACHE_DIRNAME:
+                continue
+            for filename in filenames:
+                if CACHE_SUFFIX in filename:
+                    yield os.path.join(dirpath, filename)
+
+    def is_stale(self, path):
+        """
+        Whether the entry at path is for another version or its script is
+        gone or has changed since it was written
+        """
+        if not path.endswith(CACHE_SUFFIX):
+            return True
+
+        try:
+            with open(path, "rb") as f:
+                tag, is_bytes, digest, fn = pickle.load(f)
+        except Exception:
+            return True
+
+        paths = [self.cache_path(fn, kind) for kind in CACHE_KINDS]
+        if tag != CACHE_TAG or os.path.abspath(path) not in paths:
+            return True
+
+        try:
+            if is_bytes:
+                with open(fn, "rb") as f:
+                    text = f.read()
+            else:
+                with open(fn, encoding="utf-8") as f:
+                    text = f.read()
+        except (OSError, ValueError):
+            return True
+        return text_digest(text) != digest
+
+    def clean(self, root="."):
+        """
+        Removes every stale entry (see is_stale) and temporary files left
+        behind by interrupted writes. Returns the removed paths.
+        """
+        removed = []
+        for path in self.entries(root):
+            if self.is_stale(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                removed.append(path)
+        return removed
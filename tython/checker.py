@@ -0,0 +1,548 @@
+from tython.parser import *
+from tython.types import *
+from tython.errors import StaticTypeError
+from tython.optimizer import LITERAL_TYPES
+
+# What binary_type() and unary_type() give for an operation that fails
+# whatever the values are
+ERROR = object()
+
+NUMBERS = (Int, Float, Number)
+
+# The class of the values a declared variable holds once assigned, for the
+# types that stand for one class
+DECLARED_CLASSES = {Types.Int: Int, Types.Float: Float, Types.String: String}
+
+
+def plain_operation(op):
+    """
+    The function of the plain values of numbers working out op, as the
+    value classes' methods do
+    """
+    expr = f"left {PYTHON_OPERATORS[op]} right"
+    if op in COMPARISONS:
+        expr = f"int({expr})"
+    return eval(f"lambda left, right: {expr}")
+
+
+TRUSTED_OPERATIONS = {op: plain_operation(op) for op in PYTHON_OPERATORS}
+
+
+############################################
+# TYPE CHECKER
+############################################
+
+
+class TypeChecker:
+    """
+    Works out, before a script runs, the class of the values its
+    expressions give, from literals, declared variables and the bodies of
+    the functions called, and reports the operations, assignments to
+    declared variables and calls that fail whatever the values are.
+
+    What it proves is trusted: a binary operator on numbers whose classes
+    are known becomes a TrustedBinOpNode, which the interpreter works out
+    without going through the value's methods, and an assignment whose
+    value is known to have the declared type is no longer checked.
+
+    A variable's class is known from its assignments: the last one on
+    every path to where it is read, in the same function or at top level.
+    No call can assign a function's variables, but any call at top level
+    may `run` a script assigning the global ones, so nothing is known of
+    them after one. A loop only keeps what none of its iterations changes.
+    What is known from a function's body is known of its value wherever
+    the function is called, but not trusted, since its name may stand for
+    something else by then.
+
+    check() returns the checked tree; errors holds what it found, and
+    trusted counts the nodes made trusted.
+    """
+
+    def __init__(self):
+        self.source = None
+        self.errors = []
+        self.trusted = 0
+        # The class of every variable known here, and whether it is
+        # trusted, by name
+        self.types = {}
+        # Whether the nodes are in a function's body, whose symbol table
+        # no call can write to
+        self.in_function = False
+        # The definitions of the functions no other node names, and the
+        # number of arguments of the built-in functions no node names
+        self.functions = {}
+        self.builtins = {}
+        # The names assigned in the trees checked before, which ran first
+        self.names = set()
+        # The functions whose value's class is being worked out
+        self.inferring = set()
+
+    def check(self, node, source=None):
+        """
+        Checks node, the tree of source, after the trees checked before
+        """
+        self.source = source
+        functions, names = definitions(node)
+        self.functions = {
+            func_name: function
+            for func_name, function in functions.items()
+            if func_name not in self.names
+        }
+        names |= self.names
+        self.names = names
+        self.builtins = {}
+        for method_name, method in vars(SystemFunction).items():
+            func_name = method_name[len("execute_") :]
+            if method_name.startswith("execute_") and func_name not in names:
+                self.builtins[func_name] = len(method.arg_names)
+        node, _ = self.visit(node)
+        return node
+
+    def visit(self, node):
+        """
+        node, made trusted where it can be, and the class of its value with
+        whether it is trusted, or None when it is not known
+        """
+        node_type = type(node)
+        value_type = LITERAL_TYPES.get(node_type)
+        if value_type is not None:
+            return node, (value_type, True)
+        method_name = f"visit_{node_type.__name__}"
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node)
+
+    def no_visit_method(self, node):
+        raise Exception(f"No visit_{type(node).__name__} method defined")
+
+    def error(self, node, details, pos_end=None):
+        self.errors.append(
+            StaticTypeError(
+                node.pos_start,
+                node.pos_end if pos_end is None else pos_end,
+                details,
+                self.source,
+            )
+        )
+
+    ############################################
+
+    def visit_ListNode(self, node):
+        node.element_nodes[:] = [
+            self.visit(element_node)[0] for element_node in node.element_nodes
+        ]
+        return node, (List, True)
+
+    def visit_VarAccessNode(self, node):
+        return node, self.types.get(node.var_name)
+
+    def visit_VarAssignNode(self, node):
+        node.value_node, kind = self.visit(node.value_node)
+        var_name = node.var_name
+        var_type = node.var_type
+
+        if var_type != Types.Any:
+            if kind is not None:
+                value_type = VALUE_TYPES[kind[0]]
+                if value_type == var_type or (
+                    var_type == Types.Number and value_type in (Types.Int, Types.Float)
+                ):
+                    if kind[1]:
+                        node.var_type = Types.Any
+                        self.trusted += 1
+                else:
+                    self.error(
+                        node,
+                        f"Cannot assign '{var_name}' <{var_type.name}> to variable of type <{value_type.name}>",
+                        node.pos_start + len(var_name),
+                    )
+            value_type = DECLARED_CLASSES.get(var_type)
+            kind = (value_type, True) if value_type else None
+
+        if kind is None:
+            self.types.pop(var_name, None)
+        else:
+            self.types[var_name] = kind
+        return node, kind
+
+    visit_LocalAccessNode = visit_VarAccessNode
+    visit_LocalAssignNode = visit_VarAssignNode
+
+    def visit_BinOpNode(self, node):
+        node.left_node, left = self.visit(node.left_node)
+        node.right_node, right = self.visit(node.right_node)
+        if left is None or right is None:
+            return node, None
+
+        op = node.op
+        value_type = binary_type(op, left[0], right[0])
+        if value_type is ERROR:
+            self.error(
+                node,
+                f"Illegal operation: <{VALUE_TYPES[left[0]].name}> {op.value} "
+                f"<{VALUE_TYPES[right[0]].name}>",
+            )
+            return node, None
+        if value_type is None:
+            return node, None
+
+        trusted = left[1] and right[1]
+        if (
+            trusted
+            and left[0] in NUMBERS
+            and right[0] in NUMBERS
+            and op in TRUSTED_OPERATIONS
+            and (op is not Operator.DIV or is_nonzero_literal(node.right_node))
+        ):
+            node = TrustedBinOpNode(node, value_type, TRUSTED_OPERATIONS[op])
+            self.trusted += 1
+        return node, (value_type, trusted)
+
+    def visit_UnaryOpNode(self, node):
+        node.node, kind = self.visit(node.node)
+        if kind is None:
+            return node, None
+
+        value_type = unary_type(node.op, kind[0])
+        if value_type is ERROR:
+            self.error(
+                node,
+                f"Illegal operation: {node.op.value} <{VALUE_TYPES[kind[0]].name}>",
+            )
+            return node, None
+        if value_type is None:
+            return node, None
+        return node, (value_type, kind[1])
+
+    def visit_IfNode(self, node):
+        before = self.types
+        ends = []
+        cases = []
+        for condition, expr, should_return_null in node.cases:
+            condition, _ = self.visit(condition)
+            before = self.types
+            self.types = dict(before)
+            expr, _ = self.visit(expr)
+            ends.append(self.types)
+            self.types = before
+            cases.append((condition, expr, should_return_null))
+        node.cases = cases
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.types = dict(before)
+            expr, _ = self.visit(expr)
+            ends.append(self.types)
+            node.else_case = (expr, should_return_null)
+        else:
+            ends.append(before)
+
+        self.types = meet(ends)
+        return node, None
+
+    def visit_ForNode(self, node):
+        node.start_value_node, _ = self.visit(node.start_value_node)
+        node.end_value_node, _ = self.visit(node.end_value_node)
+        if node.step_value_node:
+            node.step_value_node, _ = self.visit(node.step_value_node)
+
+        types = self.loop_types(node)
+        self.types = dict(types)
+        self.types[node.var_name] = (Int, True)
+        node.body_node, _ = self.visit(node.body_node)
+        self.types = types
+        return node, None
+
+    def visit_WhileNode(self, node):
+        types = self.loop_types(node)
+        self.types = dict(types)
+        node.condition_node, _ = self.visit(node.condition_node)
+        node.body_node, _ = self.visit(node.body_node)
+        self.types = types
+        return node, None
+
+    def visit_FuncDefNode(self, node):
+        types = self.types
+        in_function = self.in_function
+        self.types = {}
+        self.in_function = True
+        try:
+            node.body_node, _ = self.visit(node.body_node)
+        finally:
+            self.types = types
+            self.in_function = in_function
+
+        if node.var_name:
+            self.types.pop(node.var_name, None)
+        return node, None
+
+    def visit_CallNode(self, node):
+        node.node_to_call, _ = self.visit(node.node_to_call)
+        kinds = []
+        for idx, arg_node in enumerate(node.arg_nodes):
+            node.arg_nodes[idx], kind = self.visit(arg_node)
+            kinds.append(kind)
+
+        kind = None
+        node_to_call = node.node_to_call
+        if type(node_to_call) is VarAccessNode:
+            func_name = node_to_call.var_name
+            function = self.functions.get(func_name)
+            if function is not None:
+                arg_count = len(function.arg_names)
+            else:
+                arg_count = self.builtins.get(func_name)
+
+            if arg_count is not None and arg_count != len(kinds):
+                self.error(
+                    node,
+                    f"too {'many' if len(kinds) > arg_count else 'few'} args "
+                    f"passed into '{func_name}' (Expected {arg_count})",
+                )
+            elif function is not None:
+                value_type = self.return_type(function, kinds, self.types)
+                kind = (value_type, False) if value_type else None
+
+        if not self.in_function:
+            self.types = {}
+        return node, kind
+
+    def visit_InlinedCallNode(self, node):
+        # The body runs on the caller's symbol table, assigning nothing
+        node.body_node, kind = self.visit(node.body_node)
+        node.call_node, _ = self.visit(node.call_node)
+        return node, kind and (kind[0], False)
+
+    def visit_ReturnNode(self, node):
+        if node.node_to_return:
+            node.node_to_return, _ = self.visit(node.node_to_return)
+        return node, None
+
+    def visit_ContinueNode(self, node):
+        return node, None
+
+    def visit_BreakNode(self, node):
+        return node, None
+
+    ############################################
+
+    def loop_types(self, node):
+        """
+        What is known here that stays so all through the loop node: the
+        classes of the variables it does not assign, or only assigns values
+        of the class they have. At top level, nothing stays known through a
+        loop making calls.
+        """
+        if not self.in_function and calls(node):
+            return {}
+        assigned = assignments(node)
+        return {
+            var_name: kind
+            for var_name, kind in self.types.items()
+            if var_name not in assigned or (assigned[var_name] is kind[0] and kind[1])
+        }
+
+    def return_type(self, function, kinds, types):
+        """
+        The class of the value of a call of function, whose arguments'
+        classes are kinds, from types, or None when it is not known
+        """
+        if not function.should_auto_return or function.var_name in self.inferring:
+            return None
+        types = dict(types)
+        for arg_name, kind in zip(function.arg_names, kinds):
+            if kind is None:
+                types.pop(arg_name, None)
+            else:
+                types[arg_name] = kind
+
+        self.inferring.add(function.var_name)
+        try:
+            return self.infer(function.body_node, types)
+        finally:
+            self.inferring.discard(function.var_name)
+
+    def infer(self, node, types):
+        """
+        The class of node's value from types, or None when it is not known
+        """
+        node_type = type(node)
+        value_type = LITERAL_TYPES.get(node_type)
+        if value_type is not None:
+            return value_type
+        if node_type is VarAccessNode:
+            kind = types.get(node.var_name)
+            return kind and kind[0]
+        if isinstance(node, BinOpNode):
+            left = self.infer(node.left_node, types)
+            right = self.infer(node.right_node, types)
+            value_type = left and right and binary_type(node.op, left, right)
+        elif node_type is UnaryOpNode:
+            value_type = self.infer(node.node, types)
+            value_type = value_type and unary_type(node.op, value_type)
+        elif node_type is CallNode and type(node.node_to_call) is VarAccessNode:
+            function = self.functions.get(node.node_to_call.var_name)
+            if function is None or len(function.arg_names) != len(node.arg_nodes):
+                return None
+            kinds = []
+            for arg_node in node.arg_nodes:
+                value_type = self.infer(arg_node, types)
+                kinds.append(value_type and (value_type, False))
+            return self.return_type(function, kinds, types)
+        else:
+            return None
+        return None if value_type is ERROR else value_type
+
+
+def binary_type(op, left, right):
+    """
+    The class of the value op gives for values of the classes left and
+    right, as the left one's method works it out: ERROR when it fails
+    whatever the values are, None when that is not known
+    """
+    if op is Operator.NOT:
+        return None
+    if left is Int:
+        if right is Int:
+            return Int if op in ARITHMETIC else Boolean
+        # An Int compares with any other number as a Number does
+        if right in NUMBERS and op in COMPARISONS:
+            return Number
+        return ERROR if right in VALUE_TYPES else None
+    if left in (Float, Number):
+        if right in NUMBERS:
+            return Number
+        return ERROR if right in VALUE_TYPES else None
+    if left is String:
+        if op is Operator.PLUS or op is Operator.MINUS:
+            if right is String:
+                return String
+        elif op is Operator.MUL:
+            if right is Int:
+                return String
+            if right is Number:
+                return None
+        return ERROR if right in VALUE_TYPES else None
+    if left in (Boolean, Null):
+        return ERROR
+    return None
+
+
+def unary_type(op, value_type):
+    """
+    The class of the value op gives for a value of the class value_type
+    (see binary_type())
+    """
+    if op is Operator.PLUS:
+        return value_type
+    if op is Operator.MINUS:
+        # A value is negated by multiplying it by the Number -1
+        if value_type in (Float, Number, Any):
+            return Number
+        if value_type is String:
+            return String
+        if value_type in (Int, List, Boolean, Null):
+            return ERROR
+    elif op is Operator.NOT:
+        if value_type is Int:
+            return Int
+        if value_type in (Float, Number):
+            return Number
+        if value_type is Any:
+            return Boolean
+        if value_type in (String, List, Boolean, Null):
+            return ERROR
+    return None
+
+
+def meet(types_list):
+    """
+    What all of types_list know alike
+    """
+    first, *rest = types_list
+    return {
+        var_name: kind
+        for var_name, kind in first.items()
+        if all(types.get(var_name) == kind for types in rest)
+    }
+
+
+def is_nonzero_literal(node):
+    value_type = LITERAL_TYPES.get(type(node))
+    return value_type is not None and value_type is not String and node.value != 0
+
+
+def walk(node):
+    """
+    node and every node under it, but for the bodies of the functions
+    defined under it, which run in the symbol tables of their calls
+    """
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif isinstance(item, Node):
+            yield item
+            if type(item) is FuncDefNode:
+                continue
+            stack.extend(getattr(item, field) for field in item.fields)
+
+
+def calls(node):
+    """
+    Whether anything under node is a call
+    """
+    return any(type(item) in (CallNode, InlinedCallNode) for item in walk(node))
+
+
+def assignments(node):
+    """
+    The variables assigned under node, with the class of the values that
+    every assignment of each gives, or None
+    """
+    assigned = {}
+    for item in walk(node):
+        item_type = type(item)
+        if item_type is VarAssignNode:
+            value_type = DECLARED_CLASSES.get(item.var_type)
+        elif item_type is ForNode:
+            value_type = Int
+        elif item_type is FuncDefNode:
+            value_type = None
+        else:
+            continue
+        var_name = item.var_name
+        if assigned.get(var_name, value_type) is not value_type:
+            value_type = None
+        assigned[var_name] = value_type
+    return assigned
+
+
+def definitions(node):
+    """
+    The definitions of the functions under node that nothing else under it
+    names, by name, and the names of all variables assigned or taken as
+    arguments under node
+    """
+    functions = {}
+    names = set()
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif isinstance(item, Node):
+            item_type = type(item)
+            if item_type in (VarAssignNode, ForNode, FuncDefNode):
+                var_name = item.var_name
+                if var_name in names:
+                    functions.pop(var_name, None)
+                elif item_type is FuncDefNode and var_name:
+                    functions[var_name] = item
+                names.add(var_name)
+            if item_type is FuncDefNode:
+                for arg_name in item.arg_names:
+                    functions.pop(arg_name, None)
+                    names.add(arg_name)
+            stack.extend(getattr(item, field) for field in item.fields)
+    return functions, names
@@ -0,0 +1,539 @@
+from tython.parser import *
+from tython.types import *
+from tython.runtime.result import RuntimeResult
+from tython.errors import RuntimeError, TypeError
+from tython.context import Context
+
+
+############################################
+# SIGNALS
+############################################
+
+
+class Unwind(Exception):
+    """
+    Raised by compiled code where a RuntimeResult would come back with
+    should_return() set; caught by whatever would have acted on that flag
+    """
+
+
+class ErrorSignal(Unwind):
+    def __init__(self, error):
+        self.error = error
+
+
+class ReturnSignal(Unwind):
+    def __init__(self, value):
+        self.value = value
+
+
+class ContinueSignal(Unwind):
+    pass
+
+
+class BreakSignal(Unwind):
+    pass
+
+
+def unwind(res):
+    """
+    The value of a RuntimeResult from a visit() or an execute(), raising
+    whatever it carries instead
+    """
+    if res.error:
+        raise ErrorSignal(res.error)
+    if res.func_return_value:
+        raise ReturnSignal(res.func_return_value)
+    if res.loop_should_continue:
+        raise ContinueSignal()
+    if res.loop_should_break:
+        raise BreakSignal()
+    return res.value
+
+
+def wind(code, context):
+    """
+    Runs compiled code, returning what it does as a RuntimeResult
+    """
+    res = RuntimeResult()
+    try:
+        return res.success(code(context))
+    except ErrorSignal as e:
+        return res.failure(e.error)
+    except ReturnSignal as e:
+        return res.success_return(e.value)
+    except ContinueSignal:
+        return res.success_continue()
+    except BreakSignal:
+        return res.success_break()
+
+
+############################################
+# COMPILED FUNCTION
+############################################
+
+
+class CompiledFunction(Function):
+    """
+    A function whose body has been compiled to a closure
+    """
+
+    def __init__(self, name, body_node, arg_names, body, should_auto_return, source):
+        super().__init__(
+            name, body_node, arg_names, ClosureCompiler, should_auto_return, source
+        )
+        self.body = body
+
+    def copy(self):
+        copy = CompiledFunction(
+            self.name,
+            self.body_node,
+            self.arg_names,
+            self.body,
+            self.should_auto_return,
+            self.source,
+        )
+        copy.context = self.context
+        copy.pos_start = self.pos_start
+        copy.pos_end = self.pos_end
+        return copy
+
+    def call(self, args):
+        """
+        Runs the body with args, raising what execute() would return in its
+        RuntimeResult
+        """
+        arg_names = self.arg_names
+        exec_ctx = self.generate_new_context()
+
+        if len(args) != len(arg_names):
+            raise ErrorSignal(self.check_args(arg_names, args).error)
+        symbols = exec_ctx.symbol_table.symbols
+        for arg_name, arg_value in zip(arg_names, args):
+            arg_value.context = exec_ctx
+            symbols[arg_name] = arg_value
+
+        try:
+            value = self.body(exec_ctx)
+        except ReturnSignal as e:
+            return e.value
+
+        return value if self.should_auto_return else Null()
+
+    def execute(self, args):
+        return wind(lambda _: self.call(args), None)
+
+
+############################################
+# CLOSURE COMPILER
+############################################
+
+
+class ClosureCompiler:
+    """
+    Compiles an AST once into nested closures, one per node, each taking the
+    context and returning the node's value. Operators, names and positions
+    are looked up while compiling, so running the program is nothing but
+    closure calls; errors and return/break/continue travel as exceptions
+    (see Unwind) instead of being checked for after every child.
+
+    visit() compiles and runs a node, giving the same RuntimeResult as
+    Interpreter.visit().
+    """
+
+    def visit(self, node, context):
+        return wind(self.compile(node), context)
+
+    def compile(self, node):
+        method_name = f"compile_{type(node).__name__}"
+        method = getattr(self, method_name, self.no_compile_method)
+        return method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f"No compile_{type(node).__name__} method defined")
+
+    ############################################
+
+    def compile_constant(self, node, value_type):
+        value = node.value
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def constant(context):
+            result = value_type(value)
+            result.context = context
+            result.pos_start = pos_start
+            result.pos_end = pos_end
+            return result
+
+        return constant
+
+    def compile_AnyNode(self, node):
+        return self.compile_constant(node, Any)
+
+    def compile_NumberNode(self, node):
+        return self.compile_constant(node, Number)
+
+    def compile_IntNode(self, node):
+        return self.compile_constant(node, Int)
+
+    def compile_FloatNode(self, node):
+        return self.compile_constant(node, Float)
+
+    def compile_StringNode(self, node):
+        return self.compile_constant(node, String)
+
+    def compile_ListNode(self, node):
+        element_codes = [self.compile(element) for element in node.element_nodes]
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def list_(context):
+            result = List([code(context) for code in element_codes])
+            result.context = context
+            result.pos_start = pos_start
+            result.pos_end = pos_end
+            return result
+
+        return list_
+
+    def compile_BinOpNode(self, node):
+        left_code = self.compile(node.left_node)
+        right_code = self.compile(node.right_node)
+        method = node.method
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def bin_op(context):
+            left = left_code(context)
+            right = right_code(context)
+            result, error = getattr(left, method)(right)
+            if error:
+                raise ErrorSignal(error)
+            result.pos_start = pos_start
+            result.pos_end = pos_end
+            return result
+
+        return bin_op
+
+    # Trusted operations go through the values' methods here all the same
+    compile_TrustedBinOpNode = compile_BinOpNode
+
+    def compile_UnaryOpNode(self, node):
+        code = self.compile(node.node)
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        if node.op is Operator.MINUS:
+
+            def unary_op(context):
+                number, error = code(context).multiply(Number(-1))
+                if error:
+                    raise ErrorSignal(error)
+                number.pos_start = pos_start
+                number.pos_end = pos_end
+                return number
+
+        elif node.op is Operator.NOT:
+
+            def unary_op(context):
+                number, error = code(context).not_()
+                if error:
+                    raise ErrorSignal(error)
+                number.pos_start = pos_start
+                number.pos_end = pos_end
+                return number
+
+        else:
+
+            def unary_op(context):
+                return code(context).set_pos(pos_start, pos_end)
+
+        return unary_op
+
+    def compile_VarAccessNode(self, node):
+        var_name = node.var_name
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def var_access(context):
+            symbol_table = context.symbol_table
+            value = symbol_table.symbols.get(var_name)
+            if value is None:
+                value = symbol_table.get(var_name)
+                if value is None:
+                    raise ErrorSignal(
+                        RuntimeError(
+                            pos_start, pos_end, f"{var_name} is not defined", context
+                        )
+                    )
+
+            value = value.copy()
+            value.pos_start = pos_start
+            value.pos_end = pos_end
+            value.context = context
+            return value
+
+        return var_access
+
+    def compile_VarAssignNode(self, node):
+        code = self.compile(node.value_node)
+        var_name = node.var_name
+        var_type = node.var_type
+        pos_start = node.pos_start
+
+        if var_type == Types.Any:
+
+            def var_assign(context):
+                value = code(context)
+                context.symbol_table.symbols[var_name] = value
+                return value
+
+            return var_assign
+
+        allowed = (var_type,)
+        if var_type == Types.Number:
+            allowed += (Types.Int, Types.Float)
+
+        def var_assign(context):
+            value = code(context)
+            if value.type not in allowed:
+                raise ErrorSignal(
+                    TypeError(
+                        pos_start,
+                        pos_start + len(var_name),
+                        f"Cannot assign '{var_name}' <{var_type.name}> to variable of type <{value.type.name}>",
+                        context,
+                    )
+                )
+            context.symbol_table.symbols[var_name] = value
+            return value
+
+        return var_assign
+
+    # Compiled functions run in tables of their own, keeping variables by
+    # name
+    compile_LocalAccessNode = compile_VarAccessNode
+    compile_LocalAssignNode = compile_VarAssignNode
+
+    def compile_branch(self, node, should_return_null):
+        code = self.compile(node)
+        if not should_return_null:
+            return code
+
+        def branch(context):
+            code(context)
+            return Null()
+
+        return branch
+
+    def compile_IfNode(self, node):
+        cases = [
+            (self.compile(condition), self.compile_branch(expr, should_return_null))
+            for condition, expr, should_return_null in node.cases
+        ]
+        if node.else_case:
+            else_code = self.compile_branch(*node.else_case)
+        else:
+            else_code = lambda _: Null()
+
+        def if_(context):
+            for condition_code, code in cases:
+                if condition_code(context).is_true():
+                    return code(context)
+            return else_code(context)
+
+        return if_
+
+    def compile_ForNode(self, node):
+        start_code = self.compile(node.start_value_node)
+        end_code = self.compile(node.end_value_node)
+        if node.step_value_node:
+            step_code = self.compile(node.step_value_node)
+        else:
+            step_code = lambda _: Int(1)
+        body_code = self.compile(node.body_node)
+        var_name = node.var_name
+        should_return_null = node.should_return_null
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def for_(context):
+            elements = []
+            start_value = start_code(context)
+            end_value = end_code(context)
+            step_value = step_code(context)
+
+            i = start_value.value
+            step = step_value.value
+            symbols = context.symbol_table.symbols
+
+            while i < end_value.value if step >= 0 else i > end_value.value:
+                symbols[var_name] = Int(i)
+                i += step
+
+                try:
+                    value = body_code(context)
+                except ContinueSignal:
+                    continue
+                except BreakSignal:
+                    break
+
+                elements.append(value)
+
+            if should_return_null:
+                return Null()
+            result = List(elements)
+            result.context = context
+            result.pos_start = pos_start
+            result.pos_end = pos_end
+            return result
+
+        return for_
+
+    def compile_WhileNode(self, node):
+        condition_code = self.compile(node.condition_node)
+        body_code = self.compile(node.body_node)
+        should_return_null = node.should_return_null
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def while_(context):
+            elements = []
+
+            while condition_code(context).is_true():
+                try:
+                    value = body_code(context)
+                except ContinueSignal:
+                    continue
+                except BreakSignal:
+                    break
+
+                elements.append(value)
+
+            if should_return_null:
+                return Null()
+            result = List(elements)
+            result.context = context
+            result.pos_start = pos_start
+            result.pos_end = pos_end
+            return result
+
+        return while_
+
+    def compile_FuncDefNode(self, node):
+        func_name = node.var_name
+        body_node = node.body_node
+        body_code = self.compile(body_node)
+        arg_names = node.arg_names
+        should_auto_return = node.should_auto_return
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def func_def(context):
+            func_value = CompiledFunction(
+                func_name,
+                body_node,
+                arg_names,
+                body_code,
+                should_auto_return,
+                context.source,
+            )
+            func_value.context = context
+            func_value.pos_start = pos_start
+            func_value.pos_end = pos_end
+
+            if func_name:
+                context.symbol_table.symbols[func_name] = func_value
+
+            return func_value
+
+        return func_def
+
+    def compile_CallNode(self, node):
+        callee_code = self.compile(node.node_to_call)
+        arg_codes = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        # A variable's value comes out as a fresh copy already
+        fresh = isinstance(node.node_to_call, VarAccessNode)
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def call(context):
+            value_to_call = callee_code(context)
+            if not fresh:
+                value_to_call = value_to_call.copy()
+            value_to_call.pos_start = pos_start
+            value_to_call.pos_end = pos_end
+            args = [code(context) for code in arg_codes]
+
+            if type(value_to_call) is CompiledFunction:
+                return_value = value_to_call.call(args)
+            else:
+                return_value = unwind(value_to_call.execute(args))
+
+            return_value = return_value.copy()
+            return_value.pos_start = pos_start
+            return_value.pos_end = pos_end
+            return_value.context = context
+            return return_value
+
+        return call
+
+    def compile_InlinedCallNode(self, node):
+        call_code = self.compile(node.call_node)
+        body_code = self.compile(node.body_node)
+        func_name = node.func_name
+        arg_names = node.arg_names
+        var_names = [
+            arg_node.var_name
+            for arg_node in node.call_node.arg_nodes
+            if isinstance(arg_node, VarAccessNode)
+        ]
+        pos_start = node.pos_start
+        pos_end = node.pos_end
+
+        def inlined_call(context):
+            symbol_table = context.symbol_table
+            value = symbol_table.get(func_name)
+            if not isinstance(value, Function) or value.arg_names is not arg_names:
+                return call_code(context)
+            for var_name in var_names:
+                if symbol_table.get(var_name) is None:
+                    return call_code(context)
+
+            exec_ctx = Context(func_name, context, pos_start, context.source)
+            exec_ctx.symbol_table = symbol_table
+            return_value = body_code(exec_ctx).copy()
+            return_value.pos_start = pos_start
+            return_value.pos_end = pos_end
+            return_value.context = context
+            return return_value
+
+        return inlined_call
+
+    def compile_ReturnNode(self, node):
+        if not node.node_to_return:
+
+            def return_(_):
+                raise ReturnSignal(Null())
+
+            return return_
+
+        code = self.compile(node.node_to_return)
+
+        def return_(context):
+            raise ReturnSignal(code(context))
+
+        return return_
+
+    def compile_ContinueNode(self, _):
+        def continue_(_):
+            raise ContinueSignal()
+
+        return continue_
+
+    def compile_BreakNode(self, _):
+        def break_(_):
+            raise BreakSignal()
+
+        return break_
@@ -4,10 +4,11 @@
 
 
 class Context:
-    def __init__(self, display_name, parent=None, parent_entry_pos=None):
+    def __init__(self, display_name, parent=None, parent_entry_pos=None, source=None):
         self.display_name = display_name
         self.parent = parent
         self.parent_entry_pos = parent_entry_pos
+        self.source = source
         self.symbol_table = None
 
 
@@ -19,23 +20,61 @@ class Context:
 class SymbolTable:
     """
     Stores all variables that have been assigned
+
+    The table of a call of a function the resolver has been through is a
+    frame: it keeps the function's variables in the list slots, at the
+    index layout gives each name, instead of in symbols. Names the layout
+    does not have are looked up in the parents.
     """
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, layout=None):
         self.symbols = {}
         self.parent = parent
+        self.layout = layout
+        self.slots = None if layout is None else [None] * len(layout)
 
     def __repr__(self) -> str:
-        return f"{self.symbols}"
+        if self.slots is None:
+            return f"{self.symbols}"
+        return f"{self.frame_symbols()}"
+
+    def frame_symbols(self):
+        """
+        The variables assigned in a frame, by name
+        """
+        slots = self.slots
+        return {
+            name: slots[slot]
+            for name, slot in self.layout.items()
+            if slots[slot] is not None
+        }
 
     def get(self, name):
-        value = self.symbols.get(name, None)
-        if value == None and self.parent:
-            return self.parent.get(name)
-        return value
+        """
+        The value of name here or in the nearest parent that has it. Looked
+        up in a loop: the parents of a deeply recursive call are as many as
+        the calls.
+        """
+        symbol_table = self
+        while True:
+            slots = symbol_table.slots
+            if slots is None:
+                value = symbol_table.symbols.get(name, None)
+            else:
+                slot = symbol_table.layout.get(name)
+                value = None if slot is None else slots[slot]
+            if value is not None or symbol_table.parent is None:
+                return value
+            symbol_table = symbol_table.parent
 
     def set(self, name, value):
-        self.symbols[name] = value
+        if self.slots is None:
+            self.symbols[name] = value
+        else:
+            self.slots[self.layout[name]] = value
 
     def remove(self, name):
-        del self.symbols[name]
+        if self.slots is None:
+            del self.symbols[name]
+        else:
+            self.slots[self.layout[name]] = None
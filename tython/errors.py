@@ -3,34 +3,27 @@
 ############################################
 
 
-def string_with_arrows(text, pos_start, pos_end):
+def string_with_arrows(source, pos_start, pos_end):
     result = ""
 
-    # Calculate indices
-    idx_start = max(text.rfind("\n", 0, pos_start.idx), 0)
-    idx_end = text.find("\n", idx_start + 1)
-    if idx_end < 0:
-        idx_end = len(text)
+    # Calculate lines and columns
+    ln_start, col_start = source.line_col(pos_start)
+    if pos_end is not None and pos_end > pos_start:
+        ln_end, col_end = source.end_line_col(pos_end)
+    else:
+        ln_end, col_end = ln_start, col_start
 
     # Generate each line
-    line_count = pos_end.ln - pos_start.ln + 1
-    for i in range(line_count):
-        # Calculate line columns
-        line = text[idx_start:idx_end]
-        col_start = pos_start.col if i == 0 else 0
-        col_end = pos_end.col if i == line_count - 1 else len(line) - 1
+    for ln in range(ln_start, ln_end + 1):
+        line = source.line_text(ln)
+        col_from = col_start if ln == ln_start else 0
+        col_to = col_end if ln == ln_end else len(line)
 
         # Append to result
         result += line + "\n"
-        result += " " * col_start + "^" * (col_end - col_start)
+        result += " " * col_from + "^" * (col_to - col_from) + "\n"
 
-        # Re-calculate indices
-        idx_start = idx_end
-        idx_end = text.find("\n", idx_start + 1)
-        if idx_end < 0:
-            idx_end = len(text)
-
-    return result.replace("\t", "")
+    return result.rstrip("\n").replace("\t", "")
 
 
 ############################################
@@ -49,65 +42,109 @@ class Errors(Enum):
 
 
 class Error:
-    def __init__(self, pos_start, pos_end, type_: Errors, details: str):
+    def __init__(self, pos_start, pos_end, type_: Errors, details: str, source):
         self.pos_start = pos_start
         self.pos_end = pos_end
         self.type = type_
         self.details = details
+        self.source = source
 
     def __repr__(self) -> str:
         result = f"{self.type.name}: {self.details}\n"
-        result += f"File '{self.pos_start.fn}', line {self.pos_start.ln + 1}"
-        result += "\n\n" + string_with_arrows(
-            self.pos_start.ftxt, self.pos_start, self.pos_end
+        if self.source is None or self.pos_start is None:
+            return result
+        result += (
+            f"File '{self.source.fn}', line {self.source.line(self.pos_start) + 1}"
         )
+        result += "\n\n" + string_with_arrows(self.source, self.pos_start, self.pos_end)
         return result
 
 
 class IllegalCharError(Error):
-    def __init__(self, pos_start, pos_end, details: str):
-        super().__init__(pos_start, pos_end, Errors.IllegalCharError, details)
+    def __init__(self, pos_start, pos_end, details: str, source):
+        super().__init__(pos_start, pos_end, Errors.IllegalCharError, details, source)
 
 
 class ExpectedCharError(Error):
-    def __init__(self, pos_start, pos_end, details: str):
-        super().__init__(pos_start, pos_end, Errors.ExpectedCharError, details)
+    def __init__(self, pos_start, pos_end, details: str, source):
+        super().__init__(pos_start, pos_end, Errors.ExpectedCharError, details, source)
 
 
 class SyntaxError(Error):
-    def __init__(self, pos_start, pos_end, details: str):
-        super().__init__(pos_start, pos_end, Errors.SyntaxError, details)
+    def __init__(self, pos_start, pos_end, details: str, source):
+        super().__init__(pos_start, pos_end, Errors.SyntaxError, details, source)
+
+
+class StaticTypeError(Error):
+    """
+    A type or arity error the type checker found before running
+    """
+
+    def __init__(self, pos_start, pos_end, details: str, source):
+        super().__init__(pos_start, pos_end, Errors.TypeError, details, source)
 
 
 class RuntimeError(Error):
     def __init__(self, pos_start, pos_end, details: str, context):
-        super().__init__(pos_start, pos_end, Errors.RuntimeError, details)
+        super().__init__(
+            pos_start,
+            pos_end,
+            Errors.RuntimeError,
+            details,
+            context.source if context else None,
+        )
         self.context = context
 
     def __repr__(self):
         result = self.generate_traceback()
         result += f"{self.type.name}: {self.details}\n"
-        result += "\n\n" + string_with_arrows(
-            self.pos_start.ftxt, self.pos_start, self.pos_end
-        )
+        if self.source is None or self.pos_start is None:
+            return result
+        result += "\n\n" + string_with_arrows(self.source, self.pos_start, self.pos_end)
         return result
 
     def generate_traceback(self):
-        result = ""
+        lines = []
         pos = self.pos_start
         ctx = self.context
 
         while ctx:
-            result = (
-                f"  File {pos.fn}, line {str(pos.ln + 1)}, in {ctx.display_name}\n"
-                + result
-            )
+            if ctx.source is not None and pos is not None:
+                line = str(ctx.source.line(pos) + 1)
+                lines.append(
+                    f"  File {ctx.source.fn}, line {line}, in {ctx.display_name}\n"
+                )
             pos = ctx.parent_entry_pos
             ctx = ctx.parent
-
-        return "Traceback (most recent call last):\n" + result
+        lines.reverse()
+
+        # Like Python, a line repeated more than three times in a row (deep
+        # recursion) is shown three times
+        result = []
+        repeats = 0
+        for idx, line in enumerate(lines):
+            if idx and line == lines[idx - 1]:
+                repeats += 1
+            else:
+                repeats = 0
+            if repeats < 3:
+                result.append(line)
+            if repeats >= 3 and (idx + 1 == len(lines) or lines[idx + 1] != line):
+                more = repeats - 2
+                result.append(
+                    f"  [Previous line repeated {more} more time{'s' if more > 1 else ''}]\n"
+                )
+
+        return "Traceback (most recent call last):\n" + "".join(result)
 
 
 class TypeError(Error):
-    def __init__(self, pos_start, pos_end, details: str):
-        super().__init__(pos_start, pos_end, Errors.TypeError, details)
+    def __init__(self, pos_start, pos_end, details: str, context):
+        super().__init__(
+            pos_start,
+            pos_end,
+            Errors.TypeError,
+            details,
+            context.source if context else None,
+        )
+        self.context = context
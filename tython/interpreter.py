@@ -1,8 +1,10 @@
 from tython.parser import *
 from tython.types import *
 from tython.runtime.result import RuntimeResult
-from tython.lex import TokenType
 from tython.errors import RuntimeError, TypeError
+from tython.context import Context
+from tython.tracing import box
+from tython.resolver import resolve
 
 
 ############################################
@@ -23,35 +25,29 @@ class Interpreter:
 
     def visit_AnyNode(self, node, context):
         return RuntimeResult().success(
-            Any(node.tok.value)
-            .set_context(context)
-            .set_pos(node.pos_start, node.pos_end)
+            Any(node.value).set_context(context).set_pos(node.pos_start, node.pos_end)
         )
 
     def visit_NumberNode(self, node, context):
         return RuntimeResult().success(
-            Number(node.tok.value)
+            Number(node.value)
             .set_context(context)
             .set_pos(node.pos_start, node.pos_end)
         )
 
     def visit_IntNode(self, node, context):
         return RuntimeResult().success(
-            Int(node.tok.value)
-            .set_context(context)
-            .set_pos(node.pos_start, node.pos_end)
+            Int(node.value).set_context(context).set_pos(node.pos_start, node.pos_end)
         )
 
     def visit_FloatNode(self, node, context):
         return RuntimeResult().success(
-            Float(node.tok.value)
-            .set_context(context)
-            .set_pos(node.pos_start, node.pos_end)
+            Float(node.value).set_context(context).set_pos(node.pos_start, node.pos_end)
         )
 
     def visit_StringNode(self, node, context):
         return RuntimeResult().success(
-            String(node.tok.value)
+            String(node.value)
             .set_context(context)
             .set_pos(node.pos_start, node.pos_end)
         )
@@ -79,42 +75,34 @@ class Interpreter:
         if res.should_return():
             return res
 
-        if node.op_tok.type == TokenType.PLUS:
-            result, error = left.add(right)
-        elif node.op_tok.type == TokenType.MINUS:
-            result, error = left.subtract(right)
-        elif node.op_tok.type == TokenType.MUL:
-            result, error = left.multiply(right)
-        elif node.op_tok.type == TokenType.DIV:
-            result, error = left.divide(right)
-        elif node.op_tok.type == TokenType.POWER:
-            result, error = left.power(right)
-        elif node.op_tok.type == TokenType.EE:
-            result, error = left.compare_eq(right)
-        elif node.op_tok.type == TokenType.NE:
-            result, error = left.compare_ne(right)
-        elif node.op_tok.type == TokenType.LT:
-            result, error = left.compare_lt(right)
-        elif node.op_tok.type == TokenType.GT:
-            result, error = left.compare_gt(right)
-        elif node.op_tok.type == TokenType.LTE:
-            result, error = left.compare_lte(right)
-        elif node.op_tok.type == TokenType.GTE:
-            result, error = left.compare_gte(right)
-        elif node.op_tok.matches(TokenType.KEYWORD, "and"):
-            result, error = left.and_(right)
-        elif node.op_tok.matches(TokenType.KEYWORD, "not"):
-            result, error = left.not_(right)
-        elif node.op_tok.matches(TokenType.KEYWORD, "or"):
-            result, error = left.or_(right)
-        else:
-            result, error = None, None
-
+        result, error = getattr(left, node.method)(right)
         if error:
             return res.failure(error)
         else:
             return res.success(result.set_pos(node.pos_start, node.pos_end))
 
+    def visit_TrustedBinOpNode(self, node, context):
+        # The operands' classes are known: work out the plain value, and box
+        # it as the left operand's method would
+        res = RuntimeResult()
+
+        left = res.register(self.visit(node.left_node, context))
+        if res.should_return():
+            return res
+        right = res.register(self.visit(node.right_node, context))
+        if res.should_return():
+            return res
+
+        return res.success(
+            box(
+                node.value_type,
+                node.operation(left.value, right.value),
+                left.context,
+                node.pos_start,
+                node.pos_end,
+            )
+        )
+
     def visit_UnaryOpNode(self, node, context):
         res = RuntimeResult()
         number = res.register(self.visit(node.node, context))
@@ -122,11 +110,8 @@ class Interpreter:
             return res
 
         error = None
-
-        if node.op_tok.type == TokenType.MINUS:
-            number, error = number.multiply(Number(-1))
-        elif node.op_tok.matches(TokenType.KEYWORD, "not"):
-            number, error = number.not_()
+        if node.method:
+            number, error = getattr(number, node.method)()
 
         if error:
             return res.failure(error)
@@ -135,7 +120,7 @@ class Interpreter:
 
     def visit_VarAccessNode(self, node, context):
         res = RuntimeResult()
-        var_name = node.var_name_tok.value
+        var_name = node.var_name
         value = context.symbol_table.get(var_name)
 
         if not value:
@@ -148,9 +133,34 @@ class Interpreter:
         value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
         return res.success(value)
 
+    def visit_LocalAccessNode(self, node, context):
+        value = context.symbol_table.slots[node.slot]
+        if value is None:
+            # Not assigned in this call yet: looked up in the callers
+            return self.visit_VarAccessNode(node, context)
+
+        value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        return RuntimeResult().success(value)
+
     def visit_VarAssignNode(self, node, context):
+        res = self.assigned_value(node, context)
+        if not res.should_return():
+            context.symbol_table.set(node.var_name, res.value)
+        return res
+
+    def visit_LocalAssignNode(self, node, context):
+        res = self.assigned_value(node, context)
+        if not res.should_return():
+            context.symbol_table.slots[node.slot] = res.value
+        return res
+
+    def assigned_value(self, node, context):
+        """
+        The value the assignment node gives, checked against the variable's
+        type
+        """
         res = RuntimeResult()
-        var_name = node.var_name_tok.value
+        var_name = node.var_name
 
         value = res.register(self.visit(node.value_node, context))
         if res.should_return():
@@ -162,13 +172,13 @@ class Interpreter:
             ):
                 return res.failure(
                     TypeError(
-                        node.var_name_tok.pos_start,
-                        node.var_name_tok.pos_end,
+                        node.pos_start,
+                        node.pos_start + len(var_name),
                         f"Cannot assign '{var_name}' <{node.var_type.name}> to variable of type <{value.type.name}>",
+                        context,
                     )
                 )
 
-        context.symbol_table.set(var_name, value)
         return res.success(value)
 
     def visit_IfNode(self, node, context):
@@ -221,7 +231,7 @@ class Interpreter:
             condition = lambda: i > end_value.value
 
         while condition():
-            context.symbol_table.set(node.var_name_tok.value, Int(i))
+            context.symbol_table.set(node.var_name, Int(i))
             i += step_value.value
 
             value = res.register(self.visit(node.body_node, context))
@@ -287,18 +297,24 @@ class Interpreter:
     def visit_FuncDefNode(self, node, context):
         res = RuntimeResult()
 
-        func_name = node.var_name_tok.value if node.var_name_tok else None
+        func_name = node.var_name
         body_node = node.body_node
-        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        arg_names = node.arg_names
         func_value = (
             Function(
-                func_name, body_node, arg_names, Interpreter, node.should_auto_return
+                func_name,
+                body_node,
+                arg_names,
+                Interpreter,
+                node.should_auto_return,
+                context.source,
+                resolve(node),
             )
             .set_context(context)
             .set_pos(node.pos_start, node.pos_end)
         )
 
-        if node.var_name_tok:
+        if node.var_name:
             context.symbol_table.set(func_name, func_value)
 
         return res.success(func_value)
@@ -327,6 +343,31 @@ class Interpreter:
         )
         return res.success(return_value)
 
+    def visit_InlinedCallNode(self, node, context):
+        res = RuntimeResult()
+        symbol_table = context.symbol_table
+
+        value = symbol_table.get(node.func_name)
+        if not isinstance(value, Function) or value.arg_names is not node.arg_names:
+            return self.visit(node.call_node, context)
+        for arg_node in node.call_node.arg_nodes:
+            if isinstance(arg_node, VarAccessNode) and not symbol_table.get(
+                arg_node.var_name
+            ):
+                return self.visit(node.call_node, context)
+
+        exec_ctx = Context(node.func_name, context, node.pos_start, context.source)
+        exec_ctx.symbol_table = symbol_table
+        return_value = res.register(self.visit(node.body_node, exec_ctx))
+        if res.should_return():
+            return res
+        return_value = (
+            return_value.copy()
+            .set_pos(node.pos_start, node.pos_end)
+            .set_context(context)
+        )
+        return res.success(return_value)
+
     def visit_ReturnNode(self, node, context):
         res = RuntimeResult()
 
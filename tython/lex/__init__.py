@@ -1,4 +1,5 @@
 from .lexer import Lexer
-from .position import Position
+from .source import SourceFile
 from .token import Token
 from .token_type import TokenType
+from .token_buffer import TokenBuffer, TokenCursor
@@ -2,20 +2,11 @@
 # LEXER
 ############################################
 
-from .position import Position
-from .token import Token
+from .token_buffer import TokenBuffer, TOKEN_CODES
 from .token_type import TokenType
 from tython.types import Types
 from tython.errors import *
-import string
-
-from tython.lex import token_type
-
-WHITESPACE = " \t"
-DIGITS = "0123456789"
-LETTERS = string.ascii_letters
-LETTERS_DIGITS = LETTERS + DIGITS
-SYMBOLS = ".:;"
+import re
 
 KEYWORDS = [
     "and",
@@ -45,198 +36,175 @@ TYPES = [
     Types.String.value,
 ]
 
+# Resolves an identifier to its token type code in a single dict lookup
+WORD_CODES = {
+    **{type_: TOKEN_CODES[TokenType.TYPE] for type_ in TYPES},
+    **{keyword: TOKEN_CODES[TokenType.KEYWORD] for keyword in KEYWORDS},
+}
+
+OPERATORS = {
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "->": TokenType.ARROW,
+    "*": TokenType.MUL,
+    "/": TokenType.DIV,
+    "^": TokenType.POWER,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    "[": TokenType.LSQUARE,
+    "]": TokenType.RSQUARE,
+    "=": TokenType.EQ,
+    "==": TokenType.EE,
+    "!=": TokenType.NE,
+    "<": TokenType.LT,
+    "<=": TokenType.LTE,
+    ">": TokenType.GT,
+    ">=": TokenType.GTE,
+    ",": TokenType.COMMA,
+}
+
+OPERATOR_CODES = {op: TOKEN_CODES[type_] for op, type_ in OPERATORS.items()}
+BYTES_OPERATOR_CODES = {op.encode(): code for op, code in OPERATOR_CODES.items()}
+
+NEWLINE = TOKEN_CODES[TokenType.NEWLINE]
+INT = TOKEN_CODES[TokenType.INT]
+FLOAT = TOKEN_CODES[TokenType.FLOAT]
+STRING = TOKEN_CODES[TokenType.STRING]
+IDENTIFIER = TOKEN_CODES[TokenType.IDENTIFIER]
+
+# Operators whose token only spans their first character
+SHORT_OPERATORS = {"+", "*", "/", "^", "(", ")", "[", "]", ",", "!="}
+BYTES_SHORT_OPERATORS = {op.encode() for op in SHORT_OPERATORS}
+
+# Every character of the input is matched by exactly one of these groups,
+# so a single finditer() walks the whole text one token (or run) at a time
+TOKEN_REGEX = r"""
+    (?P<whitespace>[ \t]+)
+    |(?P<newline>{newline})
+    |(?P<float>[0-9]+\.[0-9]*)
+    |(?P<int>[0-9]+)
+    |(?P<identifier>[A-Za-z:][A-Za-z0-9_:]*)
+    |(?P<string>"[^"]*")
+    |(?P<open_string>"[^"]*)
+    |(?P<operator>->|==|!=|<=|>=|[-+*/^()\[\]=<>,])
+    |(?P<bang>!)
+    |(?P<illegal>{illegal})
+"""
+
+TOKEN_PATTERN = re.compile(
+    TOKEN_REGEX.format(newline=r"[;\n]", illegal="."),
+    re.VERBOSE | re.DOTALL,
+)
+
+# Scans a mapped file without decoding it. Files read in text mode have
+# their line endings translated and their characters decoded, so here
+# "\r\n" and a lone "\r" are newlines and an illegal character is a whole
+# UTF-8 sequence.
+BYTES_TOKEN_PATTERN = re.compile(
+    TOKEN_REGEX.format(
+        newline=r"\r\n?|[;\n]", illegal=r"[\xc0-\xff][\x80-\xbf]*|."
+    ).encode(),
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def decode_utf8(raw):
+    """
+    Decodes bytes of a mapped file the way text mode reads them, with
+    "\r\n" and a lone "\r" both turned into "\n"
+    """
+    text = str(raw, "utf-8", "replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
 
 class Lexer:
-    def __init__(self, fn, text: str):
-        self.fn = fn
-        self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)
-        self.current_char = None
-        self.advance()
-
-    def advance(self):
-        self.pos.advance(self.current_char)
-        self.current_char = (
-            self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
-        )
+    def __init__(self, source):
+        self.source = source
 
     def make_tokens(self):
-        tokens = []
-
-        while self.current_char != None:
-            if self.current_char in WHITESPACE:
-                self.advance()
-            elif self.current_char in ";\n":
-                tokens.append(Token(TokenType.NEWLINE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char in DIGITS:
-                tokens.append(self.make_number())
-            elif self.current_char in LETTERS + SYMBOLS:
-                tokens.append(self.make_identifier())
-            elif self.current_char == '"':
-                tokens.append(self.make_string())
-            elif self.current_char == "+":
-                tokens.append(Token(TokenType.PLUS, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "-":
-                tokens.append(self.make_minus_arrow())
-            elif self.current_char == "*":
-                tokens.append(Token(TokenType.MUL, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "/":
-                tokens.append(Token(TokenType.DIV, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "^":
-                tokens.append(Token(TokenType.POWER, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "(":
-                tokens.append(Token(TokenType.LPAREN, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ")":
-                tokens.append(Token(TokenType.RPAREN, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "[":
-                tokens.append(Token(TokenType.LSQUARE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "]":
-                tokens.append(Token(TokenType.RSQUARE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "!":
-                tok, error = self.make_not_equals()
-                if error:
-                    return [], error
-                tokens.append(tok)
-            elif self.current_char == "=":
-                tokens.append(self.make_equals())
-            elif self.current_char == "<":
-                tokens.append(self.make_less_than())
-            elif self.current_char == ">":
-                tokens.append(self.make_greater_than())
-            elif self.current_char == ",":
-                tokens.append(Token(TokenType.COMMA, pos_start=self.pos))
-                self.advance()
-            else:
-                pos_start = self.pos.copy()
-                char = self.current_char
-                self.advance()
-                return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
-
-        tokens.append(Token(TokenType.EOF, pos_start=self.pos))
+        tokens = TokenBuffer(self.source)
+        eof, error = self.scan(tokens, 0, len(self.source.text))
+        # The tokens hold all that is needed of a mapped file
+        self.source.close()
+        if error:
+            return [], error
+
+        tokens.append(TokenType.EOF, None, eof, eof + 1)
         return tokens, None
 
-    def make_number(self):
-        num_str = ""
-        dot_count = 0
-        pos_start = self.pos.copy()
-
-        while self.current_char != None and self.current_char in DIGITS + ".":
-            if self.current_char == ".":
-                if dot_count == 1:
-                    break
-                dot_count += 1
-                num_str += self.current_char
-            else:
-                num_str += self.current_char
-            self.advance()
-
-        if dot_count == 0:
-            return Token(TokenType.INT, int(num_str), pos_start, self.pos)
+    def scan(self, tokens, pos, endpos):
+        """
+        Appends the tokens found in text[pos:endpos] to tokens and returns
+        the offset the scan stopped at (the EOF position) and any error.
+        The text is either a str or bytes-like (a mapped file); bytes are
+        only decoded for identifiers and strings.
+        """
+        source = self.source
+        text = source.text
+        add_type = tokens.types.append
+        add_value = tokens.values.append
+        add_start = tokens.starts.append
+        add_end = tokens.ends.append
+        names = {}
+        eof = endpos
+
+        if isinstance(text, str):
+            pattern = TOKEN_PATTERN
+            operator_codes = OPERATOR_CODES
+            short_operators = SHORT_OPERATORS
+            decode = str
         else:
-            return Token(TokenType.FLOAT, float(num_str), pos_start, self.pos)
-
-    def make_identifier(self):
-        id_str = ""
-        pos_start = self.pos.copy()
-
-        while self.current_char != None and self.current_char in LETTERS_DIGITS + "_:":
-            id_str += self.current_char
-            self.advance()
-
-        if id_str in KEYWORDS:
-            tok_type = TokenType.KEYWORD
-        elif id_str in TYPES:
-            tok_type = TokenType.TYPE
-        else:
-            tok_type = TokenType.IDENTIFIER
-
-        return Token(tok_type, id_str, pos_start, self.pos)
-
-    def make_string(self):
-        string = ""
-        pos_start = self.pos.copy()
-        escape_character = False
-        self.advance()
-
-        escape_characters = {"n": "\n", "t": "\t"}
-
-        while self.current_char != None and (
-            self.current_char != '"' or escape_character
-        ):
-            if escape_character:
-                string += escape_characters.get(self.current_char, self.current_char)
-
+            pattern = BYTES_TOKEN_PATTERN
+            operator_codes = BYTES_OPERATOR_CODES
+            short_operators = BYTES_SHORT_OPERATORS
+            decode = decode_utf8
+
+        for match in pattern.finditer(text, pos, endpos):
+            kind = match.lastgroup
+
+            if kind == "whitespace":
+                continue
+
+            start, end = match.span()
+
+            if kind == "newline":
+                add_type(NEWLINE)
+                add_value(None)
+            elif kind == "int":
+                add_type(INT)
+                add_value(int(match.group()))
+            elif kind == "float":
+                add_type(FLOAT)
+                add_value(float(match.group()))
+            elif kind == "identifier":
+                name = decode(match.group())
+                add_type(WORD_CODES.get(name, IDENTIFIER))
+                add_value(names.setdefault(name, name))
+            elif kind == "string":
+                add_type(STRING)
+                add_value(decode(match.group()[1:-1]).replace("\\", ""))
+            elif kind == "open_string":
+                # An unterminated string steps one past the end of the text
+                end = eof = end + 1
+                add_type(STRING)
+                add_value(decode(match.group()[1:]).replace("\\", ""))
+            elif kind == "operator":
+                op = match.group()
+                add_type(operator_codes[op])
+                add_value(None)
+                if op in short_operators:
+                    end = start + 1
+            elif kind == "bang":
+                # The '!' and the character after it are both consumed
+                return eof, ExpectedCharError(start, end + 1, "'=' (after '!')", source)
             else:
-                if self.current_char == "\\":
-                    escape_character = True
-                else:
-                    string += self.current_char
-            self.advance()
-            escape_character = False
-
-        self.advance()
-        return Token(TokenType.STRING, string, pos_start, self.pos)
-
-    def make_not_equals(self):
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            return Token(TokenType.NE, pos_start=pos_start), None
-
-        self.advance()
-        return None, ExpectedCharError(pos_start, self.pos, "'=' (after '!')")
-
-    def make_equals(self):
-        tok_type = TokenType.EQ
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            tok_type = TokenType.EE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_less_than(self):
-        tok_type = TokenType.LT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            tok_type = TokenType.LTE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_greater_than(self):
-        tok_type = TokenType.GT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            tok_type = TokenType.GTE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_minus_arrow(self):
-        tok_type = TokenType.MINUS
-        pos_start = self.pos.copy()
-        self.advance()
+                return eof, IllegalCharError(
+                    start, end, "'" + decode(match.group()) + "'", source
+                )
 
-        if self.current_char == ">":
-            self.advance()
-            tok_type = TokenType.ARROW
+            add_start(start)
+            add_end(end)
 
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+        return eof, None
@@ -0,0 +1,119 @@
+############################################
+# SOURCE FILE
+############################################
+
+from array import array
+from bisect import bisect_right
+import mmap
+import re
+
+# Where lines end in the bytes of a file, as text mode reading would have it
+BYTES_NEWLINE = re.compile(rb"\r\n?|\n")
+
+
+class SourceFile:
+    """
+    Owns the text of a script. Tokens, nodes and values only store integer
+    offsets into it; lines and columns are looked up here when an error is
+    rendered.
+
+    The text is either a str or, for files loaded with SourceFile.open, the
+    raw bytes of a memory-mapped file. Offsets then count bytes and only the
+    lines shown in errors are decoded. The mapping is released by close()
+    once the file has been lexed.
+
+    A SourceFile may also hold just a piece of a script read from a stream,
+    starting at line first_line (counted from 0) of it; line numbers are
+    those of the whole script.
+    """
+
+    def __init__(self, fn, text, first_line=0):
+        self.fn = fn
+        self.text = text
+        self.first_line = first_line
+        self.is_bytes = not isinstance(text, str)
+        self._line_starts = None
+
+    @classmethod
+    def open(cls, fn):
+        """
+        Maps a script into memory instead of reading it into a str
+        """
+        with open(fn, "rb") as f:
+            try:
+                text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                text = b""
+        return cls(fn, text)
+
+    def close(self):
+        """
+        Releases the mapping of a file loaded with open(), keeping a copy of
+        its bytes for the lines errors show
+        """
+        text = self.text
+        if isinstance(text, mmap.mmap):
+            self.text = text[:]
+            text.close()
+
+    def __repr__(self) -> str:
+        return f"SourceFile({self.fn!r})"
+
+    @property
+    def line_starts(self):
+        if self._line_starts is None:
+            line_starts = array("I", [0])
+            text = self.text
+            if self.is_bytes:
+                line_starts.extend(
+                    match.end() for match in BYTES_NEWLINE.finditer(text)
+                )
+            else:
+                idx = text.find("\n")
+                while idx != -1:
+                    line_starts.append(idx + 1)
+                    idx = text.find("\n", idx + 1)
+            self._line_starts = line_starts
+        return self._line_starts
+
+    def line(self, offset):
+        return bisect_right(self.line_starts, offset) - 1 + self.first_line
+
+    def line_col(self, offset):
+        """
+        Line and column of the character at offset
+        """
+        ln = self.line(offset)
+        return ln, self.column(ln, offset)
+
+    def end_line_col(self, offset):
+        """
+        Line and column just past a span ending at offset, kept on the line
+        of the span's last character
+        """
+        ln = self.line(offset - 1) if offset > 0 else self.first_line
+        return ln, self.column(ln, offset)
+
+    def column(self, ln, offset):
+        start = self.line_starts[ln - self.first_line]
+        if not self.is_bytes:
+            return offset - start
+
+        # Count characters, not bytes; offsets past the end (EOF) count one
+        # column each
+        end = min(offset, len(self.text))
+        return len(str(self.text[start:end], "utf-8", "replace")) + offset - end
+
+    def line_text(self, ln):
+        line_starts = self.line_starts
+        ln -= self.first_line
+        start = line_starts[ln]
+        if ln + 1 < len(line_starts):
+            line = self.text[start : line_starts[ln + 1] - 1]
+        else:
+            line = self.text[start:]
+
+        if self.is_bytes:
+            return str(line, "utf-8", "replace").rstrip("\r")
+        return line
@@ -8,13 +8,11 @@ class Token:
         self.type = type_
         self.value = value
 
-        if pos_start:
-            self.pos_start = pos_start.copy()
-            self.pos_end = pos_start.copy()
-            self.pos_end.advance()
+        self.pos_start = pos_start
+        self.pos_end = pos_end
 
-        if pos_end:
-            self.pos_end = pos_end
+        if pos_start is not None and pos_end is None:
+            self.pos_end = pos_start + 1
 
     def __repr__(self):
         return self.type.name + (f":{self.value}" if self.value != None else "")
@@ -0,0 +1,127 @@
+############################################
+# TOKEN BUFFER
+############################################
+
+from array import array
+
+from .token import Token
+from .token_type import TokenType
+
+TOKEN_TYPES = list(TokenType)
+TOKEN_CODES = {type_: code for code, type_ in enumerate(TOKEN_TYPES)}
+
+
+class TokenBuffer:
+    """
+    Stores a token stream column by column: a type code, a value and the
+    start/end offsets of every token. Token objects are only built on
+    request (AST leaves, debugging).
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.types = array("B")
+        self.values = []
+        self.starts = array("I")
+        self.ends = array("I")
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, idx):
+        return self.token(idx)
+
+    def __repr__(self) -> str:
+        return repr([self.token(idx) for idx in range(len(self))])
+
+    def append(self, type_, value, start, end):
+        self.types.append(TOKEN_CODES[type_])
+        self.values.append(value)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def splice(self, start, stop, tokens, delta):
+        """
+        Replaces tokens[start:stop] with every token of another buffer and
+        moves the tokens after them by delta characters
+        """
+        shift = delta.__add__
+        tail_starts = array("I", map(shift, self.starts[stop:]))
+        tail_ends = array("I", map(shift, self.ends[stop:]))
+
+        self.types[start:stop] = tokens.types
+        self.values[start:stop] = tokens.values
+        self.starts[start:] = tokens.starts + tail_starts
+        self.ends[start:] = tokens.ends + tail_ends
+
+    def type(self, idx):
+        return TOKEN_TYPES[self.types[idx]]
+
+    def token(self, idx):
+        return Token(
+            TOKEN_TYPES[self.types[idx]],
+            self.values[idx],
+            self.starts[idx],
+            self.ends[idx],
+        )
+
+
+class TokenCursor:
+    """
+    Read position into a TokenBuffer. Exposes the current token's type, type
+    code and value directly and only builds a Token when asked.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.last_idx = len(buffer) - 1
+        self.idx = -1
+        self.tok_idx = -1
+        self.code = None
+        self.type = None
+        self.value = None
+        self.advance()
+
+    def advance(self):
+        idx = self.idx = self.idx + 1
+        if idx <= self.last_idx:
+            self.tok_idx = idx
+            code = self.code = self.buffer.types[idx]
+            self.type = TOKEN_TYPES[code]
+            self.value = self.buffer.values[idx]
+
+    def reverse(self, amount=1):
+        self.idx -= amount
+        self.update()
+
+    def seek(self, idx):
+        self.idx = idx
+        self.update()
+
+    def update(self):
+        if self.idx <= self.last_idx:
+            self.tok_idx = self.idx
+            self.code = self.buffer.types[self.idx]
+            self.type = TOKEN_TYPES[self.code]
+            self.value = self.buffer.values[self.idx]
+
+    def matches(self, type_, value):
+        return self.type == type_ and self.value == value
+
+    def token(self):
+        idx = self.tok_idx
+        buffer = self.buffer
+        return Token(
+            TOKEN_TYPES[buffer.types[idx]],
+            buffer.values[idx],
+            buffer.starts[idx],
+            buffer.ends[idx],
+        )
+
+    @property
+    def pos_start(self):
+        return self.buffer.starts[self.tok_idx]
+
+    @property
+    def pos_end(self):
+        return self.buffer.ends[self.tok_idx]
@@ -1,8 +1,15 @@
 from tython.types import Null, Boolean, SystemFunction
-from tython.lex import Lexer
-from tython.parser import Parser
+from tython.lex import Lexer, SourceFile
+from tython.parser import Parser, StatementReader
 from tython.context import Context, SymbolTable
 from tython.interpreter import Interpreter
+from tython.closures import ClosureCompiler
+from tython.bytecode import BytecodeCompiler
+from tython.vm import VirtualMachine
+from tython.tiered import TieredInterpreter
+from tython.cache import ASTCache
+from tython.optimizer import Optimizer, OPT_LEVEL
+from tython.checker import TypeChecker
 
 
 ############################################
@@ -22,15 +29,65 @@ global_symbol_table.set("clear", SystemFunction("clear"))
 global_symbol_table.set("type", SystemFunction("type"))
 global_symbol_table.set("len", SystemFunction("len"))
 
+# Parsed scripts, reused while their text is unchanged
+ast_cache = ASTCache.from_environ()
+
+# What runs an AST: anything with Interpreter's visit(node, context)
+ENGINES = {
+    "interpreter": Interpreter,
+    "closures": ClosureCompiler,
+    "vm": VirtualMachine,
+    "tiered": TieredInterpreter,
+}
+
 
 ############################################
 # RUN
 ############################################
 
 
-def run(fn, text):
+def make_engine(engine):
+    """
+    What runs an AST: engine itself, or a new one of the ENGINES it names
+    """
+    if isinstance(engine, str):
+        return ENGINES[engine]()
+    return engine
+
+
+def make_optimizer(opt_level):
+    """
+    What optimizes an AST: opt_level itself, or a new Optimizer at that level
+    """
+    if isinstance(opt_level, int):
+        return Optimizer(opt_level)
+    return opt_level
+
+
+def make_checker(trusted):
+    """
+    What checks types before running: trusted itself, a new TypeChecker when
+    it is True, or None
+    """
+    if trusted is True:
+        return TypeChecker()
+    return trusted or None
+
+
+def run(fn, text, engine="interpreter", opt_level=OPT_LEVEL, trusted=False):
+    return run_source(SourceFile(fn, text), engine, opt_level, trusted)
+
+
+def run_file(fn, engine="interpreter", opt_level=OPT_LEVEL, trusted=False):
+    """
+    Runs a script straight from a memory-mapped file
+    """
+    return run_source(SourceFile.open(fn), engine, opt_level, trusted)
+
+
+def parse(source):
     # Generate tokens
-    lexer = Lexer(fn, text)
+    lexer = Lexer(source)
     tokens, error = lexer.make_tokens()
 
     if error:
@@ -44,10 +101,130 @@ def run(fn, text):
     if ast.error:
         return None, ast.error
 
+    return ast.node, None
+
+
+def parse_source(source, opt_level=OPT_LEVEL):
+    """
+    The optimized AST of source, parsed from the cache when it has been
+    parsed before. The cache keeps the AST as parsed.
+    """
+    node = ast_cache.load(source)
+    if node is None:
+        node, error = parse(source)
+        if error:
+            return None, error
+        ast_cache.store(source, node)
+
+    return make_optimizer(opt_level).optimize(node), None
+
+
+def compile_source(source, opt_level=OPT_LEVEL):
+    """
+    The bytecode of source, from the cache when it has been compiled before.
+    The cache only keeps bytecode optimized at OPT_LEVEL, along with the
+    number of nodes the optimizer changed.
+    """
+    optimizer = make_optimizer(opt_level)
+    cached = optimizer.level == OPT_LEVEL
+    if cached:
+        entry = ast_cache.load(source, "code")
+        if entry is not None:
+            code, changed = entry
+            optimizer.changed += changed
+            return code, None
+
+    changed = optimizer.changed
+    node, error = parse_source(source, optimizer)
+    if error:
+        return None, error
+
+    code = BytecodeCompiler.compile_program(node)
+    if cached:
+        ast_cache.store(source, (code, optimizer.changed - changed), "code")
+    return code, None
+
+
+def check_source(source, opt_level=OPT_LEVEL, trusted=True):
+    """
+    The optimized AST of source, made trusted where the type checker (see
+    make_checker()) proves it can be, or the first error it found
+    """
+    node, error = parse_source(source, opt_level)
+    if error:
+        return None, error
+
+    checker = make_checker(trusted)
+    errors = len(checker.errors)
+    node = checker.check(node, source)
+    if len(checker.errors) > errors:
+        return None, checker.errors[errors]
+    return node, None
+
+
+def run_source(source, engine="interpreter", opt_level=OPT_LEVEL, trusted=False):
+    """
+    Runs source with engine. When trusted, its types are checked first, a
+    type error stopping it before it runs, and what the checker proves is
+    not checked again as it runs.
+    """
+    context = Context("<program>", source=source)
+    context.symbol_table = global_symbol_table  # type:ignore
+
+    is_vm = engine == "vm" or isinstance(engine, VirtualMachine)
+    if is_vm and not trusted:
+        code, error = compile_source(source, opt_level)
+        if error:
+            return None, error
+        result = make_engine(engine).run(code, context)
+        return result.value, result.error
+
+    if trusted:
+        node, error = check_source(source, opt_level, trusted)
+    else:
+        node, error = parse_source(source, opt_level)
+    if error:
+        return None, error
+
+    if is_vm:
+        code = BytecodeCompiler.compile_program(node)
+        result = make_engine(engine).run(code, context)
+        return result.value, result.error
+
     # Interpret AST
-    interpreter = Interpreter()
+    interpreter = make_engine(engine)
+    result = interpreter.visit(node, context)
+
+    return result.value, result.error
+
+
+def run_stream(fn, stream, engine="interpreter", opt_level=OPT_LEVEL, trusted=False):
+    """
+    Runs a script read from a binary stream one top-level statement at a
+    time, each as soon as it has been read, keeping none of their values.
+    When trusted, each statement's types are checked before it runs.
+    """
+    interpreter = make_engine(engine)
+    optimizer = make_optimizer(opt_level)
+    checker = make_checker(trusted)
     context = Context("<program>")
     context.symbol_table = global_symbol_table  # type:ignore
-    result = interpreter.visit(ast.node, context)
 
-    return result.value, result.error
+    for node, source, error in StatementReader(fn, stream):
+        if error:
+            return None, error
+
+        context.source = source
+        node = optimizer.optimize(node)
+        if checker:
+            errors = len(checker.errors)
+            node = checker.check(node, source)
+            if len(checker.errors) > errors:
+                return None, checker.errors[errors]
+        result = interpreter.visit(node, context)
+        if result.error:
+            return None, result.error
+        if result.should_return():
+            break
+
+    return None, None
@@ -0,0 +1,822 @@
+import math
+
+from tython.parser import *
+from tython.types import *
+
+# Optimization levels: nothing; constants folded and dead code dropped; and
+# expressions rewritten as well
+NO_OPT = 0
+FOLD = 1
+REWRITE = 2
+
+# The level scripts are optimized at unless told otherwise
+OPT_LEVEL = FOLD
+
+# The value each literal node stands for, and the literal node standing for
+# a value of each class
+LITERAL_TYPES = {
+    IntNode: Int,
+    FloatNode: Float,
+    NumberNode: Number,
+    StringNode: String,
+    AnyNode: Any,
+}
+LITERAL_NODES = {
+    value_type: node_type for node_type, value_type in LITERAL_TYPES.items()
+}
+
+# Largest folded values: past these a literal costs more to keep in the tree
+# (and in the AST cache) than working it out at run time
+MAX_INT_BITS = 1024
+MAX_STRING_LENGTH = 4096
+
+# Operators of Ints that cannot fail, giving an Int, and (all COMPARISONS)
+# a Boolean
+SAFE_ARITHMETIC = (Operator.PLUS, Operator.MINUS, Operator.MUL)
+
+# Statements after which the rest of their block never runs
+JUMPS = (ReturnNode, BreakNode, ContinueNode)
+
+# Most nodes in the body of a function inlined at its calls
+INLINE_SIZE = 12
+
+# The arguments of the calls that may be inlined, and the nodes an inlined
+# body may be made of
+ARGUMENT_NODES = (*LITERAL_TYPES, VarAccessNode)
+INLINE_NODES = (*ARGUMENT_NODES, BinOpNode, UnaryOpNode)
+
+
+############################################
+# OPTIMIZER
+############################################
+
+
+class Optimizer:
+    """
+    Rewrites an AST, between Parser.parse() and running it, into one that
+    runs the same with fewer nodes.
+
+    At FOLD, an operator whose operands are literals becomes the literal of
+    its value, worked out with the value classes' own methods; an operation
+    that fails (dividing by zero, adding a String to an Int) is left alone
+    so that it still fails when it runs. Dead code goes: statements after a
+    return, break or continue, and the cases of an if that a literal
+    condition rules out.
+
+    At REWRITE, `e * 1`, `1 * e`, `e - 0` and `e ^ 1` also become e when e
+    is known to be an Int, pure expressions a loop's iterations all give
+    the same value are hoisted out of it (see hoist()), an expression
+    repeated within a region is worked out once (see CommonSubexpressions),
+    and calls of small functions are inlined (see visit_CallNode()) unless
+    inline_size is 0.
+
+    A rewritten node keeps the positions of the node it replaces, so values
+    and errors point where they did. changed counts the nodes rewritten by
+    every optimize() so far.
+    """
+
+    def __init__(self, level=OPT_LEVEL, inline_size=INLINE_SIZE):
+        self.level = level
+        self.inline_size = inline_size
+        self.changed = 0
+        # Calls whose function's body was put in their place
+        self.inlined = 0
+        # Operators that no longer run each time their region runs, their
+        # values being reused
+        self.saved = 0
+        # The loop variables that hold an Int wherever they are read
+        self.ints = frozenset()
+        # Whether the nodes are in a function's body, whose symbol table
+        # no call can write to
+        self.in_function = False
+        # Hidden variables made so far
+        self.temps = 0
+        # The arguments and a copy of the body of every function that may
+        # be inlined, by name
+        self.functions = {}
+
+    def optimize(self, node):
+        if self.level <= NO_OPT:
+            return node
+        if self.level >= REWRITE and self.inline_size:
+            self.functions = inlinable(node, self.inline_size)
+        return self.eliminate(self.visit(node))
+
+    def visit(self, node):
+        method_name = f"visit_{type(node).__name__}"
+        method = getattr(self, method_name, self.generic_visit)
+        return method(node)
+
+    def generic_visit(self, node):
+        for field in node.fields:
+            setattr(node, field, map_nodes(getattr(node, field), self.visit))
+        return node
+
+    ############################################
+
+    def visit_BinOpNode(self, node):
+        self.generic_visit(node)
+        left_node = node.left_node
+        right_node = node.right_node
+
+        left = literal_value(left_node)
+        right = literal_value(right_node)
+        if left is not None and right is not None:
+            if too_large(node.op, left, right):
+                return node
+            return self.fold(node, lambda: getattr(left, node.method)(right))
+
+        if self.level >= REWRITE:
+            op = node.op
+            if (
+                op in (Operator.MUL, Operator.POWER)
+                and is_int_literal(right_node, 1)
+                or op is Operator.MINUS
+                and is_int_literal(right_node, 0)
+            ):
+                if self.is_int(left_node):
+                    return self.moved(left_node, node)
+            elif op is Operator.MUL and is_int_literal(left_node, 1):
+                if self.is_int(right_node):
+                    return self.moved(right_node, node)
+
+        return node
+
+    def visit_UnaryOpNode(self, node):
+        self.generic_visit(node)
+        value = literal_value(node.node)
+        if value is None:
+            return node
+
+        if node.op is Operator.MINUS:
+            return self.fold(node, lambda: value.multiply(Number(-1)))
+        if node.op is Operator.NOT:
+            return self.fold(node, lambda: value.not_())
+        return self.fold(node, lambda: (value, None))
+
+    def visit_CallNode(self, node):
+        """
+        The call, or, at REWRITE, the call with the body of the function it
+        calls in its place when the function is one of self.functions and
+        every argument is a literal or a variable. Working those out cannot
+        fail or do anything else, so the body reads them instead of the
+        function's arguments, wherever and however often it does.
+        """
+        self.generic_visit(node)
+        node_to_call = node.node_to_call
+        if type(node_to_call) is not VarAccessNode:
+            return node
+        function = self.functions.get(node_to_call.var_name)
+        if function is None:
+            return node
+        arg_names, body_node = function
+        arg_nodes = node.arg_nodes
+        if len(arg_nodes) != len(arg_names) or not all(
+            type(arg_node) in ARGUMENT_NODES for arg_node in arg_nodes
+        ):
+            return node
+
+        body_node = self.visit(substitute(body_node, dict(zip(arg_names, arg_nodes))))
+        self.changed += 1
+        self.inlined += 1
+        return InlinedCallNode(node, body_node, node_to_call.var_name, arg_names)
+
+    def visit_ForNode(self, node):
+        node.start_value_node = self.visit(node.start_value_node)
+        node.end_value_node = self.visit(node.end_value_node)
+        if node.step_value_node:
+            node.step_value_node = self.visit(node.step_value_node)
+
+        # The variable is set to an Int before every iteration. Only the
+        # body can set it to something else, or `run` a script that does
+        # when the loop is not in a function.
+        ints = self.ints
+        if not assigns(node.body_node, node.var_name, not self.in_function):
+            self.ints = ints | {node.var_name}
+        else:
+            self.ints = ints - {node.var_name}
+        try:
+            node.body_node = self.visit_body(node.body_node, node.should_return_null)
+        finally:
+            self.ints = ints
+        return node
+
+    def visit_WhileNode(self, node):
+        node.condition_node = self.visit(node.condition_node)
+        node.body_node = self.visit_body(node.body_node, node.should_return_null)
+        return node
+
+    def visit_IfNode(self, node):
+        node.cases = [
+            (
+                self.visit(condition),
+                self.visit_body(expr, should_return_null),
+                should_return_null,
+            )
+            for condition, expr, should_return_null in node.cases
+        ]
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            node.else_case = (
+                self.visit_body(expr, should_return_null),
+                should_return_null,
+            )
+
+        # Cases after one whose condition is always true never run, nor do
+        # those whose condition never is
+        cases = []
+        for case in node.cases:
+            truth = literal_truth(case[0])
+            if truth is False:
+                continue
+            cases.append(case)
+            if truth is True:
+                if node.else_case:
+                    self.changed += 1
+                    node.else_case = None
+                break
+
+        if not cases:
+            if node.else_case:
+                # The else case always runs
+                expr, should_return_null = node.else_case
+                condition = IntNode(1, node.cases[0][0].pos_start)
+                condition.pos_end = node.cases[0][0].pos_end
+                cases.append((condition, expr, should_return_null))
+                node.else_case = None
+            else:
+                # Nothing runs and the if gives Null, which takes a case
+                cases = node.cases[:1]
+
+        self.changed += len(node.cases) - len(cases)
+        node.cases = cases
+        condition, expr, should_return_null = cases[0]
+        if literal_truth(condition) is True and not should_return_null:
+            # The if gives the value of the only case that runs
+            self.changed += 1
+            return expr
+        return node
+
+    def visit_ListNode(self, node):
+        self.generic_visit(node)
+        elements = node.element_nodes
+        for idx, element in enumerate(elements):
+            if isinstance(element, JUMPS):
+                self.changed += len(elements) - idx - 1
+                del elements[idx + 1 :]
+                break
+        return node
+
+    def visit_FuncDefNode(self, node):
+        ints = self.ints
+        in_function = self.in_function
+        self.ints = frozenset()
+        self.in_function = True
+        try:
+            node.body_node = self.eliminate(self.visit(node.body_node))
+        finally:
+            self.ints = ints
+            self.in_function = in_function
+        return node
+
+    def visit_body(self, node, discarded):
+        """
+        Visits the body of a loop or of an if's case. When it is a block
+        whose value is discarded, ifs that never run anything are dropped
+        from it and, at REWRITE, the loops that are its statements get the
+        expressions hoisted out of them as statements before them.
+        """
+        node = self.visit(node)
+        if not discarded or type(node) is not ListNode:
+            return self.eliminate(node)
+
+        # A block keeps at least one statement
+        elements = node.element_nodes
+        if not all(map(is_dead, elements)):
+            self.changed += len(elements)
+            elements[:] = [element for element in elements if not is_dead(element)]
+            self.changed -= len(elements)
+
+        if self.level >= REWRITE:
+            statements = []
+            for statement in elements:
+                if type(statement) in (ForNode, WhileNode):
+                    statements.extend(self.hoist(statement))
+                statements.append(statement)
+            elements[:] = statements
+        return self.eliminate(node)
+
+    def hoist(self, loop):
+        """
+        Replaces the pure expressions in loop that every iteration works
+        out the same with hidden variables, and returns the assignments of
+        those variables that are to run before the loop.
+
+        An expression is hoisted when it cannot fail and has no effect, so
+        working it out once, even for a loop that never iterates, changes
+        nothing but the time taken: Int arithmetic and comparisons (see
+        is_pure()) of literals and of variables of the loops around loop,
+        which nothing in them can set. Calls are never pure: `print` and
+        `input` write and read, and any name may stand for them.
+        """
+        assignments = []
+
+        def replace(node):
+            if type(node) is FuncDefNode:
+                # Its body runs in the context of its calls
+                return node
+            if type(node) in (BinOpNode, UnaryOpNode) and self.is_pure(node):
+                var_name = self.temp()
+                assignments.append(
+                    VarAssignNode(var_name, node.pos_start, node, Types.Any)
+                )
+                self.changed += 1
+                return VarAccessNode(var_name, node.pos_start, node.pos_end)
+            for field in node.fields:
+                setattr(node, field, map_nodes(getattr(node, field), replace))
+            return node
+
+        if type(loop) is WhileNode:
+            loop.condition_node = replace(loop.condition_node)
+        loop.body_node = replace(loop.body_node)
+        return assignments
+
+    def eliminate(self, node):
+        """
+        node, at REWRITE, with the common subexpressions of its region
+        worked out once (see CommonSubexpressions)
+        """
+        if self.level < REWRITE:
+            return node
+        return CommonSubexpressions(self).eliminate(node)
+
+    def temp(self):
+        """
+        The name of a new hidden variable, which no script can name
+        """
+        self.temps += 1
+        return f"%{self.temps}"
+
+    ############################################
+
+    def fold(self, node, operation):
+        """
+        The literal node of operation()'s value, in place of node, or node
+        when the operation fails or its value has no literal
+        """
+        try:
+            value, error = operation()
+        except Exception:
+            return node
+        if error or type(value) not in LITERAL_NODES:
+            return node
+
+        raw = value.value
+        if isinstance(raw, bool) or not isinstance(raw, (int, float, str)):
+            return node
+        if isinstance(raw, float) and not math.isfinite(raw):
+            return node
+        if isinstance(raw, int) and raw.bit_length() > MAX_INT_BITS:
+            return node
+        if isinstance(raw, str) and len(raw) > MAX_STRING_LENGTH:
+            return node
+
+        literal = LITERAL_NODES[type(value)](raw, node.pos_start)
+        literal.pos_end = node.pos_end
+        self.changed += 1
+        return literal
+
+    def moved(self, operand_node, node):
+        """
+        operand_node giving its value with the positions of node, in place
+        of node
+        """
+        self.changed += 1
+        if type(operand_node) is VarAccessNode:
+            return VarAccessNode(operand_node.var_name, node.pos_start, node.pos_end)
+        plus = UnaryOpNode(Operator.PLUS, operand_node, node.pos_start)
+        plus.pos_end = node.pos_end
+        return plus
+
+    def is_int(self, node):
+        """
+        Whether node's value is always an Int, if it has one
+        """
+        node_type = type(node)
+        if node_type is IntNode:
+            return True
+        if node_type is VarAccessNode:
+            return node.var_name in self.ints
+        if node_type is BinOpNode:
+            return (
+                node.op in ARITHMETIC
+                and self.is_int(node.left_node)
+                and self.is_int(node.right_node)
+            )
+        if node_type is UnaryOpNode:
+            return node.op is not Operator.MINUS and self.is_int(node.node)
+        return False
+
+    def is_safe_int(self, node):
+        """
+        Whether node's value is an Int that cannot fail to be worked out
+        """
+        node_type = type(node)
+        if node_type is IntNode:
+            return type(node.value) is int
+        if node_type is VarAccessNode:
+            return node.var_name in self.ints
+        if node_type is BinOpNode:
+            return (
+                node.op in SAFE_ARITHMETIC
+                and self.is_safe_int(node.left_node)
+                and self.is_safe_int(node.right_node)
+            )
+        if node_type is UnaryOpNode:
+            return node.op is not Operator.MINUS and self.is_safe_int(node.node)
+        return False
+
+    def is_pure(self, node):
+        """
+        Whether node's value cannot fail to be worked out and working it out
+        does nothing else
+        """
+        if self.is_safe_int(node):
+            return True
+        return (
+            type(node) is BinOpNode
+            and node.op in COMPARISONS
+            and self.is_safe_int(node.left_node)
+            and self.is_safe_int(node.right_node)
+        )
+
+
+############################################
+# COMMON SUBEXPRESSIONS
+############################################
+
+
+class CommonSubexpressions:
+    """
+    Finds the operators of a region, code that runs straight through, that
+    give the same value as an operator that ran before them, and has that
+    one keep its value in a hidden variable for them to read instead.
+
+    Two operators give the same value when their trees are the same and no
+    variable they read has been assigned in between; a call, or a body
+    that may or may not run, may assign anything, so nothing is shared
+    across them. The first operator still runs where it did, so its errors
+    stay where they were and the others only run after it. Only operators
+    doing nothing but giving a value are shared: every operator whose left
+    operand may be a List is left alone, since adding to or subtracting
+    from a List changes the elements it shares with its copies.
+
+    The bodies of ifs, loops and functions, and the conditions of an if's
+    later cases and of a while loop, are regions of their own.
+    """
+
+    def __init__(self, optimizer):
+        self.optimizer = optimizer
+        # What changes the values that names stand for: an assignment to
+        # a name gives it a new version, anything else a new epoch
+        self.versions = {}
+        self.version = 0
+        self.epoch = 0
+        # The version and epoch of the names known not to hold a List
+        self.known = {}
+        # The operators that may be shared, in the order they run: their
+        # node, key, size in operators, and the operators right under them
+        self.occurrences = []
+
+    def eliminate(self, node):
+        self.walk(node)
+        replacements = self.replacements()
+        if not replacements:
+            return node
+
+        def replace(node):
+            replacement = replacements.get(id(node))
+            if replacement is not None:
+                if type(replacement) is VarAccessNode:
+                    return replacement
+                node = replacement.value_node
+            for field in node.fields:
+                setattr(node, field, map_nodes(getattr(node, field), replace))
+            return replacement or node
+
+        return replace(node)
+
+    def replacements(self):
+        """
+        The hidden variable's assignment in place of the first of every
+        group of operators giving the same value, and a read of it in place
+        of the others, by the id of the node they replace
+        """
+        occurrences = self.occurrences
+        groups = {}
+        for idx, (_, key, _, _) in enumerate(occurrences):
+            groups.setdefault(key, []).append(idx)
+
+        replacements = {}
+        removed = set()
+        # Outer operators first: once one is replaced, the operators in it
+        # no longer run
+        for key in sorted(groups, key=lambda key: -occurrences[groups[key][0]][2]):
+            group = [idx for idx in groups[key] if idx not in removed]
+            if len(group) < 2:
+                continue
+
+            first = occurrences[group[0]][0]
+            var_name = self.optimizer.temp()
+            replacements[id(first)] = VarAssignNode(
+                var_name, first.pos_start, first, Types.Any
+            )
+            for idx in group[1:]:
+                node, _, size, _ = occurrences[idx]
+                replacements[id(node)] = VarAccessNode(
+                    var_name, node.pos_start, node.pos_end
+                )
+                self.optimizer.changed += 1
+                self.optimizer.saved += size
+                stack = list(occurrences[idx][3])
+                while stack:
+                    inner = stack.pop()
+                    removed.add(inner)
+                    stack.extend(occurrences[inner][3])
+        return replacements
+
+    ############################################
+
+    def walk(self, node):
+        """
+        Goes through node in the order it runs. Returns the key of its
+        value when it is a literal, a variable or an operator that may be
+        shared, and the operators that may be shared right under it.
+        """
+        node_type = type(node)
+        if node_type in LITERAL_TYPES:
+            return (node_type, repr(node.value)), ()
+        if node_type is VarAccessNode:
+            var_name = node.var_name
+            return (var_name, self.versions.get(var_name, 0), self.epoch), ()
+
+        if node_type is BinOpNode:
+            left, left_inner = self.walk(node.left_node)
+            right, right_inner = self.walk(node.right_node)
+            inner = left_inner + right_inner
+            if left is None or right is None or not self.is_not_list(node.left_node):
+                return None, inner
+            return self.occurrence(node, (node.op, left, right), inner)
+
+        if node_type is UnaryOpNode:
+            value, inner = self.walk(node.node)
+            if value is None:
+                return None, inner
+            if node.op is Operator.PLUS:
+                # Nothing runs but the operand
+                return value, inner
+            return self.occurrence(node, (node.op, value), inner)
+
+        if node_type is VarAssignNode:
+            self.walk(node.value_node)
+            is_not_list = node.var_type != Types.Any or self.is_not_list(
+                node.value_node
+            )
+            self.assign(node.var_name)
+            if is_not_list:
+                self.known[node.var_name] = (self.version, self.epoch)
+        elif node_type is IfNode:
+            cases = node.cases
+            self.walk(cases[0][0])
+            for condition, _, _ in cases[1:]:
+                CommonSubexpressions(self.optimizer).eliminate(condition)
+            self.epoch += 1
+        elif node_type is ForNode:
+            self.walk(node.start_value_node)
+            self.walk(node.end_value_node)
+            if node.step_value_node:
+                self.walk(node.step_value_node)
+            self.epoch += 1
+        elif node_type is WhileNode:
+            self.epoch += 1
+            CommonSubexpressions(self.optimizer).eliminate(node.condition_node)
+        elif node_type is FuncDefNode:
+            if node.var_name:
+                self.assign(node.var_name)
+        elif node_type is InlinedCallNode:
+            # Its function may be something else by then
+            self.walk(node.call_node)
+        elif node_type is CallNode:
+            self.walk(node.node_to_call)
+            for arg_node in node.arg_nodes:
+                self.walk(arg_node)
+            self.epoch += 1
+        elif node_type is ListNode:
+            for element_node in node.element_nodes:
+                self.walk(element_node)
+        elif node_type is ReturnNode:
+            if node.node_to_return:
+                self.walk(node.node_to_return)
+        return None, ()
+
+    def occurrence(self, node, key, inner):
+        idx = len(self.occurrences)
+        size = 1 + sum(self.occurrences[inner_idx][2] for inner_idx in inner)
+        self.occurrences.append((node, key, size, inner))
+        return key, (idx,)
+
+    def assign(self, var_name):
+        self.version += 1
+        self.versions[var_name] = self.version
+
+    def is_not_list(self, node):
+        """
+        Whether node's value, as of now, cannot be a List
+        """
+        node_type = type(node)
+        if node_type in LITERAL_TYPES:
+            return True
+        if node_type is VarAccessNode:
+            var_name = node.var_name
+            if var_name in self.optimizer.ints:
+                return True
+            return self.known.get(var_name) == (
+                self.versions.get(var_name),
+                self.epoch,
+            )
+        if node_type is BinOpNode:
+            return self.is_not_list(node.left_node)
+        if node_type is UnaryOpNode:
+            return node.op is not Operator.PLUS or self.is_not_list(node.node)
+        return False
+
+
+def literal_value(node):
+    """
+    The value of a literal node, or None for any other node
+    """
+    value_type = LITERAL_TYPES.get(type(node))
+    if value_type is None:
+        return None
+    return value_type(node.value).set_pos(node.pos_start, node.pos_end)
+
+
+def literal_truth(node):
+    """
+    Whether a literal node's value is true, or None for any other node
+    """
+    value = literal_value(node)
+    if value is None:
+        return None
+    return bool(value.is_true())
+
+
+def is_dead(node):
+    """
+    Whether node is an if that runs nothing, of a case whose condition is
+    never true
+    """
+    return (
+        type(node) is IfNode
+        and not node.else_case
+        and len(node.cases) == 1
+        and literal_truth(node.cases[0][0]) is False
+    )
+
+
+def map_nodes(value, func):
+    """
+    value with func() of every node in it, value being a field of a node
+    """
+    if isinstance(value, Node):
+        return func(value)
+    if isinstance(value, list):
+        value[:] = [map_nodes(item, func) for item in value]
+    elif isinstance(value, tuple):
+        return tuple(map_nodes(item, func) for item in value)
+    return value
+
+
+def is_int_literal(node, value):
+    return type(node) is IntNode and type(node.value) is int and node.value == value
+
+
+def too_large(op, left, right):
+    """
+    Whether an operation on literals could make a value too large to be
+    worth working out before knowing it is needed
+    """
+    if op is Operator.POWER:
+        base = left.value
+        exponent = right.value
+        if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+            return abs(base).bit_length() * exponent > MAX_INT_BITS
+    elif op is Operator.MUL and isinstance(left.value, str):
+        count = right.value
+        return isinstance(count, int) and len(left.value) * count > MAX_STRING_LENGTH
+    return False
+
+
+def inlinable(node, size):
+    """
+    The functions defined under node that may be inlined, by name: those
+    whose body is an expression of at most size nodes, none of them a call
+    (so that they cannot be recursive), and whose name nothing else under
+    node assigns, or takes as an argument
+    """
+    functions = {}
+    assigned = set()
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif isinstance(item, Node):
+            item_type = type(item)
+            if item_type in (VarAssignNode, ForNode, FuncDefNode):
+                var_name = item.var_name
+                if var_name in functions or var_name in assigned:
+                    functions.pop(var_name, None)
+                    assigned.add(var_name)
+                elif (
+                    item_type is FuncDefNode
+                    and var_name
+                    and item.should_auto_return
+                    and is_inlinable(item.body_node, size)
+                ):
+                    functions[var_name] = (
+                        item.arg_names,
+                        substitute(item.body_node, {}),
+                    )
+                else:
+                    assigned.add(var_name)
+            if item_type is FuncDefNode:
+                assigned.update(item.arg_names)
+            stack.extend(getattr(item, field) for field in item.fields)
+
+    for var_name in assigned:
+        functions.pop(var_name, None)
+    return functions
+
+
+def is_inlinable(node, size):
+    """
+    Whether node is an expression of at most size nodes that may be inlined
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        size -= 1
+        if size < 0 or type(node) not in INLINE_NODES:
+            return False
+        if type(node) is BinOpNode:
+            stack.append(node.left_node)
+            stack.append(node.right_node)
+        elif type(node) is UnaryOpNode:
+            stack.append(node.node)
+    return True
+
+
+def substitute(node, args):
+    """
+    A copy of an inlined body, the argument nodes in args by name standing
+    in for the variables of those names with the positions of the variables
+    """
+    node_type = type(node)
+    if node_type is VarAccessNode:
+        arg_node = args.get(node.var_name, node)
+        if type(arg_node) is VarAccessNode:
+            return VarAccessNode(arg_node.var_name, node.pos_start, node.pos_end)
+        copy = type(arg_node)(arg_node.value, node.pos_start)
+    elif node_type is BinOpNode:
+        copy = BinOpNode(
+            substitute(node.left_node, args), node.op, substitute(node.right_node, args)
+        )
+        copy.pos_start = node.pos_start
+    elif node_type is UnaryOpNode:
+        copy = UnaryOpNode(node.op, substitute(node.node, args), node.pos_start)
+    else:
+        copy = node_type(node.value, node.pos_start)
+    copy.pos_end = node.pos_end
+    return copy
+
+
+def assigns(node, var_name, calls):
+    """
+    Whether anything under node may set var_name: an assignment, a loop or
+    a function of that name, or, with calls, any call
+    """
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif isinstance(item, Node):
+            item_type = type(item)
+            if item_type in (VarAssignNode, ForNode, FuncDefNode):
+                if item.var_name == var_name:
+                    return True
+            elif item_type is CallNode and calls:
+                return True
+            stack.extend(getattr(item, field) for field in item.fields)
+    return False
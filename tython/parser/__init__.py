@@ -1,3 +1,7 @@
 from .parser import Parser
 from .parse_result import ParseResult
 from .nodes import *
+from .operators import Operator, BINARY_METHODS, UNARY_METHODS
+from .operators import ARITHMETIC, COMPARISONS, PYTHON_OPERATORS
+from .incremental import IncrementalParser
+from .stream import StatementReader
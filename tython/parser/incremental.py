@@ -0,0 +1,293 @@
+from array import array
+from bisect import bisect_left
+
+from tython.lex import Lexer, SourceFile, TokenType, TokenBuffer
+from tython.lex.lexer import TOKEN_PATTERN, NEWLINE
+from tython.errors import SyntaxError
+from .parser import Parser, InvalidSyntax
+from .parse_result import ParseResult
+from .nodes import Node, ListNode
+
+
+############################################
+# INCREMENTAL PARSER
+############################################
+
+
+def positioned(node):
+    """
+    Every node under node, i.e. everything holding an offset
+    """
+    items = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif isinstance(item, Node):
+            items.append(item)
+            stack.extend(getattr(item, field) for field in item.fields)
+    return items
+
+
+class IncrementalParser:
+    """
+    Keeps the tokens and the top-level statements of a script between edits.
+    An edit only re-lexes the text around it and re-parses the statements
+    whose tokens it touched; the result is the same as running the Lexer
+    and Parser over the whole new text.
+
+    Every cached statement is stored with the token it starts at and the
+    token after it, which is also the furthest token its parse looked at.
+    The first `chain` of them are the statements of the program as it
+    currently parses; the rest were parsed before an error or an edit and
+    are kept in case a later parse lands on them again.
+    """
+
+    def __init__(self, fn, text):
+        self.fn = fn
+        self.source = SourceFile(fn, text)
+        self.tokens = None
+        self.result = self.reparse()
+
+    def reset(self):
+        self.stmt_starts = array("I")
+        self.stmt_ends = array("I")
+        self.stmt_nodes = []
+        self.stmt_items = []
+        self.chain = 0
+        self.chain_end = 0
+        self.chain_failed = False
+
+    def reparse(self):
+        """
+        Lexes and parses the whole text, dropping every cached statement
+        """
+        self.reset()
+        tokens, error = Lexer(self.source).make_tokens()
+        if error:
+            self.tokens = None
+            return ParseResult().failure(error)
+
+        self.tokens = tokens
+        return self.parse_statements(0, 0, 0, 0)
+
+    def edit(self, offset, removed, inserted):
+        """
+        Replaces removed characters at offset with the inserted text and
+        returns the new ParseResult
+        """
+        text = self.source.text
+        self.source = SourceFile(
+            self.fn, text[:offset] + inserted + text[offset + removed :]
+        )
+
+        if self.tokens is None:
+            self.result = self.reparse()
+            return self.result
+
+        delta = len(inserted) - removed
+        relexed = self.relex(offset, offset + removed, delta)
+        if relexed.error:
+            self.tokens = None
+            self.result = relexed
+            return self.result
+
+        first, stop, index_delta = relexed.node
+        self.result = self.reuse_statements(first, stop, index_delta, delta)
+        return self.result
+
+    ############################################
+
+    def relex(self, offset, edit_end, delta):
+        """
+        Re-lexes from the last token starting before the edit until the new
+        tokens line up with old ones again, then splices them in. Returns the
+        first replaced token, the old token the splice stopped at and how far
+        the later tokens moved.
+        """
+        res = ParseResult()
+        tokens = self.tokens
+        tokens.source = source = self.source
+        text = source.text
+        starts = tokens.starts
+        last = len(tokens) - 1
+        lexer = Lexer(source)
+
+        first = bisect_left(starts, offset)
+        if first > 0:
+            first -= 1
+            restart = starts[first]
+        else:
+            restart = offset
+
+        # A scan may stop at any old token past the edit. It lines up there
+        # unless the scan's last token would have run over the stop.
+        stop = bisect_left(starts, edit_end, first)
+        step = 1
+        while stop < last:
+            limit = starts[stop] + delta
+            segment = TokenBuffer(source)
+            _, error = lexer.scan(segment, restart, limit)
+
+            if error:
+                check = error.pos_start
+            elif len(segment) > 0:
+                check = segment.starts[-1]
+            else:
+                check = None
+
+            if check is None or TOKEN_PATTERN.match(text, check).end() <= limit:
+                if error:
+                    return res.failure(error)
+                break
+
+            stop = min(stop + step, last)
+            step *= 2
+        else:
+            # Nothing lines up: lex through to the end of the text
+            stop = last + 1
+            segment = TokenBuffer(source)
+            eof, error = lexer.scan(segment, restart, len(text))
+            if error:
+                return res.failure(error)
+            segment.append(TokenType.EOF, None, eof, eof + 1)
+
+        tokens.splice(first, stop, segment, delta)
+        return res.success((first, stop, len(segment) - (stop - first)))
+
+    def reuse_statements(self, first, stop, index_delta, delta):
+        """
+        Drops the cached statements that looked at replaced tokens, moves
+        the ones after the edit and parses again from the end of the
+        untouched statements before it
+        """
+        stmt_starts = self.stmt_starts
+        stmt_ends = self.stmt_ends
+        stmt_nodes = self.stmt_nodes
+        stmt_items = self.stmt_items
+
+        kept = bisect_left(stmt_ends, first)
+        tail = bisect_left(stmt_starts, stop)
+        tail_chain = max(self.chain - tail, 0)
+
+        if delta:
+            for items in stmt_items[tail:]:
+                for item in items:
+                    item.pos_start += delta
+                    item.pos_end += delta
+        shift = index_delta.__add__
+        self.stmt_starts = stmt_starts[:kept] + array(
+            "I", map(shift, stmt_starts[tail:])
+        )
+        self.stmt_ends = stmt_ends[:kept] + array("I", map(shift, stmt_ends[tail:]))
+        self.stmt_nodes = stmt_nodes[:kept] + stmt_nodes[tail:]
+        self.stmt_items = stmt_items[:kept] + stmt_items[tail:]
+
+        chain = min(kept, self.chain)
+        if tail_chain:
+            chain_end = self.chain_end + index_delta
+        else:
+            chain_end = 0
+
+        idx = self.stmt_ends[chain - 1] if chain > 0 else 0
+        return self.parse_statements(chain, idx, kept, kept + tail_chain, chain_end)
+
+    def parse_statements(self, chain, idx, chain_tail, chain_tail_end, chain_end=0):
+        """
+        Parses top-level statements from token idx the way
+        Parser.statements() does, reusing a cached statement wherever one
+        starts. Reaching a statement of the old program's tail
+        (chain_tail:chain_tail_end) means the rest of it is unchanged, so
+        the program jumps straight to chain_end, where it stopped last time.
+        """
+        res = ParseResult()
+        tokens = self.tokens
+        types = tokens.types
+        stmt_starts = self.stmt_starts
+        stmt_ends = self.stmt_ends
+        stmt_nodes = self.stmt_nodes
+        stmt_items = self.stmt_items
+
+        parser = Parser(tokens)
+        cursor = parser.current_tok
+        k = chain
+        first = chain == 0
+
+        while True:
+            newline_count = 0
+            while types[idx] == NEWLINE:
+                idx += 1
+                newline_count += 1
+            if newline_count == 0 and not first:
+                break
+
+            # Statements cached before this one can no longer be reached
+            while k < len(stmt_starts) and stmt_starts[k] < idx:
+                del stmt_starts[k], stmt_ends[k], stmt_nodes[k], stmt_items[k]
+                if k < chain_tail:
+                    chain_tail -= 1
+                if k < chain_tail_end:
+                    chain_tail_end -= 1
+
+            cursor.seek(idx)
+            if k < len(stmt_starts) and stmt_starts[k] == idx:
+                if chain_tail <= k < chain_tail_end:
+                    k = chain_tail_end
+                    idx = chain_end
+                    if not self.chain_failed:
+                        break
+
+                    # The old program stopped at a statement that does not
+                    # parse; parse it again for its error
+                    while k < len(stmt_starts) and stmt_starts[k] < idx:
+                        del stmt_starts[k], stmt_ends[k], stmt_nodes[k], stmt_items[k]
+                    cursor.seek(idx)
+                else:
+                    idx = stmt_ends[k]
+                    k += 1
+                    first = False
+                    continue
+            elif not first and not parser.starts_statement():
+                break
+
+            try:
+                node = parser.statement()
+            except InvalidSyntax as e:
+                self.chain = k
+                self.chain_end = idx
+                self.chain_failed = True
+                return res.failure(e.error)
+
+            stmt_starts.insert(k, idx)
+            stmt_ends.insert(k, cursor.idx)
+            stmt_nodes.insert(k, node)
+            stmt_items.insert(k, positioned(node))
+            if k <= chain_tail:
+                chain_tail += 1
+                chain_tail_end += 1
+            k += 1
+
+            idx = cursor.idx
+            first = False
+
+        self.chain = k
+        self.chain_end = idx
+        self.chain_failed = False
+        return self.finish(idx, stmt_nodes[:k])
+
+    def finish(self, idx, statements):
+        res = ParseResult()
+        tokens = self.tokens
+
+        if tokens.type(idx) != TokenType.EOF:
+            return res.failure(
+                SyntaxError(
+                    tokens.starts[idx],
+                    tokens.ends[idx],
+                    "Expected '+', '-', '*', '/', or '^'",
+                    tokens.source,
+                )
+            )
+
+        return res.success(ListNode(statements, tokens.starts[0], tokens.ends[idx]))
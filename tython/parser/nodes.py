@@ -1,29 +1,47 @@
+from .operators import BINARY_METHODS, UNARY_METHODS
+
 ############################################
 # NODES
 ############################################
 
 
-class NumberNode:
+class Node:
+    """
+    Base of every node. Nodes keep their fields in __slots__ instead of a
+    __dict__; `fields` names all of them, a subclass's after its parents'.
+    """
+
+    __slots__ = ("pos_start", "pos_end")
+    fields = __slots__
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.fields = cls.fields + cls.__dict__.get("__slots__", ())
+
+
+class NumberNode(Node):
     """
     Defines a number node
         ex: NUMBER:5
         ex: NUMBER:2.3
     """
 
-    def __init__(self, tok, var_type):
-        self.tok = tok
-        self.var_type = var_type
+    __slots__ = ("value",)
+    kind = "NUMBER"
 
-        self.pos_start = tok.pos_start
-        self.pos_end = tok.pos_start
+    def __init__(self, value, pos_start):
+        self.value = value
+
+        self.pos_start = pos_start
+        self.pos_end = pos_start
 
     def __repr__(self) -> str:
-        return f"{self.tok}"
+        return f"{self.kind}:{self.value}"
 
 
 class AnyNode(NumberNode):
-    def __init__(self, tok, var_type):
-        super().__init__(tok, var_type)
+    __slots__ = ()
+    kind = "ANY"
 
 
 class IntNode(NumberNode):
@@ -32,8 +50,8 @@ class IntNode(NumberNode):
         ex: INT:5
     """
 
-    def __init__(self, tok, var_type):
-        super().__init__(tok, var_type)
+    __slots__ = ()
+    kind = "INT"
 
 
 class FloatNode(NumberNode):
@@ -42,8 +60,8 @@ class FloatNode(NumberNode):
         ex: FLOAT:2.3
     """
 
-    def __init__(self, tok, var_type):
-        super().__init__(tok, var_type)
+    __slots__ = ()
+    kind = "FLOAT"
 
 
 class StringNode(NumberNode):
@@ -52,11 +70,13 @@ class StringNode(NumberNode):
         ex: STRING:hey whats up
     """
 
-    def __init__(self, tok, var_type):
-        super().__init__(tok, var_type)
+    __slots__ = ()
+    kind = "STRING"
+
 
+class ListNode(Node):
+    __slots__ = ("element_nodes",)
 
-class ListNode:
     def __init__(self, element_nodes, pos_start, pos_end):
         self.element_nodes = element_nodes
 
@@ -64,61 +84,125 @@ class ListNode:
         self.pos_end = pos_end
 
 
-class BinOpNode:
+class BinOpNode(Node):
     """
     Defines a binary operation node
         ex: (INT:5, PLUS, (INT:3, MUL, INT:7))
+
+    method is the name of the left operand's method op calls, looked up
+    once as the node is made
     """
 
-    def __init__(self, left_node, op_tok, right_node):
+    __slots__ = ("left_node", "op", "right_node", "method")
+
+    def __init__(self, left_node, op, right_node):
         self.left_node = left_node
-        self.op_tok = op_tok
+        self.op = op
         self.right_node = right_node
+        self.method = BINARY_METHODS[op]
 
         self.pos_start = self.left_node.pos_start
         self.pos_end = self.right_node.pos_start
 
     def __repr__(self) -> str:
-        return f"({self.left_node}, {self.op_tok}, {self.right_node})"
+        return f"({self.left_node}, {self.op.name}, {self.right_node})"
 
 
-class UnaryOpNode:
+class TrustedBinOpNode(BinOpNode):
+    """
+    A binary operation the type checker proved is always done on values of
+    classes it is defined for: operation() of the operands' plain values
+    is the plain value of its result, a value_type
+    """
+
+    __slots__ = ("value_type", "operation")
+
+    def __init__(self, node, value_type, operation):
+        super().__init__(node.left_node, node.op, node.right_node)
+        self.value_type = value_type
+        self.operation = operation
+
+        self.pos_start = node.pos_start
+        self.pos_end = node.pos_end
+
+
+class UnaryOpNode(Node):
     """
     Defines a unary operation node
         ex: (MINUS, INT:3)
+
+    method is the name of the operand's method op calls (see BinOpNode)
     """
 
-    def __init__(self, op_tok, node):
-        self.op_tok = op_tok
+    __slots__ = ("op", "node", "method")
+
+    def __init__(self, op, node, pos_start):
+        self.op = op
         self.node = node
+        self.method = UNARY_METHODS[op]
 
-        self.pos_start = self.op_tok.pos_start
+        self.pos_start = pos_start
         self.pos_end = node.pos_end
 
     def __repr__(self):
-        return f"({self.op_tok}, {self.node})"
+        return f"({self.op.name}, {self.node})"
+
 
+class VarAssignNode(Node):
+    __slots__ = ("var_name", "value_node", "type", "var_type")
 
-class VarAssignNode:
-    def __init__(self, var_name_tok, value_node, type_):
-        self.var_name_tok = var_name_tok
+    def __init__(self, var_name, var_name_start, value_node, type_):
+        self.var_name = var_name
         self.value_node = value_node
         self.type = type_
         self.var_type = type_
 
-        self.pos_start = self.var_name_tok.pos_start
+        self.pos_start = var_name_start
         self.pos_end = self.value_node.pos_end
 
 
-class VarAccessNode:
-    def __init__(self, var_name_tok):
-        self.var_name_tok = var_name_tok
+class VarAccessNode(Node):
+    __slots__ = ("var_name",)
 
-        self.pos_start = self.var_name_tok.pos_start
-        self.pos_end = self.var_name_tok.pos_end
+    def __init__(self, var_name, pos_start, pos_end):
+        self.var_name = var_name
 
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
+
+class LocalAccessNode(VarAccessNode):
+    """
+    A read of a variable of the function the node is in, from the slot the
+    resolver gave it in the frame of each call
+    """
+
+    __slots__ = ("slot",)
+
+    def __init__(self, node, slot):
+        super().__init__(node.var_name, node.pos_start, node.pos_end)
+        self.slot = slot
+
+
+class LocalAssignNode(VarAssignNode):
+    """
+    An assignment of a variable of the function the node is in (see
+    LocalAccessNode)
+    """
+
+    __slots__ = ("slot",)
+
+    def __init__(self, node, slot):
+        super().__init__(node.var_name, node.pos_start, node.value_node, node.type)
+        self.var_type = node.var_type
+        self.slot = slot
+
+        self.pos_end = node.pos_end
+
+
+class IfNode(Node):
+    __slots__ = ("cases", "else_case")
 
-class IfNode:
     def __init__(self, cases, else_case):
         self.cases = cases
         self.else_case = else_case
@@ -127,28 +211,40 @@ class IfNode:
         self.pos_end = (self.else_case or self.cases[len(self.cases) - 1])[0].pos_end
 
 
-class ForNode:
+class ForNode(Node):
+    __slots__ = (
+        "var_name",
+        "start_value_node",
+        "end_value_node",
+        "step_value_node",
+        "body_node",
+        "should_return_null",
+    )
+
     def __init__(
         self,
-        var_name_tok,
+        var_name,
+        var_name_start,
         start_value_node,
         end_value_node,
         step_value_node,
         body_node,
         should_return_null,
     ):
-        self.var_name_tok = var_name_tok
+        self.var_name = var_name
         self.start_value_node = start_value_node
         self.end_value_node = end_value_node
         self.step_value_node = step_value_node
         self.body_node = body_node
         self.should_return_null = should_return_null
 
-        self.pos_start = self.var_name_tok.pos_start
+        self.pos_start = var_name_start
         self.pos_end = self.body_node.pos_end
 
 
-class WhileNode:
+class WhileNode(Node):
+    __slots__ = ("condition_node", "body_node", "should_return_null")
+
     def __init__(self, condition_node, body_node, should_return_null):
         self.condition_node = condition_node
         self.body_node = body_node
@@ -158,24 +254,32 @@ class WhileNode:
         self.pos_end = self.body_node.pos_end
 
 
-class FuncDefNode:
-    def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return):
-        self.var_name_tok = var_name_tok
-        self.arg_name_toks = arg_name_toks
+class FuncDefNode(Node):
+    __slots__ = ("var_name", "arg_names", "body_node", "should_auto_return", "layout")
+
+    def __init__(self, var_name, arg_names, body_node, should_auto_return, pos_start):
+        """
+        pos_start is where the name is, or the first argument of an anonymous
+        function, or None to start at the body. layout is the slot of each
+        variable of the function once the resolver has been through it.
+        """
+        self.var_name = var_name
+        self.arg_names = arg_names
         self.body_node = body_node
         self.should_auto_return = should_auto_return
+        self.layout = None
 
-        if self.var_name_tok:
-            self.pos_start = self.var_name_tok.pos_start
-        elif len(self.arg_name_toks) > 0:
-            self.pos_start = self.arg_name_toks[0].pos_start
+        if pos_start is not None:
+            self.pos_start = pos_start
         else:
             self.pos_start = self.body_node.pos_start
 
         self.pos_end = self.body_node.pos_end
 
 
-class CallNode:
+class CallNode(Node):
+    __slots__ = ("node_to_call", "arg_nodes")
+
     def __init__(self, node_to_call, arg_nodes):
         self.node_to_call = node_to_call
         self.arg_nodes = arg_nodes
@@ -188,7 +292,33 @@ class CallNode:
             self.pos_end = self.node_to_call.pos_end
 
 
-class ReturnNode:
+class InlinedCallNode(Node):
+    """
+    A call the optimizer has put a copy of the called function's body in
+    place of: body_node reads the call's arguments where the body read
+    the function's. The body runs in a context of its own, named after the
+    function as the call's would be, on the caller's symbol table.
+
+    It only runs when func_name stands for the function made from the
+    definition of arg_names and the variables passed as arguments are
+    defined; call_node, the call itself, runs otherwise.
+    """
+
+    __slots__ = ("call_node", "body_node", "func_name", "arg_names")
+
+    def __init__(self, call_node, body_node, func_name, arg_names):
+        self.call_node = call_node
+        self.body_node = body_node
+        self.func_name = func_name
+        self.arg_names = arg_names
+
+        self.pos_start = call_node.pos_start
+        self.pos_end = call_node.pos_end
+
+
+class ReturnNode(Node):
+    __slots__ = ("node_to_return",)
+
     def __init__(self, node_to_return, pos_start, pos_end):
         self.node_to_return = node_to_return
 
@@ -196,13 +326,17 @@ class ReturnNode:
         self.pos_end = pos_end
 
 
-class ContinueNode:
+class ContinueNode(Node):
+    __slots__ = ()
+
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
         self.pos_end = pos_end
 
 
-class BreakNode:
+class BreakNode(Node):
+    __slots__ = ()
+
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
         self.pos_end = pos_end
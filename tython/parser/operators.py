@@ -0,0 +1,104 @@
+from enum import Enum
+
+from tython.lex import TokenType
+
+
+############################################
+# OPERATORS
+############################################
+
+
+class Operator(Enum):
+    PLUS = "+"
+    MINUS = "-"
+    MUL = "*"
+    DIV = "/"
+    POWER = "^"
+    EE = "=="
+    NE = "!="
+    LT = "<"
+    GT = ">"
+    LTE = "<="
+    GTE = ">="
+    AND = "and"
+    OR = "or"
+    NOT = "not"
+
+
+# The operator each operator token stands for
+TOKEN_OPERATORS = {
+    TokenType.PLUS: Operator.PLUS,
+    TokenType.MINUS: Operator.MINUS,
+    TokenType.MUL: Operator.MUL,
+    TokenType.DIV: Operator.DIV,
+    TokenType.POWER: Operator.POWER,
+    TokenType.EE: Operator.EE,
+    TokenType.NE: Operator.NE,
+    TokenType.LT: Operator.LT,
+    TokenType.GT: Operator.GT,
+    TokenType.LTE: Operator.LTE,
+    TokenType.GTE: Operator.GTE,
+}
+KEYWORD_OPERATORS = {
+    "and": Operator.AND,
+    "or": Operator.OR,
+    "not": Operator.NOT,
+}
+
+# The binary operators working out a number from two numbers, and those
+# comparing them
+ARITHMETIC = (Operator.PLUS, Operator.MINUS, Operator.MUL, Operator.DIV, Operator.POWER)
+COMPARISONS = (
+    Operator.EE,
+    Operator.NE,
+    Operator.LT,
+    Operator.GT,
+    Operator.LTE,
+    Operator.GTE,
+    Operator.AND,
+    Operator.OR,
+)
+
+# The Python operator each binary operator applies to the plain values of
+# numbers; a comparison's result is made an int
+PYTHON_OPERATORS = {
+    Operator.PLUS: "+",
+    Operator.MINUS: "-",
+    Operator.MUL: "*",
+    Operator.DIV: "/",
+    Operator.POWER: "**",
+    Operator.EE: "==",
+    Operator.NE: "!=",
+    Operator.LT: "<",
+    Operator.GT: ">",
+    Operator.LTE: "<=",
+    Operator.GTE: ">=",
+    Operator.AND: "and",
+    Operator.OR: "or",
+}
+
+# The method of the left operand each binary operator calls
+BINARY_METHODS = {
+    Operator.PLUS: "add",
+    Operator.MINUS: "subtract",
+    Operator.MUL: "multiply",
+    Operator.DIV: "divide",
+    Operator.POWER: "power",
+    Operator.EE: "compare_eq",
+    Operator.NE: "compare_ne",
+    Operator.LT: "compare_lt",
+    Operator.GT: "compare_gt",
+    Operator.LTE: "compare_lte",
+    Operator.GTE: "compare_gte",
+    Operator.AND: "and_",
+    Operator.NOT: "not_",
+    Operator.OR: "or_",
+}
+
+# The method of the operand each unary operator calls, or None for the one
+# that leaves it as it is
+UNARY_METHODS = {
+    Operator.MINUS: "negate",
+    Operator.NOT: "not_",
+    Operator.PLUS: None,
+}
@@ -1,8 +1,80 @@
-from tython.lex import TokenType
+import gc
+
+from tython.lex import TokenType, TokenCursor
+from tython.lex.token_buffer import TOKEN_TYPES
 from tython.errors import SyntaxError
 from tython.types import Types
 from .parse_result import ParseResult
 from .nodes import *
+from .operators import Operator, TOKEN_OPERATORS, KEYWORD_OPERATORS
+
+
+# Tokens an expression can start with. Rules check the current token
+# against these before descending, so the parser never has to back out of
+# a rule it started.
+EXPR_START_TYPES = {
+    TokenType.INT,
+    TokenType.FLOAT,
+    TokenType.STRING,
+    TokenType.IDENTIFIER,
+    TokenType.LPAREN,
+    TokenType.LSQUARE,
+    TokenType.PLUS,
+    TokenType.MINUS,
+    TokenType.TYPE,
+}
+EXPR_START_KEYWORDS = {"not", "if", "for", "while", "def"}
+STATEMENT_START_KEYWORDS = EXPR_START_KEYWORDS | {"return", "continue", "break"}
+
+
+# Binding powers, loosest first. An infix operator's right operand binds one
+# level tighter than the operator, so every level is left-associative, and
+# the right side of POWER is a plain call.
+LOGIC = 1
+COMPARISON = 2
+ARITH = 3
+TERM = 4
+UNARY = 5
+POWER = 6
+CALL = 7
+
+BINDING_POWER = {
+    TokenType.EE: COMPARISON,
+    TokenType.NE: COMPARISON,
+    TokenType.LT: COMPARISON,
+    TokenType.GT: COMPARISON,
+    TokenType.LTE: COMPARISON,
+    TokenType.GTE: COMPARISON,
+    TokenType.PLUS: ARITH,
+    TokenType.MINUS: ARITH,
+    TokenType.MUL: TERM,
+    TokenType.DIV: TERM,
+    TokenType.POWER: POWER,
+}
+KEYWORD_BINDING_POWER = {"and": LOGIC, "or": LOGIC}
+UNARY_OPERATORS = {TokenType.PLUS, TokenType.MINUS}
+
+# The same tables indexed by the TokenCursor's type code, which saves
+# hashing an enum member for every token
+BINDING_POWER_CODES = [BINDING_POWER.get(type_) for type_ in TOKEN_TYPES]
+OPERATOR_CODES = [TOKEN_OPERATORS.get(type_) for type_ in TOKEN_TYPES]
+UNARY_CODES = [type_ in UNARY_OPERATORS for type_ in TOKEN_TYPES]
+
+# How many expressions may nest inside each other (parentheses, call
+# arguments, blocks) before the parser gives up with a SyntaxError instead
+# of running into Python's recursion limit
+MAX_DEPTH = 100
+
+
+class InvalidSyntax(Exception):
+    """
+    Raised at the token where parsing fails and carries its SyntaxError
+    back to Parser.parse()
+    """
+
+    def __init__(self, error):
+        super().__init__(error.details)
+        self.error = error
 
 
 ############################################
@@ -11,37 +83,57 @@ from .nodes import *
 
 
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, max_depth=MAX_DEPTH):
         self.tokens = tokens
-        self.tok_idx = -1
+        self.current_tok = TokenCursor(tokens)
         self.var_type = None
-        self.advance()
+        self.max_depth = max_depth
+        self.depth = 0
 
     def advance(self):
-        self.tok_idx += 1
-        self.update_current_tok()
+        self.current_tok.advance()
         return self.current_tok
 
-    def reverse(self, amount=1):
-        self.tok_idx -= amount
-        self.update_current_tok()
-        return self.current_tok
+    def syntax_error(self, details):
+        """
+        Error pointing at the current token
+        """
+        return InvalidSyntax(
+            SyntaxError(
+                self.current_tok.pos_start,
+                self.current_tok.pos_end,
+                details,
+                self.tokens.source,
+            )
+        )
+
+    def starts_expr(self):
+        if self.current_tok.type == TokenType.KEYWORD:
+            return self.current_tok.value in EXPR_START_KEYWORDS
+        return self.current_tok.type in EXPR_START_TYPES
 
-    def update_current_tok(self):
-        if self.tok_idx < len(self.tokens):
-            self.current_tok = self.tokens[self.tok_idx]
+    def starts_statement(self):
+        if self.current_tok.type == TokenType.KEYWORD:
+            return self.current_tok.value in STATEMENT_START_KEYWORDS
+        return self.current_tok.type in EXPR_START_TYPES
 
     def parse(self):
-        res = self.statements()
-        if not res.error and self.current_tok.type != TokenType.EOF:
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    "Expected '+', '-', '*', '/', or '^'",
-                )
-            )
-        return res
+        res = ParseResult()
+
+        # The tree holds no reference cycles, so the cyclic collector would
+        # only keep re-scanning it while it grows
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            node = self.statements()
+            if self.current_tok.type != TokenType.EOF:
+                raise self.syntax_error("Expected '+', '-', '*', '/', or '^'")
+        except InvalidSyntax as e:
+            return res.failure(e.error)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return res.success(node)
 
     ############################################
 
@@ -49,42 +141,23 @@ class Parser:
         """
         : NEWLINE* statement (NEWLINE+ statement)* NEWLINE*
         """
-        res = ParseResult()
         statements = []
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         while self.current_tok.type == TokenType.NEWLINE:
-            res.register_advancement()
             self.advance()
 
-        statement = res.register(self.statement())
-        if res.error:
-            return res
-        statements.append(statement)
+        statements.append(self.statement())
 
-        more_statements = True
-
-        while True:
-            newline_count = 0
+        while self.current_tok.type == TokenType.NEWLINE:
             while self.current_tok.type == TokenType.NEWLINE:
-                res.register_advancement()
                 self.advance()
-                newline_count += 1
-            if newline_count == 0:
-                more_statements = False
 
-            if not more_statements:
+            if not self.starts_statement():
                 break
-            statement = res.try_register(self.statement())
-            if not statement:
-                self.reverse(res.to_reverse_count)
-                more_statements = False
-                continue
-            statements.append(statement)
-
-        return res.success(
-            ListNode(statements, pos_start, self.current_tok.pos_end.copy())
-        )
+            statements.append(self.statement())
+
+        return ListNode(statements, pos_start, self.current_tok.pos_end)
 
     def statement(self):
         """
@@ -93,244 +166,188 @@ class Parser:
         : KEYWORD:break
         : expr
         """
-        res = ParseResult()
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         # KEYWORD:return expr?
         if self.current_tok.matches(TokenType.KEYWORD, "return"):
-            res.register_advancement()
             self.advance()
-
-            expr = res.try_register(self.expr())
-            if not expr:
-                self.reverse(res.to_reverse_count)
-            return res.success(
-                ReturnNode(expr, pos_start, self.current_tok.pos_start.copy())
-            )
+            expr = self.expr() if self.starts_expr() else None
+            return ReturnNode(expr, pos_start, self.current_tok.pos_start)
 
         # KEYWORD:continue
         if self.current_tok.matches(TokenType.KEYWORD, "continue"):
-            res.register_advancement()
             self.advance()
-            return res.success(
-                ContinueNode(pos_start, self.current_tok.pos_start.copy())
-            )
+            return ContinueNode(pos_start, self.current_tok.pos_start)
 
         # KEYWORD:break
         if self.current_tok.matches(TokenType.KEYWORD, "break"):
-            res.register_advancement()
             self.advance()
-            return res.success(BreakNode(pos_start, self.current_tok.pos_start.copy()))
+            return BreakNode(pos_start, self.current_tok.pos_start)
 
-        expr = res.register(self.expr())
-        if res.error:
-            return res.failure(
+        if not self.starts_expr():
+            raise InvalidSyntax(
                 SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_start.copy(),
+                    pos_start,
+                    pos_start,
                     "Expected expression, 'return', 'continue', or 'break'",
+                    self.tokens.source,
                 )
             )
 
-        return res.success(expr)
+        return self.expr()
 
     def expr(self):
         """
         : TYPE:var|int|float|str|num IDENTIFIER EQ expr
         : comp-expr ((KEYWORD:AND|KEYWORD:OR) comp-expr)*
+
+        comp-expr : NOT comp-expr
+                  : arith-expr ((EE|NE|LT|GT|LTE|GTE) arith-expr)*
+        arith-expr: term ((PLUS|MINUS) term)*
+        term      : factor ((MUL|DIV) factor)*
+        factor    : (PLUS|MINUS) factor
+                  : power
+        power     : call (POWER call)*
+
+        The levels below expr are parsed by operation() from BINDING_POWER.
         """
-        res = ParseResult()
+        self.depth += 1
+        if self.depth > self.max_depth:
+            raise self.syntax_error(
+                f"Expressions nested more than {self.max_depth} levels deep"
+            )
 
         if self.current_tok.type == TokenType.TYPE:
-            type = self.current_tok
-            res.register_advancement()
+            type = self.current_tok.value
             self.advance()
 
             if self.current_tok.type != TokenType.IDENTIFIER:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        "Expected identifier",
-                    )
-                )
+                raise self.syntax_error("Expected identifier")
 
-            var_name = self.current_tok
-            res.register_advancement()
+            var_name = self.current_tok.value
+            var_name_start = self.current_tok.pos_start
             self.advance()
 
             if self.current_tok.type != TokenType.EQ:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        "Expected '='",
-                    )
-                )
+                raise self.syntax_error("Expected '='")
 
-            if type.matches(TokenType.TYPE, Types.Number.value):
+            if type == Types.Number.value:
                 self.var_type = Types.Number
-            elif type.matches(TokenType.TYPE, Types.Int.value):
+            elif type == Types.Int.value:
                 self.var_type = Types.Int
-            elif type.matches(TokenType.TYPE, Types.Float.value):
+            elif type == Types.Float.value:
                 self.var_type = Types.Float
-            elif type.matches(TokenType.TYPE, Types.String.value):
+            elif type == Types.String.value:
                 self.var_type = Types.String
             else:
                 self.var_type = Types.Any
 
-            res.register_advancement()
             self.advance()
-            expr = res.register(self.expr())
-            if res.error:
-                return res
+            expr = self.expr()
 
-            return res.success(VarAssignNode(var_name, expr, self.var_type))
+            node = VarAssignNode(var_name, var_name_start, expr, self.var_type)
+            self.depth -= 1
+            return node
 
-        node = res.register(
-            self.bin_op(
-                self.comp_expr, ((TokenType.KEYWORD, "and"), (TokenType.KEYWORD, "or"))
-            )
-        )
-
-        if res.error:
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    "Expected expression",
-                )
-            )
+        if not self.starts_expr():
+            raise self.syntax_error("Expected expression")
 
-        return res.success(node)
+        node = self.operation(LOGIC)
+        self.depth -= 1
+        return node
 
-    def comp_expr(self):
+    def operand(self, power):
         """
-        : NOT comp-expr
-        : arith-expr ((EE|LT|GT|LTE|GTE) arith-expr)*
+        The operand of an operator: whatever binds at least as tightly as
+        power. The comp-expr operands of and/or/not reject tokens that cannot
+        start one before descending.
         """
-        res = ParseResult()
-
-        if self.current_tok.matches(TokenType.KEYWORD, "not"):
-            op_tok = self.current_tok
-            res.register_advancement()
-            self.advance()
-
-            node = res.register(self.comp_expr())
-            if res.error:
-                return res
-            return res.success(UnaryOpNode(op_tok, node))
-
-        node = res.register(
-            self.bin_op(
-                self.arith_expr,
-                (
-                    TokenType.EE,
-                    TokenType.NE,
-                    TokenType.LT,
-                    TokenType.GT,
-                    TokenType.LTE,
-                    TokenType.GTE,
-                ),
+        if power == COMPARISON and (
+            not self.starts_expr() or self.current_tok.type == TokenType.TYPE
+        ):
+            raise self.syntax_error(
+                "Expected int, float, identifier, '+', '-', '(', or 'not'"
             )
-        )
 
-        if res.error:
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    "Expected int, float, identifier, '+', '-', '(', or 'not'",
-                )
-            )
+        return self.operation(power)
 
-        return res.success(node)
-
-    def arith_expr(self):
+    def operation(self, power):
         """
-        term ((PLUS|MINUS) term)*
+        : (KEYWORD:not)* comp-expr                    (power <= COMPARISON)
+        : (PLUS|MINUS)* call (POWER call)*            (power <= UNARY)
+        : call
+        followed by every infix operator binding at least as tightly as
+        power, each taking the operand BINDING_POWER gives it
         """
-        return self.bin_op(self.term, (TokenType.PLUS, TokenType.MINUS))
+        cur = self.current_tok
 
-    def term(self):
-        """
-        : factor ((MUL | DIV) factor)*
-        """
-        return self.bin_op(self.factor, (TokenType.MUL, TokenType.DIV))
+        if cur.type is TokenType.KEYWORD and cur.value == "not" and power <= COMPARISON:
+            op_starts = []
+            while cur.type is TokenType.KEYWORD and cur.value == "not":
+                op_starts.append(cur.pos_start)
+                cur.advance()
 
-    def factor(self):
-        """
-        : (PLUS|MINUS) factor
-        : power
-        """
-        res = ParseResult()
-        tok = self.current_tok
+            left = self.operand(COMPARISON)
+            for pos_start in reversed(op_starts):
+                left = UnaryOpNode(Operator.NOT, left, pos_start)
 
-        if tok.type in (TokenType.PLUS, TokenType.MINUS):
-            res.register_advancement()
-            self.advance()
-            factor = res.register(self.factor())
-            if res.error:
-                return res
-            return res.success(UnaryOpNode(tok, factor))
+        elif UNARY_CODES[cur.code] and power <= UNARY:
+            ops = []
+            while UNARY_CODES[cur.code]:
+                ops.append((OPERATOR_CODES[cur.code], cur.pos_start))
+                cur.advance()
 
-        return self.power()
+            left = self.operation(UNARY)
+            for op, pos_start in reversed(ops):
+                left = UnaryOpNode(op, left, pos_start)
 
-    def power(self):
-        """
-        : call (POWER factor)*
-        """
-        return self.bin_op(self.call, (TokenType.POWER,), self.factor)
+        else:
+            left = self.atom()
+            if cur.type is TokenType.LPAREN:
+                left = self.call(left)
+
+        while True:
+            binding = BINDING_POWER_CODES[cur.code]
+            if binding is not None:
+                op = OPERATOR_CODES[cur.code]
+            elif cur.type is TokenType.KEYWORD and cur.value in KEYWORD_BINDING_POWER:
+                binding = KEYWORD_BINDING_POWER[cur.value]
+                op = KEYWORD_OPERATORS[cur.value]
+            else:
+                return left
+
+            if binding < power:
+                return left
+
+            cur.advance()
+            if binding == LOGIC:
+                right = self.operand(COMPARISON)
+            else:
+                right = self.operation(binding + 1)
+            left = BinOpNode(left, op, right)
 
-    def call(self):
+    def call(self, atom):
         """
         : atom (LPAREN (expr (COMMA expr)*)? RPAREN)?
+        operation() parses the atom and hands it over when an LPAREN follows
         """
-        res = ParseResult()
-        atom = res.register(self.atom())
-        if res.error:
-            return res
+        self.advance()
+        arg_nodes = []
 
-        if self.current_tok.type == TokenType.LPAREN:
-            res.register_advancement()
+        if self.current_tok.type == TokenType.RPAREN:
             self.advance()
-            arg_nodes = []
+        else:
+            arg_nodes.append(self.expr())
 
-            if self.current_tok.type == TokenType.RPAREN:
-                res.register_advancement()
+            while self.current_tok.type == TokenType.COMMA:
                 self.advance()
-            else:
-                arg_nodes.append(res.register(self.expr()))
-                if res.error:
-                    return res.failure(
-                        SyntaxError(
-                            self.current_tok.pos_start,
-                            self.current_tok.pos_end,
-                            "Expected expression",
-                        )
-                    )
-
-                while self.current_tok.type == TokenType.COMMA:
-                    res.register_advancement()
-                    self.advance()
-
-                    arg_nodes.append(res.register(self.expr()))
-                    if res.error:
-                        return res
+                arg_nodes.append(self.expr())
 
-                if self.current_tok.type != TokenType.RPAREN:
-                    return res.failure(
-                        SyntaxError(
-                            self.current_tok.pos_start,
-                            self.current_tok.pos_end,
-                            f"Expected ',' or ')'",
-                        )
-                    )
+            if self.current_tok.type != TokenType.RPAREN:
+                raise self.syntax_error(f"Expected ',' or ')'")
 
-                res.register_advancement()
-                self.advance()
-            return res.success(CallNode(atom, arg_nodes))
-        return res.success(atom)
+            self.advance()
+        return CallNode(atom, arg_nodes)
 
     def atom(self):
         """
@@ -342,157 +359,93 @@ class Parser:
         : while-expr
         : func-def
         """
-        res = ParseResult()
-        tok = self.current_tok
-
-        if tok.type == TokenType.INT:
-            res.register_advancement()
-            self.advance()
-            return res.success(IntNode(tok, self.var_type))
-
-        elif tok.type == TokenType.FLOAT:
-            res.register_advancement()
-            self.advance()
-            return res.success(FloatNode(tok, self.var_type))
+        cur = self.current_tok
+        type_ = cur.type
 
-        elif tok.type == TokenType.STRING:
-            res.register_advancement()
-            self.advance()
-            return res.success(StringNode(tok, self.var_type))
+        if type_ is TokenType.IDENTIFIER:
+            var_name = cur.value
+            pos_start = cur.pos_start
+            pos_end = cur.pos_end
+            cur.advance()
 
-        elif tok.type == TokenType.IDENTIFIER:
-            res.register_advancement()
-            self.advance()
-
-            if self.current_tok.type == TokenType.DOT:
-                res.register_advancement()
+            if cur.type == TokenType.DOT:
                 self.advance()
 
                 if self.current_tok.type == TokenType.METHOD:
                     print("method")
                 else:
-                    return res.failure(
-                        SyntaxError(
-                            self.current_tok.pos_start,
-                            self.current_tok.pos_end,
-                            "Expected method",
-                        )
-                    )
-
-            return res.success(VarAccessNode(tok))
-
-        elif tok.type == TokenType.LPAREN:
-            res.register_advancement()
+                    raise self.syntax_error("Expected method")
+
+            return VarAccessNode(var_name, pos_start, pos_end)
+
+        elif type_ is TokenType.INT:
+            node = IntNode(cur.value, cur.pos_start)
+            cur.advance()
+            return node
+
+        elif type_ is TokenType.FLOAT:
+            node = FloatNode(cur.value, cur.pos_start)
+            cur.advance()
+            return node
+
+        elif type_ is TokenType.STRING:
+            node = StringNode(cur.value, cur.pos_start)
+            cur.advance()
+            return node
+
+        elif type_ is TokenType.LPAREN:
             self.advance()
-            expr = res.register(self.expr())
-            if res.error:
-                return res
+            expr = self.expr()
             if self.current_tok.type == TokenType.RPAREN:
-                res.register_advancement()
                 self.advance()
-                return res.success(expr)
+                return expr
             else:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        "Expected ')'",
-                    )
-                )
+                raise self.syntax_error("Expected ')'")
 
-        elif tok.type == TokenType.LSQUARE:
-            list_expr = res.register(self.list_expr())
-            if res.error:
-                return res
-            return res.success(list_expr)
-
-        elif tok.matches(TokenType.KEYWORD, "if"):
-            if_expr = res.register(self.if_expr())
-            if res.error:
-                return res
-            return res.success(if_expr)
-
-        elif tok.matches(TokenType.KEYWORD, "for"):
-            for_expr = res.register(self.for_expr())
-            if res.error:
-                return res
-            return res.success(for_expr)
-
-        elif tok.matches(TokenType.KEYWORD, "while"):
-            while_expr = res.register(self.while_expr())
-            if res.error:
-                return res
-            return res.success(while_expr)
-
-        elif tok.matches(TokenType.KEYWORD, "def"):
-            func_def = res.register(self.func_def())
-            if res.error:
-                return res
-            return res.success(func_def)
-
-        return res.failure(
-            SyntaxError(
-                tok.pos_start,
-                tok.pos_end,
-                "Expected int, float, identifier, '+', '-' or '('",
-            )
-        )
+        elif type_ is TokenType.LSQUARE:
+            return self.list_expr()
+
+        elif cur.matches(TokenType.KEYWORD, "if"):
+            return self.if_expr()
+
+        elif cur.matches(TokenType.KEYWORD, "for"):
+            return self.for_expr()
+
+        elif cur.matches(TokenType.KEYWORD, "while"):
+            return self.while_expr()
+
+        elif cur.matches(TokenType.KEYWORD, "def"):
+            return self.func_def()
+
+        raise self.syntax_error("Expected int, float, identifier, '+', '-' or '('")
 
     def list_expr(self):
         """
         : LSQUARE (expr (COMMA expr)*)? RSQUARE
         """
-        res = ParseResult()
         element_nodes = []
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         if self.current_tok.type != TokenType.LSQUARE:
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start, self.current_tok.pos_end, "Expected '['"
-                )
-            )
+            raise self.syntax_error("Expected '['")
 
-        res.register_advancement()
         self.advance()
 
         if self.current_tok.type == TokenType.RSQUARE:
-            res.register_advancement()
             self.advance()
         else:
-            element_nodes.append(res.register(self.expr()))
-            if res.error:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        "Expected expression or ']'",
-                    )
-                )
+            element_nodes.append(self.expr())
 
             while self.current_tok.type == TokenType.COMMA:
-                res.register_advancement()
                 self.advance()
-
-                element_nodes.append(res.register(self.expr()))
-                if res.error:
-                    return res
+                element_nodes.append(self.expr())
 
             if self.current_tok.type != TokenType.RSQUARE:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        f"Expected ',' or ']'",
-                    )
-                )
+                raise self.syntax_error(f"Expected ',' or ']'")
 
-            res.register_advancement()
             self.advance()
 
-        return res.success(
-            ListNode(element_nodes, pos_start, self.current_tok.pos_end.copy())
-        )
+        return ListNode(element_nodes, pos_start, self.current_tok.pos_end)
 
     def if_expr(self):
         """
@@ -500,12 +453,8 @@ class Parser:
             (statement if-expr-b|if-expr-c?)
         | (NEWLINE statements KEYWORD:stop|if-expr-b|if-expr-c)
         """
-        res = ParseResult()
-        all_cases = res.register(self.if_expr_cases("if"))
-        if res.error:
-            return res
-        cases, else_case = all_cases  # type: ignore
-        return res.success(IfNode(cases, else_case))
+        cases, else_case = self.if_expr_cases("if")
+        return IfNode(cases, else_case)
 
     def if_expr_b(self):
         """
@@ -521,121 +470,72 @@ class Parser:
             statement
         | (NEWLINE statements KEYWORD:stop)
         """
-        res = ParseResult()
         else_case = None
 
         if self.current_tok.matches(TokenType.KEYWORD, "else"):
-            res.register_advancement()
             self.advance()
 
             if self.current_tok.type == TokenType.NEWLINE:
-                res.register_advancement()
                 self.advance()
 
-                statements = res.register(self.statements())
-                if res.error:
-                    return res
+                statements = self.statements()
                 else_case = (statements, True)
 
                 if self.current_tok.matches(TokenType.KEYWORD, "stop"):
-                    res.register_advancement()
                     self.advance()
                 else:
-                    return res.failure(
-                        SyntaxError(
-                            self.current_tok.pos_start,
-                            self.current_tok.pos_end,
-                            "Expected 'stop'",
-                        )
-                    )
+                    raise self.syntax_error("Expected 'stop'")
             else:
-                expr = res.register(self.expr())
-                if res.error:
-                    return res
+                expr = self.expr()
                 else_case = (expr, False)
 
-        return res.success(else_case)
+        return else_case
 
     def if_expr_b_or_c(self):
-        res = ParseResult()
         cases, else_case = [], None
 
         if self.current_tok.matches(TokenType.KEYWORD, "elif"):
-            all_cases = res.register(self.if_expr_b())
-            if res.error:
-                return res
-            cases, else_case = all_cases
+            cases, else_case = self.if_expr_b()
         else:
-            else_case = res.register(self.if_expr_c())
-            if res.error:
-                return res
+            else_case = self.if_expr_c()
 
-        return res.success((cases, else_case))
+        return cases, else_case
 
     def if_expr_cases(self, case_keyword):
-        res = ParseResult()
         cases = []
         else_case = None
 
         if not self.current_tok.matches(TokenType.KEYWORD, case_keyword):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected '{case_keyword}'",
-                )
-            )
+            raise self.syntax_error(f"Expected '{case_keyword}'")
 
-        res.register_advancement()
         self.advance()
 
-        condition = res.register(self.expr())
-        if res.error:
-            return res
+        condition = self.expr()
 
         if not self.current_tok.matches(TokenType.KEYWORD, ":"):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected ':'",
-                )
-            )
+            raise self.syntax_error(f"Expected ':'")
 
-        res.register_advancement()
         self.advance()
 
         if self.current_tok.type == TokenType.NEWLINE:
-            res.register_advancement()
             self.advance()
 
-            statements = res.register(self.statements())
-            if res.error:
-                return res
+            statements = self.statements()
             cases.append((condition, statements, True))
 
             if self.current_tok.matches(TokenType.KEYWORD, "stop"):
-                res.register_advancement()
                 self.advance()
             else:
-                all_cases = res.register(self.if_expr_b_or_c())
-                if res.error:
-                    return res
-                new_cases, else_case = all_cases  # type: ignore
+                new_cases, else_case = self.if_expr_b_or_c()
                 cases.extend(new_cases)
         else:
-            expr = res.register(self.statement())
-            if res.error:
-                return res
+            expr = self.statement()
             cases.append((condition, expr, False))
 
-            all_cases = res.register(self.if_expr_b_or_c())
-            if res.error:
-                return res
-            new_cases, else_case = all_cases  # type: ignore
+            new_cases, else_case = self.if_expr_b_or_c()
             cases.extend(new_cases)
 
-        return res.success((cases, else_case))
+        return cases, else_case
 
     def for_expr(self):
         """
@@ -644,117 +544,61 @@ class Parser:
             statement
         | (NEWLINE statements KEYWORD:stop)
         """
-        res = ParseResult()
-
         if not self.current_tok.matches(TokenType.KEYWORD, "for"):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected 'for'",
-                )
-            )
+            raise self.syntax_error(f"Expected 'for'")
 
-        res.register_advancement()
         self.advance()
 
         if self.current_tok.type != TokenType.IDENTIFIER:
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected identifier",
-                )
-            )
+            raise self.syntax_error(f"Expected identifier")
 
-        var_name = self.current_tok
-        res.register_advancement()
+        var_name = self.current_tok.value
+        var_name_start = self.current_tok.pos_start
         self.advance()
 
         if self.current_tok.type != TokenType.EQ:
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected '='",
-                )
-            )
+            raise self.syntax_error(f"Expected '='")
 
-        res.register_advancement()
         self.advance()
 
-        start_value = res.register(self.expr())
-        if res.error:
-            return res
+        start_value = self.expr()
 
         if not self.current_tok.matches(TokenType.KEYWORD, "to"):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected 'to'",
-                )
-            )
+            raise self.syntax_error(f"Expected 'to'")
 
-        res.register_advancement()
         self.advance()
 
-        end_value = res.register(self.expr())
-        if res.error:
-            return res
+        end_value = self.expr()
 
         if self.current_tok.matches(TokenType.KEYWORD, "step"):
-            res.register_advancement()
             self.advance()
-
-            step_value = res.register(self.expr())
-            if res.error:
-                return res
+            step_value = self.expr()
         else:
             step_value = None
 
         if not self.current_tok.matches(TokenType.KEYWORD, ":"):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected ':'",
-                )
-            )
+            raise self.syntax_error(f"Expected ':'")
 
-        res.register_advancement()
         self.advance()
 
         if self.current_tok.type == TokenType.NEWLINE:
-            res.register_advancement()
             self.advance()
 
-            body = res.register(self.statements())
-            if res.error:
-                return res
+            body = self.statements()
 
             if not self.current_tok.matches(TokenType.KEYWORD, "stop"):
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        "Expected 'stop'",
-                    )
-                )
+                raise self.syntax_error("Expected 'stop'")
 
-            res.register_advancement()
             self.advance()
 
-            return res.success(
-                ForNode(var_name, start_value, end_value, step_value, body, True)
+            return ForNode(
+                var_name, var_name_start, start_value, end_value, step_value, body, True
             )
 
-        body = res.register(self.statement())
-        if res.error:
-            return res
+        body = self.statement()
 
-        return res.success(
-            ForNode(var_name, start_value, end_value, step_value, body, False)
+        return ForNode(
+            var_name, var_name_start, start_value, end_value, step_value, body, False
         )
 
     def while_expr(self):
@@ -763,63 +607,33 @@ class Parser:
             statement
         | (NEWLINE statements KEYWORD:stop)
         """
-        res = ParseResult()
-
         if not self.current_tok.matches(TokenType.KEYWORD, "while"):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected 'while'",
-                )
-            )
+            raise self.syntax_error(f"Expected 'while'")
 
-        res.register_advancement()
         self.advance()
 
-        condition = res.register(self.expr())
-        if res.error:
-            return res
+        condition = self.expr()
 
         if not self.current_tok.matches(TokenType.KEYWORD, ":"):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected ':'",
-                )
-            )
+            raise self.syntax_error(f"Expected ':'")
 
-        res.register_advancement()
         self.advance()
 
         if self.current_tok.type == TokenType.NEWLINE:
-            res.register_advancement()
             self.advance()
 
-            body = res.register(self.statements())
-            if res.error:
-                return res
+            body = self.statements()
 
             if not self.current_tok.matches(TokenType.KEYWORD, "stop"):
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        "Expected 'stop'",
-                    )
-                )
+                raise self.syntax_error("Expected 'stop'")
 
-            res.register_advancement()
             self.advance()
 
-            return res.success(WhileNode(condition, body, True))
+            return WhileNode(condition, body, True)
 
-        body = res.register(self.statement())
-        if res.error:
-            return res
+        body = self.statement()
 
-        return res.success(WhileNode(condition, body, False))
+        return WhileNode(condition, body, False)
 
     def func_def(self):
         """
@@ -828,151 +642,66 @@ class Parser:
             (ARROW expr)
         | (NEWLINE statements KEYWORD:stop)
         """
-        res = ParseResult()
-
         if not self.current_tok.matches(TokenType.KEYWORD, "def"):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected 'def'",
-                )
-            )
+            raise self.syntax_error(f"Expected 'def'")
 
-        res.register_advancement()
         self.advance()
 
         if self.current_tok.type == TokenType.IDENTIFIER:
-            var_name_tok = self.current_tok
-            res.register_advancement()
+            var_name = self.current_tok.value
+            pos_start = self.current_tok.pos_start
             self.advance()
             if self.current_tok.type != TokenType.LPAREN:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        f"Expected '('",
-                    )
-                )
+                raise self.syntax_error(f"Expected '('")
         else:
-            var_name_tok = None
+            var_name = None
+            pos_start = None
             if self.current_tok.type != TokenType.LPAREN:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        f"Expected identifier or '('",
-                    )
-                )
+                raise self.syntax_error(f"Expected identifier or '('")
 
-        res.register_advancement()
         self.advance()
-        arg_name_toks = []
+        arg_names = []
 
         if self.current_tok.type == TokenType.IDENTIFIER:
-            arg_name_toks.append(self.current_tok)
-            res.register_advancement()
+            arg_names.append(self.current_tok.value)
+            if pos_start is None:
+                pos_start = self.current_tok.pos_start
             self.advance()
 
             while self.current_tok.type == TokenType.COMMA:
-                res.register_advancement()
                 self.advance()
 
                 if self.current_tok.type != TokenType.IDENTIFIER:
-                    return res.failure(
-                        SyntaxError(
-                            self.current_tok.pos_start,
-                            self.current_tok.pos_end,
-                            f"Expected identifier",
-                        )
-                    )
-
-                arg_name_toks.append(self.current_tok)
-                res.register_advancement()
+                    raise self.syntax_error(f"Expected identifier")
+
+                arg_names.append(self.current_tok.value)
                 self.advance()
 
             if self.current_tok.type != TokenType.RPAREN:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        f"Expected ',' or ')'",
-                    )
-                )
+                raise self.syntax_error(f"Expected ',' or ')'")
         else:
             if self.current_tok.type != TokenType.RPAREN:
-                return res.failure(
-                    SyntaxError(
-                        self.current_tok.pos_start,
-                        self.current_tok.pos_end,
-                        f"Expected identifier or ')'",
-                    )
-                )
+                raise self.syntax_error(f"Expected identifier or ')'")
 
-        res.register_advancement()
         self.advance()
 
         if self.current_tok.type == TokenType.ARROW:
-            res.register_advancement()
             self.advance()
 
-            body = res.register(self.expr())
-            if res.error:
-                return res
+            body = self.expr()
 
-            return res.success(FuncDefNode(var_name_tok, arg_name_toks, body, True))
+            return FuncDefNode(var_name, arg_names, body, True, pos_start)
 
         if self.current_tok.type != TokenType.NEWLINE:
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected '->' or new line",
-                )
-            )
+            raise self.syntax_error(f"Expected '->' or new line")
 
-        res.register_advancement()
         self.advance()
 
-        body = res.register(self.statements())
-        if res.error:
-            return res
+        body = self.statements()
 
         if not self.current_tok.matches(TokenType.KEYWORD, "stop"):
-            return res.failure(
-                SyntaxError(
-                    self.current_tok.pos_start,
-                    self.current_tok.pos_end,
-                    f"Expected 'stop'",
-                )
-            )
+            raise self.syntax_error(f"Expected 'stop'")
 
-        res.register_advancement()
         self.advance()
 
-        return res.success(FuncDefNode(var_name_tok, arg_name_toks, body, False))
-
-    ############################################
-
-    def bin_op(self, func_a, ops, func_b=None):
-        if func_b == None:
-            func_b = func_a
-
-        res = ParseResult()
-        left = res.register(func_a())
-        if res.error:
-            return res
-
-        while (
-            self.current_tok.type in ops
-            or (self.current_tok.type, self.current_tok.value) in ops
-        ):
-            op_tok = self.current_tok
-            res.register_advancement()
-            self.advance()
-            right = res.register(func_a())
-            if res.error:
-                return res
-            left = BinOpNode(left, op_tok, right)
-
-        return res.success(left)
+        return FuncDefNode(var_name, arg_names, body, False, pos_start)
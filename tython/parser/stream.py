@@ -0,0 +1,137 @@
+import codecs
+import io
+
+from tython.lex import Lexer, SourceFile, TokenType
+from tython.errors import SyntaxError
+from .parser import Parser, InvalidSyntax
+
+
+############################################
+# STATEMENT READER
+############################################
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StatementReader:
+    """
+    Reads a script from a binary stream and yields its top-level statements
+    one at a time as (node, source, error), source being the SourceFile the
+    node's offsets point into. Only the text of the statements not yet
+    yielded is kept, and it is lexed a piece of whole lines at a time, so
+    the tokens and nodes of the whole script never exist at once.
+
+    A statement is yielded as soon as the lines read so far hold all of it.
+    When its parse runs into the end of the lines read so far, it is left
+    until at least as much text again has been read and parsed anew from
+    its first token. The statements and the error are those Parser.parse()
+    gives for the whole script, except that every statement before an
+    error is yielded first.
+    """
+
+    def __init__(self, fn, stream, chunk_size=CHUNK_SIZE):
+        self.fn = fn
+        self.read_chunk = getattr(stream, "read1", stream.read)
+        self.chunk_size = chunk_size
+        # Decoded like a file in text mode, line endings and all
+        self.decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")("replace"), translate=True
+        )
+        self.pending = ""
+        self.line = 0
+        self.eof = False
+        self.first = True
+        self.consumed = 0
+
+    def read(self):
+        data = self.read_chunk(self.chunk_size)
+        self.pending += self.decoder.decode(data, not data)
+        self.eof = not data
+
+    def __iter__(self):
+        need = 1
+        while True:
+            # Only whole lines are lexed until the stream ends
+            end = self.pending.rfind("\n") + 1
+            while not self.eof and end < need:
+                self.read()
+                end = self.pending.rfind("\n") + 1
+            if self.eof:
+                end = len(self.pending)
+            text = self.pending[:end]
+            final = self.eof
+
+            source = SourceFile(self.fn, text, self.line)
+            tokens, lex_error = Lexer(source).make_tokens()
+            if lex_error:
+                # The lines before the bad character still run
+                end = text.rfind("\n", 0, lex_error.pos_start) + 1
+                source = SourceFile(self.fn, text[:end], self.line)
+                tokens, _ = Lexer(source).make_tokens()
+                final = False
+
+            for node, error in self.statements(tokens, final):
+                if error:
+                    yield None, source, lex_error or error
+                    return
+                yield node, source, None
+
+            if lex_error:
+                yield None, source, lex_error
+                return
+            if final:
+                return
+
+            self.line += self.pending.count("\n", 0, self.consumed)
+            self.pending = self.pending[self.consumed :]
+            need = max(2 * (end - self.consumed), 1)
+
+    def statements(self, tokens, final):
+        """
+        Parses the statements of a piece of text the way Parser.statements()
+        and Parser.parse() do, yielding (node, None) for each or (None,
+        error), and sets self.consumed to the offset of the first statement
+        not yielded. Unless final, the statement that reaches the end of the
+        text may go on past it and is left for the next piece.
+        """
+        parser = Parser(tokens)
+        cursor = parser.current_tok
+        eof_idx = len(tokens) - 1
+        # The piece starts after a newline or at the first statement
+        separated = True
+
+        while True:
+            while cursor.type == TokenType.NEWLINE:
+                cursor.advance()
+                separated = True
+
+            if cursor.idx == eof_idx and not (final and self.first):
+                self.consumed = len(tokens.source.text)
+                return
+
+            if not self.first and not (separated and parser.starts_statement()):
+                yield None, SyntaxError(
+                    cursor.pos_start,
+                    cursor.pos_end,
+                    "Expected '+', '-', '*', '/', or '^'",
+                    tokens.source,
+                )
+                return
+
+            start = cursor.pos_start
+            try:
+                node = parser.statement()
+            except InvalidSyntax as e:
+                if cursor.idx >= eof_idx and not final:
+                    self.consumed = start
+                    return
+                yield None, e.error
+                return
+
+            if cursor.idx >= eof_idx and not final:
+                self.consumed = start
+                return
+
+            self.first = False
+            separated = False
+            yield node, None
@@ -0,0 +1,278 @@
+############################################
+# PROJECT
+############################################
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+import pickle
+
+import tython.main as main
+from tython.cache import CACHE_DIRNAME, CACHE_TAG, text_digest, write_atomic
+from tython.lex import SourceFile
+from tython.checker import TypeChecker
+from tython.parser import Node, CallNode, VarAccessNode, StringNode
+
+SCRIPT_SUFFIX = ".ty"
+PROJECT_SUFFIX = ".typroj"
+
+# Below this many scripts, starting a process pool costs more than it saves
+POOL_MIN_SCRIPTS = 16
+
+
+class ScriptResult:
+    """
+    What checking one script found: its errors, rendered as they would be
+    printed, the scripts a valid one runs (see run_refs) and, when it was
+    parsed with want_ast, the hash of its text and its pickled AST
+    """
+
+    def __init__(self, fn, errors, refs=(), digest=None, data=None):
+        self.fn = fn
+        self.errors = errors
+        self.refs = refs
+        self.digest = digest
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"ScriptResult({self.fn!r}, {len(self.errors)} errors)"
+
+
+def find_scripts(paths):
+    """
+    Every script among paths, which may be files or directories to walk,
+    in sorted order
+    """
+    scripts = set()
+    for path in paths:
+        if not os.path.isdir(path):
+            scripts.add(path)
+            continue
+
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [name for name in dirnames if name != CACHE_DIRNAME]
+            for filename in filenames:
+                if filename.endswith(SCRIPT_SUFFIX):
+                    scripts.add(os.path.join(dirpath, filename))
+    return sorted(scripts)
+
+
+def run_refs(node):
+    """
+    The file names of every run("...") call in the tree, in source order.
+    Calls taking anything but a string literal cannot be resolved without
+    running the script and are left out.
+    """
+    refs = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(reversed(item))
+        elif isinstance(item, Node):
+            if (
+                isinstance(item, CallNode)
+                and isinstance(item.node_to_call, VarAccessNode)
+                and item.node_to_call.var_name == "run"
+                and len(item.arg_nodes) == 1
+                and isinstance(item.arg_nodes[0], StringNode)
+            ):
+                refs.append(item.arg_nodes[0].value)
+            stack.extend(getattr(item, field) for field in reversed(item.fields))
+    return refs
+
+
+def check_script(fn, cache, want_ast=False, types=False):
+    """
+    Lexes and parses one script, unless cache already holds its AST, and
+    with types, checks its types
+    """
+    try:
+        source = SourceFile.open(fn)
+    except OSError as e:
+        return ScriptResult(fn, [f'Failed to load script "{fn}"\n{e}'])
+
+    node = cache.load(source)
+    if node is None:
+        node, error = main.parse(source)
+        if error:
+            return ScriptResult(fn, [repr(error)])
+    elif not types:
+        return ScriptResult(fn, [], run_refs(node))
+
+    refs = run_refs(node)
+    if types:
+        checker = TypeChecker()
+        checker.check(node, source)
+        return ScriptResult(fn, [repr(error) for error in checker.errors], refs)
+    if not want_ast:
+        return ScriptResult(fn, [], refs)
+
+    try:
+        data = pickle.dumps(node, pickle.HIGHEST_PROTOCOL)
+    except RecursionError:
+        # Too deeply nested to pickle, so it cannot be cached either
+        return ScriptResult(fn, [], refs)
+    return ScriptResult(fn, [], refs, text_digest(source.text), data)
+
+
+def check_scripts(fns, cache, want_ast=False, jobs=None, types=False):
+    """
+    Runs check_script over every script in a pool of jobs processes (one
+    per core by default) and returns the results in the order of fns
+    """
+    check = partial(check_script, cache=cache, want_ast=want_ast, types=types)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(fns) <= 1:
+        return [check(fn) for fn in fns]
+
+    # A few chunks per worker keep them all busy without a round trip per
+    # script
+    chunksize = max(1, len(fns) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=min(jobs, len(fns))) as pool:
+        return list(pool.map(check, fns, chunksize=chunksize))
+
+
+def compile_scripts(fns, cache, jobs=None):
+    """
+    Checks every script and stores the AST of each valid one in cache
+    """
+    results = check_scripts(fns, cache, want_ast=True, jobs=jobs)
+    for result in results:
+        if result.data is not None:
+            cache.store_data(result.fn, True, result.digest, result.data)
+            result.data = None
+    return results
+
+
+############################################
+# PROJECT BUILD
+############################################
+
+
+class ModuleState:
+    """
+    What a build keeps about one module besides its cached AST: the stat
+    it was processed at, the modules it runs and its check results
+    """
+
+    def __init__(self, stat, deps, parse_errors):
+        self.stat = stat
+        self.deps = deps
+        self.parse_errors = parse_errors
+        self.dep_errors = []
+
+    @property
+    def errors(self):
+        return self.parse_errors + self.dep_errors
+
+
+class Project:
+    """
+    The scripts under root and the dependency graph their static run("...")
+    calls form. run() opens paths relative to the working directory, so
+    root is the directory the scripts are run from; modules are named by
+    their path relative to it.
+
+    build() keeps a ModuleState per module in a file next to the AST cache
+    and on later builds only re-processes the modules whose files changed
+    (by mtime and size), were added or were removed, and every module that
+    depends on one of them. Changed modules are parsed again; their
+    dependents only have their run() references checked again.
+    """
+
+    def __init__(self, root, cache):
+        self.root = root
+        self.cache = cache
+        self.state_path = os.path.join(
+            cache.cache_dir(root), f"project.{CACHE_TAG}{PROJECT_SUFFIX}"
+        )
+        self.modules = self.load_state()
+
+    def load_state(self):
+        if not self.cache.enabled:
+            return {}
+        try:
+            with open(self.state_path, "rb") as f:
+                tag, modules = pickle.load(f)
+        except Exception:
+            # No build yet, or an unreadable one: everything gets built
+            return {}
+        return modules if tag == CACHE_TAG else {}
+
+    def save_state(self):
+        if self.cache.enabled:
+            data = pickle.dumps((CACHE_TAG, self.modules), pickle.HIGHEST_PROTOCOL)
+            write_atomic(self.state_path, data)
+
+    def module_name(self, fn):
+        return os.path.normpath(os.path.relpath(fn, self.root))
+
+    def dependents(self, names):
+        """
+        Every module that runs one of names, directly or not
+        """
+        runners = defaultdict(list)
+        for name, state in self.modules.items():
+            for dep in state.deps:
+                runners[dep].append(name)
+
+        found = set()
+        stack = list(names)
+        while stack:
+            for runner in runners[stack.pop()]:
+                if runner not in found:
+                    found.add(runner)
+                    stack.append(runner)
+        return found
+
+    def build(self, jobs=None):
+        """
+        Brings every module up to date and returns the names of the ones
+        that were re-processed, sorted
+        """
+        scripts = {}
+        stats = {}
+        changed = []
+        for fn in find_scripts([self.root]):
+            name = self.module_name(fn)
+            try:
+                st = os.stat(fn)
+            except OSError:
+                continue
+            scripts[name] = fn
+            stats[name] = (st.st_mtime_ns, st.st_size)
+
+            state = self.modules.get(name)
+            if state is None or state.stat != stats[name]:
+                changed.append(name)
+
+        removed = [name for name in self.modules if name not in scripts]
+        for name in removed:
+            del self.modules[name]
+
+        fns = [scripts[name] for name in changed]
+        if len(fns) < POOL_MIN_SCRIPTS:
+            jobs = 1
+        for name, result in zip(changed, compile_scripts(fns, self.cache, jobs)):
+            deps = [
+                self.module_name(os.path.join(self.root, ref)) for ref in result.refs
+            ]
+            self.modules[name] = ModuleState(stats[name], deps, result.errors)
+
+        processed = set(changed) | self.dependents(changed + removed)
+        for name in processed:
+            self.check_deps(name)
+
+        self.save_state()
+        return sorted(processed)
+
+    def check_deps(self, name):
+        state = self.modules[name]
+        state.dep_errors = [
+            f'{name}: run("{dep}") refers to a script that does not exist'
+            for dep in state.deps
+            if dep not in self.modules
+            and not os.path.isfile(os.path.join(self.root, dep))
+        ]
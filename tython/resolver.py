@@ -0,0 +1,67 @@
+from tython.parser import *
+from tython.optimizer import map_nodes
+
+############################################
+# RESOLVER
+############################################
+
+
+def resolve(node):
+    """
+    The layout of the function node defines: the slot in the frame of each
+    of its calls of every variable it assigns or takes as an argument, by
+    name. The reads and assignments of those variables in its body become
+    LocalAccessNodes and LocalAssignNodes using the slots, once per
+    definition; the layout is kept as node.layout.
+
+    Any other name stays looked up by name, since which table has it
+    depends on the calls that led to the function, or on `run` and the
+    host assigning globals. So do the bodies of the functions defined in
+    node's, which are resolved when they are defined in turn.
+    """
+    if node.layout is not None:
+        return node.layout
+
+    layout = {}
+    for arg_name in node.arg_names:
+        layout.setdefault(arg_name, len(layout))
+    for var_name in assigned_names(node.body_node):
+        layout.setdefault(var_name, len(layout))
+
+    def local(item):
+        item_type = type(item)
+        if item_type is VarAccessNode and item.var_name in layout:
+            return LocalAccessNode(item, layout[item.var_name])
+        if item_type is FuncDefNode:
+            return item
+        for field in item.fields:
+            setattr(item, field, map_nodes(getattr(item, field), local))
+        if item_type is VarAssignNode:
+            return LocalAssignNode(item, layout[item.var_name])
+        return item
+
+    node.body_node = local(node.body_node)
+    node.layout = layout
+    return layout
+
+
+def assigned_names(node):
+    """
+    The names assigned under node, in the order they come, but for those
+    assigned in the bodies of the functions defined under it
+    """
+    names = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(reversed(item))
+        elif isinstance(item, Node):
+            item_type = type(item)
+            if item_type in (VarAssignNode, ForNode) or (
+                item_type is FuncDefNode and item.var_name
+            ):
+                names.append(item.var_name)
+            if item_type is not FuncDefNode:
+                stack.extend(getattr(item, field) for field in reversed(item.fields))
+    return names
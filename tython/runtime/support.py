@@ -0,0 +1,217 @@
+############################################
+# TRANSPILED MODULE SUPPORT
+############################################
+
+# Everything a module written by `tython build` (see tython.transpiler)
+# calls at run time
+
+import sys
+import traceback
+
+# tython.main first: tython.types imports it back
+import tython.main
+from tython.types import *
+from tython.lex.source import SourceFile
+from tython.context import Context
+from tython.errors import RuntimeError, TypeError
+from tython.closures import (
+    CompiledFunction,
+    ErrorSignal,
+    ReturnSignal,
+    ContinueSignal,
+    BreakSignal,
+    unwind,
+    wind,
+)
+
+__all__ = [
+    "SourceFile",
+    "Types",
+    "Int",
+    "Float",
+    "Number",
+    "Any",
+    "String",
+    "Null",
+    "List",
+    "ErrorSignal",
+    "ReturnSignal",
+    "ContinueSignal",
+    "BreakSignal",
+    "const",
+    "operation",
+    "load",
+    "type_error",
+    "make_list",
+    "make_function",
+    "call",
+    "run_program",
+    "main",
+]
+
+
+class TranspiledFunction(CompiledFunction):
+    """
+    A function whose body is a Python function from a transpiled module.
+    The body returns the function's value itself.
+    """
+
+    def copy(self):
+        copy = TranspiledFunction(
+            self.name,
+            self.body_node,
+            self.arg_names,
+            self.body,
+            self.should_auto_return,
+            self.source,
+        )
+        copy.context = self.context
+        copy.pos_start = self.pos_start
+        copy.pos_end = self.pos_end
+        return copy
+
+    def call(self, args):
+        arg_names = self.arg_names
+        exec_ctx = self.generate_new_context()
+
+        if len(args) != len(arg_names):
+            raise ErrorSignal(self.check_args(arg_names, args).error)
+        symbols = exec_ctx.symbol_table.symbols
+        for arg_name, arg_value in zip(arg_names, args):
+            arg_value.context = exec_ctx
+            symbols[arg_name] = arg_value
+
+        return self.body(exec_ctx)
+
+
+def const(value_type, value, context, pos_start, pos_end):
+    result = value_type(value)
+    result.context = context
+    result.pos_start = pos_start
+    result.pos_end = pos_end
+    return result
+
+
+def operation(result, pos_start, pos_end):
+    """
+    The value of an operator's (value, error) result, raising the error
+    """
+    value, error = result
+    if error:
+        raise ErrorSignal(error)
+    value.pos_start = pos_start
+    value.pos_end = pos_end
+    return value
+
+
+def load(context, var_name, pos_start, pos_end):
+    symbol_table = context.symbol_table
+    value = symbol_table.symbols.get(var_name)
+    if value is None:
+        value = symbol_table.get(var_name)
+        if value is None:
+            raise ErrorSignal(
+                RuntimeError(pos_start, pos_end, f"{var_name} is not defined", context)
+            )
+
+    value = value.copy()
+    value.pos_start = pos_start
+    value.pos_end = pos_end
+    value.context = context
+    return value
+
+
+def type_error(context, var_name, value, var_type, pos_start):
+    return ErrorSignal(
+        TypeError(
+            pos_start,
+            pos_start + len(var_name),
+            f"Cannot assign '{var_name}' <{var_type.name}> to variable of type <{value.type.name}>",
+            context,
+        )
+    )
+
+
+def make_list(elements, context, pos_start, pos_end):
+    result = List(elements)
+    result.context = context
+    result.pos_start = pos_start
+    result.pos_end = pos_end
+    return result
+
+
+def make_function(
+    context, func_name, arg_names, body, should_auto_return, pos_start, pos_end
+):
+    func_value = TranspiledFunction(
+        func_name, None, arg_names, body, should_auto_return, context.source
+    )
+    func_value.context = context
+    func_value.pos_start = pos_start
+    func_value.pos_end = pos_end
+
+    if func_name:
+        context.symbol_table.symbols[func_name] = func_value
+
+    return func_value
+
+
+def call(context, value_to_call, args, fresh, pos_start, pos_end):
+    if not fresh:
+        value_to_call = value_to_call.copy()
+    value_to_call.pos_start = pos_start
+    value_to_call.pos_end = pos_end
+
+    if type(value_to_call) is TranspiledFunction:
+        return_value = value_to_call.call(args)
+    else:
+        return_value = unwind(value_to_call.execute(args))
+
+    return_value = return_value.copy()
+    return_value.pos_start = pos_start
+    return_value.pos_end = pos_end
+    return_value.context = context
+    return return_value
+
+
+def run_program(program, source):
+    """
+    Runs a transpiled program the way main.run_source runs a script,
+    returning its value and error
+    """
+    context = Context("<program>", source=source)
+    context.symbol_table = tython.main.global_symbol_table
+    result = wind(program, context)
+    return result.value, result.error
+
+
+def main(run, source, source_map, module_fn):
+    """
+    Runs a transpiled program as a script. The lines of module_fn in a
+    Python traceback are shown as the lines of source they came from;
+    source_map holds the source line (from 0) of every line of module_fn,
+    or -1.
+    """
+    try:
+        _, error = run()
+    except Exception as e:
+        frames = []
+        for frame in traceback.extract_tb(e.__traceback__):
+            lineno = frame.lineno
+            if frame.filename == module_fn and 0 < lineno <= len(source_map):
+                ln = source_map[lineno - 1]
+                if ln >= 0:
+                    frame = traceback.FrameSummary(
+                        source.fn, ln + 1, frame.name, line=source.line_text(ln)
+                    )
+            frames.append(frame)
+
+        print("Traceback (most recent call last):", file=sys.stderr)
+        print("".join(traceback.format_list(frames)), end="", file=sys.stderr)
+        print("".join(traceback.format_exception_only(e)), end="", file=sys.stderr)
+        return 1
+
+    if error:
+        print(error)
+        return 1
+    return 0
@@ -0,0 +1,494 @@
+from functools import partial
+
+from tython.parser import *
+from tython.types import *
+from tython.runtime.result import RuntimeResult
+from tython.interpreter import Interpreter
+from tython.closures import ClosureCompiler, CompiledFunction, unwind, wind
+from tython.tracing import Trace, DONE, BREAK, GUARD
+
+# Calls after which a function's body is compiled
+CALL_THRESHOLD = 100
+
+# Iterations after which a loop's body is compiled, and after which the
+# function running them (counting all its loops) is compiled too
+LOOP_THRESHOLD = 1000
+
+# Times a loop's trace may leave an iteration to the compiled body before
+# the trace is dropped
+SIDE_EXIT_LIMIT = 100
+
+
+############################################
+# PROFILES
+############################################
+
+
+class Profile:
+    """
+    What is known about running a function or a loop: how often it ran and,
+    once it was found hot, its compiled code. A loop's code is the body's
+    closure and, for a while loop, the condition's; a hot loop also gets a
+    Trace, or False when it cannot have one.
+    """
+
+    def __init__(self, name, pos_start, source, is_loop=False):
+        self.name = name
+        self.pos_start = pos_start
+        self.source = source
+        self.is_loop = is_loop
+        self.count = 0
+        # Iterations of the loops run by an interpreted function
+        self.back_edges = 0
+        self.tiered_at = None
+        self.code = None
+        self.condition_code = None
+        self.trace = None
+        self.traced_at = None
+        # Iterations run by the trace, and iterations it left
+        self.traced = 0
+        self.side_exits = 0
+
+    def __repr__(self) -> str:
+        where = f"line {self.source.line(self.pos_start) + 1}" if self.source else "?"
+        if self.is_loop:
+            compiled = (
+                f"compiled after {self.tiered_at} iterations"
+                if self.tiered_at is not None
+                else "compiled with its function"
+            )
+            traced = ""
+            if self.traced_at is not None:
+                traced = (
+                    f", traced after {self.traced_at} ({self.traced} traced, "
+                    f"{self.side_exits} side exits"
+                    f"{'' if self.trace else ', dropped'})"
+                )
+            return f"loop in {self.name} ({where}): {compiled}{traced}, {self.count} in all"
+        return (
+            f"function {self.name} ({where}): compiled after {self.tiered_at} "
+            f"calls, {self.count} in all"
+        )
+
+
+class Tiers:
+    """
+    The profiles of every function and loop a TieredInterpreter has run,
+    keyed by the function's body and by the loop's node
+    """
+
+    def __init__(
+        self,
+        call_threshold=CALL_THRESHOLD,
+        loop_threshold=LOOP_THRESHOLD,
+        tracing=True,
+        side_exit_limit=SIDE_EXIT_LIMIT,
+    ):
+        self.call_threshold = call_threshold
+        self.loop_threshold = loop_threshold
+        self.side_exit_limit = side_exit_limit
+        # Whether hot loops are recorded as traces
+        self.tracing = tracing
+        self.functions = {}
+        self.loops = {}
+
+    def profile(self, profiles, node, name, pos_start, source, is_loop=False):
+        profile = profiles.get(node)
+        if profile is None:
+            profile = Profile(name, pos_start, source, is_loop)
+            profiles[node] = profile
+        return profile
+
+    def profile_loop(self, node, context):
+        return self.profile(
+            self.loops,
+            node,
+            context.display_name,
+            node.pos_start,
+            context.source,
+            is_loop=True,
+        )
+
+    def tier_up(self, profile, body_node, condition_node=None):
+        compiler = TieredCompiler(self)
+        profile.code = compiler.compile(body_node)
+        if condition_node:
+            profile.condition_code = compiler.compile(condition_node)
+        profile.tiered_at = profile.count
+
+    def record(self, profile, node, context, step=None):
+        profile.trace = self.tracing and Trace.record(node, context, step) or False
+        profile.traced_at = profile.count
+
+    def side_exit(self, profile):
+        profile.side_exits += 1
+        if profile.side_exits >= self.side_exit_limit:
+            profile.trace = False
+
+    ############################################
+
+    def iterate(self, profile, node, context, interpreter, function):
+        """
+        Runs one iteration of a loop's body, interpreted until the loop is
+        hot and compiled from then on. function is the profile of the
+        interpreted function running the loop, if any.
+        """
+        profile.count += 1
+
+        if profile.code is None:
+            if function:
+                function.back_edges += 1
+            if profile.count < self.loop_threshold:
+                return interpreter.visit(node.body_node, context)
+            self.tier_up(
+                profile,
+                node.body_node,
+                node.condition_node if type(node) is WhileNode else None,
+            )
+
+        return wind(profile.code, context)
+
+    def run_for(
+        self, node, context, i, end_value, step, interpreter=None, function=None
+    ):
+        """
+        Runs a for loop whose start, end and step have been worked out, the
+        way Interpreter.visit_ForNode() does. Once the loop is hot its
+        trace, if it has one, runs as many iterations as it can at a time,
+        the others going through iterate().
+        """
+        res = RuntimeResult()
+        profile = self.profile_loop(node, context)
+        elements = []
+        var_name = node.var_name
+        up = step >= 0
+        # Until the trace's types do not match these variables
+        tracing = True
+
+        while i < end_value.value if up else i > end_value.value:
+            trace = profile.trace
+            if trace is None and profile.count >= self.loop_threshold:
+                self.record(profile, node, context, step)
+                trace = profile.trace
+
+            if trace and tracing:
+                status, i, count = trace.run(
+                    context, i, end_value.value, step, elements
+                )
+                profile.count += count
+                profile.traced += count
+                if status == DONE or status == BREAK:
+                    break
+                if status == GUARD:
+                    tracing = False
+                else:
+                    self.side_exit(profile)
+
+            context.symbol_table.set(var_name, Int(i))
+            i += step
+
+            value = res.register(
+                self.iterate(profile, node, context, interpreter, function)
+            )
+            if (
+                res.should_return()
+                and res.loop_should_continue == False
+                and res.loop_should_break == False
+            ):
+                return res
+
+            if res.loop_should_continue:
+                continue
+
+            if res.loop_should_break:
+                break
+
+            elements.append(value)
+
+        return res.success(
+            Null()
+            if node.should_return_null
+            else List(elements)
+            .set_context(context)
+            .set_pos(node.pos_start, node.pos_end)
+        )
+
+    def run_while(self, node, context, interpreter=None, function=None):
+        """
+        Runs a while loop the way Interpreter.visit_WhileNode() does, with
+        its trace once it is hot (see run_for())
+        """
+        res = RuntimeResult()
+        profile = self.profile_loop(node, context)
+        elements = []
+        tracing = True
+
+        while True:
+            trace = profile.trace
+            if trace is None and profile.count >= self.loop_threshold:
+                self.record(profile, node, context)
+                trace = profile.trace
+
+            if trace and tracing:
+                status, count = trace.run(context, elements)
+                profile.count += count
+                profile.traced += count
+                if status == DONE or status == BREAK:
+                    break
+                if status == GUARD:
+                    tracing = False
+                else:
+                    self.side_exit(profile)
+
+            code = profile.condition_code
+            if code is None:
+                condition = res.register(
+                    interpreter.visit(node.condition_node, context)
+                )
+            else:
+                condition = res.register(wind(code, context))
+            if res.should_return():
+                return res
+
+            if not condition.is_true():
+                break
+
+            value = res.register(
+                self.iterate(profile, node, context, interpreter, function)
+            )
+            if (
+                res.should_return()
+                and res.loop_should_continue == False
+                and res.loop_should_break == False
+            ):
+                return res
+
+            if res.loop_should_continue:
+                continue
+
+            if res.loop_should_break:
+                break
+
+            elements.append(value)
+
+        return res.success(
+            Null()
+            if node.should_return_null
+            else List(elements)
+            .set_context(context)
+            .set_pos(node.pos_start, node.pos_end)
+        )
+
+    ############################################
+
+    def stats(self):
+        """
+        The profiles of what has been compiled, hottest first
+        """
+        return sorted(
+            (
+                profile
+                for profiles in (self.functions, self.loops)
+                for profile in profiles.values()
+                if profile.tiered_at is not None or profile.traced_at is not None
+            ),
+            key=lambda profile: profile.count,
+            reverse=True,
+        )
+
+
+############################################
+# TIERED COMPILER
+############################################
+
+
+class TieredCompiler(ClosureCompiler):
+    """
+    Compiles hot code for the tiered engine: like ClosureCompiler, except
+    that loops keep counting their iterations and use their traces (see
+    Tiers.run_for())
+    """
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+
+    def compile_ForNode(self, node):
+        start_code = self.compile(node.start_value_node)
+        end_code = self.compile(node.end_value_node)
+        if node.step_value_node:
+            step_code = self.compile(node.step_value_node)
+        else:
+            step_code = lambda _: Int(1)
+        body_code = self.compile(node.body_node)
+        tiers = self.tiers
+
+        def for_(context):
+            start_value = start_code(context)
+            end_value = end_code(context)
+            step_value = step_code(context)
+
+            profile = tiers.profile_loop(node, context)
+            if profile.code is None:
+                profile.code = body_code
+            return unwind(
+                tiers.run_for(
+                    node, context, start_value.value, end_value, step_value.value
+                )
+            )
+
+        return for_
+
+    def compile_WhileNode(self, node):
+        condition_code = self.compile(node.condition_node)
+        body_code = self.compile(node.body_node)
+        tiers = self.tiers
+
+        def while_(context):
+            profile = tiers.profile_loop(node, context)
+            if profile.code is None:
+                profile.code = body_code
+                profile.condition_code = condition_code
+            return unwind(tiers.run_while(node, context))
+
+        return while_
+
+
+############################################
+# TIERED FUNCTION
+############################################
+
+
+class TieredFunction(CompiledFunction):
+    """
+    A function interpreted until it is found hot, compiled to closures from
+    then on. Copies share the profile, so it counts every call of the
+    definition.
+    """
+
+    def __init__(
+        self, name, body_node, arg_names, should_auto_return, source, tiers, profile
+    ):
+        super().__init__(
+            name, body_node, arg_names, profile.code, should_auto_return, source
+        )
+        self.tiers = tiers
+        self.profile = profile
+        self.interpreter = partial(TieredInterpreter, tiers, profile)
+
+    def copy(self):
+        copy = TieredFunction(
+            self.name,
+            self.body_node,
+            self.arg_names,
+            self.should_auto_return,
+            self.source,
+            self.tiers,
+            self.profile,
+        )
+        copy.context = self.context
+        copy.pos_start = self.pos_start
+        copy.pos_end = self.pos_end
+        return copy
+
+    def execute(self, args):
+        profile = self.profile
+        profile.count += 1
+
+        if profile.code is None:
+            tiers = self.tiers
+            if (
+                profile.count < tiers.call_threshold
+                and profile.back_edges < tiers.loop_threshold
+            ):
+                return Function.execute(self, args)
+            tiers.tier_up(profile, self.body_node)
+
+        self.body = profile.code
+        return super().execute(args)
+
+
+############################################
+# TIERED INTERPRETER
+############################################
+
+
+class TieredInterpreter(Interpreter):
+    """
+    Interprets an AST while counting calls of every function and iterations
+    of every loop. A function called CALL_THRESHOLD times, or whose loops
+    have run LOOP_THRESHOLD iterations, is compiled to closures (see
+    TieredCompiler) and runs compiled from its next call on; a loop that
+    has run LOOP_THRESHOLD iterations runs the rest of them, and all of
+    them next time, compiled, and is recorded as a Trace if it only does
+    arithmetic. Cold code is only ever interpreted.
+
+    tiers keeps the counts and the compiled code, and says what was compiled
+    (see Tiers.stats()).
+    """
+
+    def __init__(self, tiers=None, profile=None):
+        self.tiers = tiers or Tiers()
+        # The function whose body is being run
+        self.profile = profile
+
+    def visit_ForNode(self, node, context):
+        res = RuntimeResult()
+
+        start_value = res.register(self.visit(node.start_value_node, context))
+        if res.should_return():
+            return res
+
+        end_value = res.register(self.visit(node.end_value_node, context))
+        if res.should_return():
+            return res
+
+        if node.step_value_node:
+            step_value = res.register(self.visit(node.step_value_node, context))
+            if res.should_return():
+                return res
+        else:
+            step_value = Int(1)
+
+        return self.tiers.run_for(
+            node,
+            context,
+            start_value.value,
+            end_value,
+            step_value.value,
+            self,
+            self.profile,
+        )
+
+    def visit_WhileNode(self, node, context):
+        return self.tiers.run_while(node, context, self, self.profile)
+
+    # Tiered functions are not resolved: their variables are kept by name
+    visit_LocalAccessNode = Interpreter.visit_VarAccessNode
+    visit_LocalAssignNode = Interpreter.visit_VarAssignNode
+
+    def visit_FuncDefNode(self, node, context):
+        tiers = self.tiers
+        profile = tiers.profile(
+            tiers.functions,
+            node.body_node,
+            node.var_name or "<anonymous>",
+            node.pos_start,
+            context.source,
+        )
+        func_value = TieredFunction(
+            node.var_name,
+            node.body_node,
+            node.arg_names,
+            node.should_auto_return,
+            context.source,
+            tiers,
+            profile,
+        )
+        func_value.context = context
+        func_value.pos_start = node.pos_start
+        func_value.pos_end = node.pos_end
+
+        if node.var_name:
+            context.symbol_table.symbols[node.var_name] = func_value
+
+        return RuntimeResult().success(func_value)
@@ -0,0 +1,485 @@
+import math
+
+from tython.parser import *
+from tython.types import *
+
+# What running a trace ended with
+(
+    # The loop is over
+    DONE,
+    # A break ended it
+    BREAK,
+    # An iteration could not be finished in the trace; the state is as it
+    # was when the iteration started, and the iteration must be run again
+    # the usual way
+    EXIT,
+    # A variable did not have the type the trace was recorded with; nothing
+    # has been run
+    GUARD,
+) = range(4)
+
+# The value classes a trace knows how to compute with
+TRACED_TYPES = {
+    value_type: VALUE_TYPES[value_type] for value_type in (Int, Float, Number, Boolean)
+}
+
+
+class Untraceable(Exception):
+    """
+    Raised while recording a loop that a trace cannot run
+    """
+
+
+def box(value_type, value, context, pos_start, pos_end):
+    """
+    A value of one of the TRACED_TYPES, set up without going through the
+    chain of constructors, which would be most of the time a trace takes
+    """
+    result = object.__new__(value_type)
+    result.pos_start = pos_start
+    result.pos_end = pos_end
+    result.context = context
+    result.value = value
+    result.type = TRACED_TYPES[value_type]
+    return result
+
+
+def box_list(elements, context, pos_start, pos_end):
+    result = List(elements)
+    result.context = context
+    result.pos_start = pos_start
+    result.pos_end = pos_end
+    return result
+
+
+############################################
+# TRACE
+############################################
+
+
+class Trace:
+    """
+    A hot loop compiled to a Python function specialized on the types its
+    variables had when it was recorded.
+
+    The function keeps the variables in Python locals, holding the plain
+    int or float inside each value, and works on them with Python's
+    operators; it only makes value objects for what the loop's result
+    collects and, when it returns, for the variables it assigned. It starts
+    by checking the variables still have the recorded types (else GUARD).
+    Anything that would make an iteration end in an error or differently
+    than the interpreter would, such as dividing by zero or comparing
+    complex numbers, raises ArithmeticError or TypeError; the trace then
+    puts the variables back the way they were at the start of the
+    iteration and returns EXIT.
+
+    A for loop's function is run(context, i, end, step, elements) and
+    returns its status, the loop counter and the number of iterations run;
+    a while loop's is run(context, elements) and returns the status and the
+    iterations. Both append the values the loop collects to elements.
+    """
+
+    def __init__(self, node, source, run):
+        self.node = node
+        self.source = source
+        self.run = run
+
+    @classmethod
+    def record(cls, node, context, step=None):
+        """
+        The trace of a for or while loop, specialized on the types of the
+        values its variables have in context (and on the direction of a for
+        loop's step), or None when it has anything but arithmetic,
+        comparisons, assignments, ifs, break and continue on Int, Float,
+        Number and Boolean values
+        """
+        try:
+            source = TraceRecorder(node, context.symbol_table, step).record()
+            code = compile(source, "<trace>", "exec")
+        # Too deeply nested for Python, if not for the interpreter
+        except (Untraceable, SyntaxError, RecursionError):
+            return None
+
+        namespace = {
+            "box": box,
+            "box_list": box_list,
+            "Int": Int,
+            "Float": Float,
+            "Number": Number,
+            "Boolean": Boolean,
+            "Null": Null,
+            "DONE": DONE,
+            "BREAK": BREAK,
+            "EXIT": EXIT,
+            "GUARD": GUARD,
+        }
+        exec(code, namespace)
+        return cls(node, source, namespace["trace"])
+
+
+############################################
+# TRACE RECORDER
+############################################
+
+
+class TraceRecorder:
+    """
+    Writes out the Python source of a loop's trace, going through one
+    iteration of the loop and noting the type every value would have,
+    starting from the types of the variables in symbol_table
+    """
+
+    def __init__(self, node, symbol_table, step=None):
+        self.node = node
+        self.symbol_table = symbol_table
+        self.up = step is None or step >= 0
+        self.lines = []
+        self.indent = 0
+        self.temp_count = 0
+        # name -> (local, value class), in the order they are met
+        self.variables = {}
+        self.assigned = set()
+        # The comparisons among the expressions compiled, as Python bools
+        self.comparisons = {}
+        self.loop_var = node.var_name if type(node) is ForNode else None
+
+    def record(self):
+        node = self.node
+        collect = not node.should_return_null
+        is_for = type(node) is ForNode
+
+        self.indent = 3
+        if is_for:
+            local, _ = self.variable(node.var_name)
+            self.assigned.add(node.var_name)
+            self.emit(f"{local} = i")
+            self.emit(f"w{local} = True")
+            self.emit("i += step")
+        else:
+            condition, _ = self.compile(node.condition_node, in_condition=True)
+            self.emit(f"if not {self.truth(condition)}:")
+            self.emit("    count -= 1")
+            self.emit("    break")
+
+        if collect:
+            value = self.box(node.body_node)
+            self.emit(f"elements.append({value})")
+        else:
+            self.compile_effect(node.body_node)
+        body = self.lines
+
+        # The start and end of the function, now that the variables are known
+        self.lines = []
+        self.indent = 0
+        if is_for:
+            self.emit("def trace(context, i, end, step, elements):")
+            guard_return = "GUARD, i, 0"
+        else:
+            self.emit("def trace(context, elements):")
+            guard_return = "GUARD, 0"
+        self.indent += 1
+        self.emit("symbol_table = context.symbol_table")
+        self.emit("symbols = symbol_table.symbols")
+        if is_for:
+            self.emit("if step < 0:" if self.up else "if step >= 0:")
+            self.emit(f"    return {guard_return}")
+
+        for name, (local, value_type) in self.variables.items():
+            if name != self.loop_var:
+                self.emit(f"value = symbol_table.get({name!r})")
+                self.emit(f"if type(value) is not {value_type.__name__}:")
+                self.emit(f"    return {guard_return}")
+                self.emit(f"{local} = value.value")
+            else:
+                self.emit(f"{local} = None")
+            if name in self.assigned:
+                self.emit(f"w{local} = False")
+
+        saved = [
+            local
+            for name, (local, _) in self.variables.items()
+            if name in self.assigned
+        ]
+        self.emit("count = 0")
+        self.emit("status = DONE")
+        if is_for:
+            self.emit("while i < end:" if self.up else "while i > end:")
+        else:
+            self.emit("while True:")
+        self.indent += 1
+        if is_for:
+            self.emit("counter = i")
+        for local in saved:
+            self.emit(f"s{local} = {local}")
+            self.emit(f"sw{local} = w{local}")
+        self.emit("count += 1")
+        self.emit("try:")
+        self.lines.extend(body)
+        self.emit("except (ArithmeticError, TypeError):")
+        self.indent += 1
+        if is_for:
+            self.emit("i = counter")
+        for local in saved:
+            self.emit(f"{local} = s{local}")
+            self.emit(f"w{local} = sw{local}")
+        self.emit("count -= 1")
+        self.emit("status = EXIT")
+        self.emit("break")
+        self.indent -= 2
+
+        for name, (local, value_type) in self.variables.items():
+            if name in self.assigned:
+                self.emit(f"if w{local}:")
+                self.emit(
+                    f"    symbols[{name!r}] = box({value_type.__name__}, {local}, context, None, None)"
+                )
+        self.emit("return status, i, count" if is_for else "return status, count")
+        return "\n".join(self.lines) + "\n"
+
+    ############################################
+
+    def emit(self, line):
+        self.lines.append("    " * self.indent + line)
+
+    def temp(self, expr):
+        self.temp_count += 1
+        temp = f"t{self.temp_count}"
+        self.emit(f"{temp} = {expr}")
+        return temp
+
+    def variable(self, name):
+        """
+        The local holding a variable's value and the variable's value class
+        """
+        variable = self.variables.get(name)
+        if variable is None:
+            if name == self.loop_var:
+                value_type = Int
+            else:
+                value_type = type(self.symbol_table.get(name))
+                if value_type not in TRACED_TYPES:
+                    raise Untraceable()
+            variable = (f"v{len(self.variables)}", value_type)
+            self.variables[name] = variable
+        return variable
+
+    def compile(self, node, in_condition=False):
+        """
+        Emits the statements evaluating node and returns a Python expression
+        for the plain value inside the node's value, and the value's class
+        """
+        method_name = f"compile_{type(node).__name__}"
+        method = getattr(self, method_name, None)
+        if method is None:
+            raise Untraceable()
+        return method(node, in_condition)
+
+    def compile_effect(self, node, in_condition=False):
+        """
+        Emits the statements evaluating node for what they do, not for its
+        value
+        """
+        node_type = type(node)
+        if node_type is ListNode:
+            for element_node in node.element_nodes:
+                self.compile_effect(element_node, in_condition)
+        elif node_type is IfNode:
+            self.compile_if(node, in_condition)
+        else:
+            expr, _ = self.compile(node, in_condition)
+            # It may still raise
+            if not expr.isidentifier():
+                self.emit(expr)
+
+    def box(self, node):
+        """
+        Emits the statements evaluating node and returns a local holding its
+        value as a value object
+        """
+        node_type = type(node)
+        if node_type is ListNode:
+            elements = [self.box(element_node) for element_node in node.element_nodes]
+            return self.temp(
+                f"box_list([{', '.join(elements)}], context, {node.pos_start!r}, {node.pos_end!r})"
+            )
+        if node_type is IfNode:
+            return self.compile_if(node, False, boxed=True)
+
+        expr, value_type = self.compile(node)
+        # An assignment gives the value assigned, a plus sign the value it
+        # has moved
+        while isinstance(node, VarAssignNode):
+            node = node.value_node
+        return self.temp(
+            f"box({value_type.__name__}, {expr}, context, {node.pos_start!r}, {node.pos_end!r})"
+        )
+
+    ############################################
+
+    def compile_IntNode(self, node, _):
+        return repr(node.value), Int
+
+    def compile_FloatNode(self, node, _):
+        value = node.value
+        if math.isfinite(value):
+            return repr(value), Float
+        return f"float({str(value)!r})", Float
+
+    def compile_NumberNode(self, node, _):
+        # A Number literal is left by the Optimizer folding Float arithmetic
+        value = node.value
+        if isinstance(value, int) or math.isfinite(value):
+            return repr(value), Number
+        return f"float({str(value)!r})", Number
+
+    def compile_VarAccessNode(self, node, _):
+        return self.variable(node.var_name)
+
+    def compile_VarAssignNode(self, node, in_condition):
+        expr, value_type = self.compile(node.value_node, in_condition)
+        local, var_type = self.variable(node.var_name)
+        if value_type is not var_type:
+            raise Untraceable()
+
+        declared = node.var_type
+        value_type_name = TRACED_TYPES[value_type]
+        if declared not in (Types.Any, value_type_name) and not (
+            declared == Types.Number and value_type_name in (Types.Int, Types.Float)
+        ):
+            raise Untraceable()
+
+        self.assigned.add(node.var_name)
+        self.emit(f"{local} = {expr}")
+        self.emit(f"w{local} = True")
+        return local, var_type
+
+    # A trace keeps the variables it reads in locals of its own
+    compile_LocalAccessNode = compile_VarAccessNode
+    compile_LocalAssignNode = compile_VarAssignNode
+
+    def compile_BinOpNode(self, node, in_condition):
+        left, left_type = self.compile(node.left_node, in_condition)
+        # The left operand's value is taken before the right one's is worked
+        # out, which may assign to a variable the left one reads
+        if self.assigns(node.right_node):
+            left = self.temp(left)
+        right, right_type = self.compile(node.right_node, in_condition)
+
+        op = node.op
+        if left_type is Int:
+            if right_type is not Int:
+                raise Untraceable()
+            result_type = Int if op in ARITHMETIC else Boolean
+        elif left_type in (Float, Number):
+            if right_type not in (Int, Float, Number):
+                raise Untraceable()
+            result_type = Number
+        else:
+            raise Untraceable()
+
+        if op in ARITHMETIC:
+            return f"({left} {PYTHON_OPERATORS[op]} {right})", result_type
+        if op in COMPARISONS:
+            comparison = f"({left} {PYTHON_OPERATORS[op]} {right})"
+            expr = f"int{comparison}"
+            if op is not Operator.AND and op is not Operator.OR:
+                self.comparisons[expr] = comparison
+            return expr, result_type
+        raise Untraceable()
+
+    # A trace is specialized on the operands' types already
+    compile_TrustedBinOpNode = compile_BinOpNode
+
+    def compile_UnaryOpNode(self, node, in_condition):
+        value, value_type = self.compile(node.node, in_condition)
+        if node.op is Operator.MINUS:
+            # Int only multiplies by Int, and -1 is a Number
+            if value_type not in (Float, Number):
+                raise Untraceable()
+            return f"({value} * -1)", Number
+        if node.op is Operator.NOT:
+            if value_type is Boolean:
+                raise Untraceable()
+            return f"(1 if {value} == 0 else 0)", (Int if value_type is Int else Number)
+        return value, value_type
+
+    def compile_BreakNode(self, _, in_condition):
+        # In a while loop's condition it belongs to the loop around
+        if in_condition:
+            raise Untraceable()
+        self.emit("status = BREAK")
+        self.emit("break")
+        return "0", Int
+
+    def compile_ContinueNode(self, _, in_condition):
+        if in_condition:
+            raise Untraceable()
+        self.emit("continue")
+        return "0", Int
+
+    def compile_if(self, node, in_condition, boxed=False):
+        """
+        Emits an if for what it does or, boxed, returns a local holding its
+        value
+        """
+        result = None
+        if boxed:
+            self.temp_count += 1
+            result = f"t{self.temp_count}"
+
+        indent = self.indent
+        for condition, expr, should_return_null in node.cases:
+            condition, _ = self.compile(condition, in_condition)
+            self.emit(f"if {self.truth(condition)}:")
+            self.indent += 1
+            self.compile_branch(expr, should_return_null, result, in_condition)
+            self.indent -= 1
+            self.emit("else:")
+            self.indent += 1
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.compile_branch(expr, should_return_null, result, in_condition)
+        elif boxed:
+            self.emit(f"{result} = Null()")
+        else:
+            self.lines.pop()
+        self.indent = indent
+        return result
+
+    def truth(self, expr):
+        """
+        A Python expression for whether the value of expr is true
+        """
+        return self.comparisons.get(expr) or f"{expr} != 0"
+
+    def compile_branch(self, node, should_return_null, result, in_condition):
+        lines = len(self.lines)
+        if result is None or should_return_null:
+            self.compile_effect(node, in_condition)
+            if result is not None:
+                self.emit(f"{result} = Null()")
+        else:
+            self.emit(f"{result} = {self.box(node)}")
+        if len(self.lines) == lines:
+            self.emit("pass")
+
+    @classmethod
+    def assigns(cls, node):
+        """
+        Whether evaluating node may assign to a variable
+        """
+        if isinstance(node, VarAssignNode):
+            return True
+        for field in node.fields:
+            value = getattr(node, field)
+            values = value if isinstance(value, (list, tuple)) else (value,)
+            for value in values:
+                if isinstance(value, tuple):
+                    if any(
+                        isinstance(item, Node) and cls.assigns(item) for item in value
+                    ):
+                        return True
+                elif isinstance(value, Node) and cls.assigns(value):
+                    return True
+        return False
@@ -0,0 +1,514 @@
+import math
+import re
+
+from tython.parser import *
+from tython.types import Types
+
+
+############################################
+# TRANSPILER
+############################################
+
+
+class Transpiler:
+    """
+    Translates an AST into the source of a Python module that runs the
+    program when imported and run() is called, or when run as a script.
+
+    The module still uses tython's values (see tython.runtime.support), so
+    operators, type checks and runtime errors behave as under Interpreter;
+    what goes away is walking the tree and checking a RuntimeResult after
+    every node. Every node becomes a few Python statements leaving its value
+    in a local, and every function body a Python function. Errors travel as
+    ErrorSignal; break and continue are Python's own inside a loop of the
+    same function and BreakSignal/ContinueSignal otherwise, so they still
+    escape a function into the caller's loop.
+
+    SOURCE_MAP in the module gives the line of the script every line of the
+    module was generated from, so a Python traceback through it can be
+    shown in terms of the script.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.line = -1
+        self.functions = []
+        self.function_count = 0
+        self.new_function()
+
+    @classmethod
+    def transpile(cls, node, source):
+        """
+        The Python source of a module running node, parsed from source
+        """
+        transpiler = cls(source)
+        transpiler.emit("def program(context):")
+        transpiler.indent += 1
+        transpiler.emit("symbols = context.symbol_table.symbols")
+        transpiler.emit(f"return {transpiler.compile(node)}")
+        program = transpiler.finish_function()
+
+        text = bytes(source.text) if source.is_bytes else source.text
+        module = Chunk()
+        module.add(f"# Generated by `tython build` from {source.fn}")
+        module.add("import sys")
+        module.add("")
+        module.add("from tython.runtime.support import *")
+        module.add("")
+        module.add(f"SOURCE = SourceFile({source.fn!r}, {text!r})")
+        # Filled in once all the lines are there
+        map_idx = len(module.lines)
+        module.add("SOURCE_MAP = ()")
+        for function in transpiler.functions:
+            module.add("")
+            module.add("")
+            module.extend(function)
+        module.add("")
+        module.add("")
+        module.extend(program)
+        module.add("")
+        module.add("")
+        module.add("def run():")
+        module.add("    return run_program(program, SOURCE)")
+        module.add("")
+        module.add("")
+        module.add('if __name__ == "__main__":')
+        module.add("    sys.exit(main(run, SOURCE, SOURCE_MAP, __file__))")
+
+        module.lines[map_idx] = f"SOURCE_MAP = {tuple(module.line_map)!r}"
+        return "\n".join(module.lines) + "\n"
+
+    ############################################
+
+    def new_function(self):
+        self.chunk = Chunk()
+        self.indent = 0
+        self.temp_count = 0
+        self.in_function = False
+        # Inside a loop of the function being generated, where break and
+        # continue are Python statements
+        self.in_loop = False
+
+    def finish_function(self):
+        chunk = self.chunk
+        self.new_function()
+        return chunk
+
+    def emit(self, line):
+        self.chunk.add("    " * self.indent + line, self.line)
+
+    def temp(self):
+        self.temp_count += 1
+        return f"_t{self.temp_count}"
+
+    def materialize(self, expr):
+        """
+        A local holding the value of expr
+        """
+        if expr.isidentifier():
+            return expr
+        temp = self.temp()
+        self.emit(f"{temp} = {expr}")
+        return temp
+
+    def compile(self, node):
+        """
+        Emits the statements evaluating node and returns an expression
+        giving its value: a local, or a constant
+        """
+        line = self.line
+        if node.pos_start is not None:
+            self.line = self.source.line(node.pos_start)
+
+        method_name = f"compile_{type(node).__name__}"
+        method = getattr(self, method_name, self.no_compile_method)
+        expr = method(node)
+
+        self.line = line
+        return expr
+
+    def compile_effect(self, node):
+        """
+        Emits the statements evaluating node for what they do, not for its
+        value
+        """
+        if type(node) is ListNode:
+            for element_node in node.element_nodes:
+                self.compile_effect(element_node)
+        else:
+            self.compile(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f"No compile_{type(node).__name__} method defined")
+
+    ############################################
+
+    def compile_constant(self, node, type_name):
+        value = node.value
+        if isinstance(value, float) and not math.isfinite(value):
+            literal = f"float({str(value)!r})"
+        else:
+            literal = repr(value)
+        return f"const({type_name}, {literal}, context, {node.pos_start!r}, {node.pos_end!r})"
+
+    def compile_AnyNode(self, node):
+        return self.compile_constant(node, "Any")
+
+    def compile_NumberNode(self, node):
+        return self.compile_constant(node, "Number")
+
+    def compile_IntNode(self, node):
+        return self.compile_constant(node, "Int")
+
+    def compile_FloatNode(self, node):
+        return self.compile_constant(node, "Float")
+
+    def compile_StringNode(self, node):
+        return self.compile_constant(node, "String")
+
+    def compile_ListNode(self, node):
+        elements = self.temp()
+        self.emit(f"{elements} = []")
+        for element_node in node.element_nodes:
+            self.emit(f"{elements}.append({self.compile(element_node)})")
+        self.emit(
+            f"{elements} = make_list({elements}, context, {node.pos_start!r}, {node.pos_end!r})"
+        )
+        return elements
+
+    def compile_BinOpNode(self, node):
+        left = self.compile(node.left_node)
+        right = self.compile(node.right_node)
+        return self.emit_operation(node, f"{left}.{node.method}({right})")
+
+    # A built module calls the values' methods for trusted operations too
+    compile_TrustedBinOpNode = compile_BinOpNode
+
+    def compile_UnaryOpNode(self, node):
+        value = self.compile(node.node)
+
+        if node.op is Operator.MINUS:
+            return self.emit_operation(node, f"{value}.multiply(Number(-1))")
+        if node.op is Operator.NOT:
+            return self.emit_operation(node, f"{value}.not_()")
+
+        value = self.materialize(value)
+        self.emit(f"{value}.set_pos({node.pos_start!r}, {node.pos_end!r})")
+        return value
+
+    def emit_operation(self, node, call):
+        """
+        Emits a call giving a value and an error, raising the error
+        """
+        result = self.temp()
+        self.emit(f"{result} = operation({call}, {node.pos_start!r}, {node.pos_end!r})")
+        return result
+
+    def compile_VarAccessNode(self, node):
+        value = self.temp()
+        self.emit(
+            f"{value} = load(context, {node.var_name!r}, {node.pos_start!r}, {node.pos_end!r})"
+        )
+        return value
+
+    def compile_VarAssignNode(self, node):
+        value = self.materialize(self.compile(node.value_node))
+        var_name = node.var_name
+        var_type = node.var_type
+
+        if var_type != Types.Any:
+            allowed = (var_type,)
+            if var_type == Types.Number:
+                allowed += (Types.Int, Types.Float)
+            allowed = ", ".join(f"Types.{value_type.name}" for value_type in allowed)
+            self.emit(f"if {value}.type not in ({allowed},):")
+            self.emit(
+                f"    raise type_error(context, {var_name!r}, {value}, Types.{var_type.name}, {node.pos_start!r})"
+            )
+
+        self.emit(f"symbols[{var_name!r}] = {value}")
+        return value
+
+    # A built module's functions keep their variables by name
+    compile_LocalAccessNode = compile_VarAccessNode
+    compile_LocalAssignNode = compile_VarAssignNode
+
+    def compile_branch(self, node, should_return_null, result):
+        self.indent += 1
+        if should_return_null:
+            self.compile_effect(node)
+            self.emit(f"{result} = Null()")
+        else:
+            self.emit(f"{result} = {self.compile(node)}")
+        self.indent -= 1
+
+    def compile_IfNode(self, node):
+        # The cases follow each other instead of nesting as elifs would, so
+        # that any number of them can be written out
+        result = self.temp()
+        self.emit(f"{result} = None")
+        for idx, (condition, expr, should_return_null) in enumerate(node.cases):
+            if idx:
+                self.emit(f"if {result} is None:")
+                self.indent += 1
+
+            self.emit(f"if {self.compile(condition)}.is_true():")
+            self.compile_branch(expr, should_return_null, result)
+
+            if idx:
+                self.indent -= 1
+
+        self.emit(f"if {result} is None:")
+        if node.else_case:
+            self.compile_branch(*node.else_case, result)
+        else:
+            self.emit(f"    {result} = Null()")
+        return result
+
+    def compile_loop_body(self, node, elements):
+        """
+        Emits the body of a loop, appending its value to elements unless
+        that is None. Signals only need catching when something in the body
+        can raise one.
+        """
+        in_loop = self.in_loop
+        self.in_loop = True
+
+        catch = self.can_signal(node.body_node)
+        if catch:
+            self.emit("try:")
+            self.indent += 1
+
+        if elements:
+            value = self.compile(node.body_node)
+        else:
+            self.compile_effect(node.body_node)
+
+        if catch:
+            self.indent -= 1
+            self.emit("except ContinueSignal:")
+            self.emit("    continue")
+            self.emit("except BreakSignal:")
+            self.emit("    break")
+
+        if elements:
+            self.emit(f"{elements}.append({value})")
+
+        self.in_loop = in_loop
+
+    def loop_result(self, node, elements):
+        if not elements:
+            return "Null()"
+        self.emit(
+            f"{elements} = make_list({elements}, context, {node.pos_start!r}, {node.pos_end!r})"
+        )
+        return elements
+
+    def compile_ForNode(self, node):
+        start = self.compile(node.start_value_node)
+        end = self.compile(node.end_value_node)
+        step_node = node.step_value_node
+        if step_node:
+            step = self.compile(step_node)
+
+        elements = None
+        if not node.should_return_null:
+            elements = self.temp()
+            self.emit(f"{elements} = []")
+
+        # The end is a value whose .value does not change, and the direction
+        # is decided by the first step
+        i = self.temp()
+        self.emit(f"{i} = {start}.value")
+        end_value = self.temp()
+        self.emit(f"{end_value} = {end}.value")
+        if step_node:
+            step_value = self.temp()
+            self.emit(f"{step_value} = {step}.value")
+            if type(step_node) in (IntNode, FloatNode):
+                up = step_node.value >= 0
+            else:
+                up = self.temp()
+                self.emit(f"{up} = {step_value} >= 0")
+        else:
+            step_value = "1"
+            up = True
+
+        if up is True:
+            self.emit(f"while {i} < {end_value}:")
+        elif up is False:
+            self.emit(f"while {i} > {end_value}:")
+        else:
+            self.emit(f"while {i} < {end_value} if {up} else {i} > {end_value}:")
+        self.indent += 1
+        self.emit(f"symbols[{node.var_name!r}] = Int({i})")
+        self.emit(f"{i} += {step_value}")
+        self.compile_loop_body(node, elements)
+        self.indent -= 1
+
+        return self.loop_result(node, elements)
+
+    def compile_WhileNode(self, node):
+        elements = None
+        if not node.should_return_null:
+            elements = self.temp()
+            self.emit(f"{elements} = []")
+
+        self.emit("while True:")
+        self.indent += 1
+        # break and continue in the condition belong to the loop around
+        # this one, which a Python break here would not reach
+        in_loop = self.in_loop
+        self.in_loop = False
+        condition = self.compile(node.condition_node)
+        self.in_loop = in_loop
+        self.emit(f"if not {condition}.is_true():")
+        self.emit("    break")
+        self.compile_loop_body(node, elements)
+        self.indent -= 1
+
+        return self.loop_result(node, elements)
+
+    def compile_FuncDefNode(self, node):
+        func_name = node.var_name
+        self.function_count += 1
+        name = re.sub(r"\W", "_", func_name or "anonymous")
+        name = f"_f{self.function_count}_{name}"
+
+        chunk, indent, temp_count = self.chunk, self.indent, self.temp_count
+        in_function, in_loop = self.in_function, self.in_loop
+        self.new_function()
+        self.in_function = True
+
+        self.emit(f"def {name}(context):")
+        self.indent += 1
+        self.emit("symbols = context.symbol_table.symbols")
+        if node.should_auto_return:
+            self.emit(f"return {self.compile(node.body_node)}")
+        else:
+            self.compile_effect(node.body_node)
+            self.emit("return Null()")
+        self.functions.append(self.finish_function())
+
+        self.chunk, self.indent, self.temp_count = chunk, indent, temp_count
+        self.in_function, self.in_loop = in_function, in_loop
+
+        func_value = self.temp()
+        self.emit(
+            f"{func_value} = make_function(context, {func_name!r}, {node.arg_names!r}, "
+            f"{name}, {node.should_auto_return!r}, {node.pos_start!r}, {node.pos_end!r})"
+        )
+        return func_value
+
+    def compile_CallNode(self, node):
+        value_to_call = self.compile(node.node_to_call)
+        args = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        # A variable's value comes out as a fresh copy already
+        fresh = isinstance(node.node_to_call, VarAccessNode)
+
+        return_value = self.temp()
+        self.emit(
+            f"{return_value} = call(context, {value_to_call}, [{', '.join(args)}], "
+            f"{fresh!r}, {node.pos_start!r}, {node.pos_end!r})"
+        )
+        return return_value
+
+    def compile_InlinedCallNode(self, node):
+        # A built module's functions are Python functions, called as such
+        return self.compile(node.call_node)
+
+    def compile_ReturnNode(self, node):
+        if node.node_to_return:
+            value = self.compile(node.node_to_return)
+        else:
+            value = "Null()"
+
+        if self.in_function:
+            self.emit(f"return {value}")
+        else:
+            self.emit(f"raise ReturnSignal({value})")
+        return "Null()"
+
+    def compile_ContinueNode(self, _):
+        self.emit("continue" if self.in_loop else "raise ContinueSignal()")
+        return "Null()"
+
+    def compile_BreakNode(self, _):
+        self.emit("break" if self.in_loop else "raise BreakSignal()")
+        return "Null()"
+
+    ############################################
+
+    @classmethod
+    def can_signal(cls, node, in_condition=False):
+        """
+        Whether running node can raise BreakSignal or ContinueSignal: through
+        a call, or from a break or continue in a while loop's condition
+        """
+        node_type = type(node)
+        if node_type is CallNode:
+            return True
+        if node_type in (BreakNode, ContinueNode):
+            return in_condition
+        if node_type is FuncDefNode:
+            return False
+        if node_type is WhileNode:
+            return cls.can_signal(node.condition_node, True) or cls.can_signal(
+                node.body_node, in_condition
+            )
+
+        for field in node.fields:
+            for child in children(getattr(node, field)):
+                if cls.can_signal(child, in_condition):
+                    return True
+        return False
+
+
+def children(value):
+    """
+    The nodes in a node's field
+    """
+    if isinstance(value, Node):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from children(item)
+
+
+class Chunk:
+    """
+    Lines of generated source with the script line each came from
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.line_map = []
+
+    def add(self, line, source_line=-1):
+        self.lines.append(line)
+        self.line_map.append(source_line)
+
+    def extend(self, chunk):
+        self.lines.extend(chunk.lines)
+        self.line_map.extend(chunk.line_map)
+
+
+############################################
+# BUILD
+############################################
+
+
+def build(source, node, out_fn):
+    """
+    Writes the module transpiled from node, parsed from source, to out_fn.
+    Returns an error message when Python cannot compile it.
+    """
+    python = Transpiler.transpile(node, source)
+    try:
+        compile(python, out_fn, "exec")
+    except (SyntaxError, RecursionError, MemoryError) as e:
+        return f"{source.fn}: cannot be built as a Python module: {e}"
+
+    with open(out_fn, "w", encoding="utf-8") as f:
+        f.write(python)
+    return None
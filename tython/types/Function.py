@@ -2,6 +2,7 @@ from tython.types import *
 from tython.runtime.result import RuntimeResult
 from tython.context import Context, SymbolTable
 from tython.errors import RuntimeError
+from tython.lex.source import SourceFile
 import tython.main as main
 import os
 
@@ -10,11 +11,17 @@ class BaseFunction(Value):
     def __init__(self, name):
         super().__init__()
         self.name = name or "<anonymous>"
+        self.source = None
 
-    def generate_new_context(self):
-        new_context = Context(self.name, self.context, self.pos_start)
+    def generate_new_context(self, layout=None):
+        new_context = Context(
+            self.name,
+            self.context,
+            self.pos_start,
+            self.source or self.context.source,
+        )
         new_context.symbol_table = SymbolTable(  # type:ignore
-            new_context.parent.symbol_table
+            new_context.parent.symbol_table, layout
         )
         return new_context
 
@@ -60,13 +67,28 @@ class BaseFunction(Value):
 
 
 class Function(BaseFunction):
-    def __init__(self, name, body_node, arg_names, interpreter, should_auto_return):
+    def __init__(
+        self,
+        name,
+        body_node,
+        arg_names,
+        interpreter,
+        should_auto_return,
+        source=None,
+        layout=None,
+    ):
+        """
+        layout is the resolved layout of the body's variables (see
+        resolve()), which then run in a frame
+        """
         super().__init__(name)
         self.body_node = body_node
         self.arg_names = arg_names
         self.type = Types.Function
         self.interpreter = interpreter
         self.should_auto_return = should_auto_return
+        self.source = source
+        self.layout = layout
 
     def __repr__(self) -> str:
         return f"\033[36mFunction\033[0m {self.name}"
@@ -78,6 +100,8 @@ class Function(BaseFunction):
             self.arg_names,
             self.interpreter,
             self.should_auto_return,
+            self.source,
+            self.layout,
         )
         copy.set_context(self.context)
         copy.set_pos(self.pos_start, self.pos_end)
@@ -86,7 +110,7 @@ class Function(BaseFunction):
     def execute(self, args):
         res = RuntimeResult()
         interpreter = self.interpreter()
-        exec_ctx = self.generate_new_context()
+        exec_ctx = self.generate_new_context(self.layout)
 
         res.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
         if res.should_return():
@@ -151,8 +175,7 @@ class SystemFunction(BaseFunction):
         fn = fn.value
 
         try:
-            with open(fn, "r") as f:
-                script = f.read()
+            source = SourceFile.open(fn)
         except Exception as e:
             return RuntimeResult().failure(
                 RuntimeError(
@@ -163,7 +186,7 @@ class SystemFunction(BaseFunction):
                 )
             )
 
-        _, error = main.run(fn, script)
+        _, error = main.run_source(source)
 
         if error:
             return RuntimeResult().failure(
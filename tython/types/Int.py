@@ -1,7 +1,7 @@
 from tython.types.base import Types
 from tython.types.Number import Number
 from tython.types.Boolean import Boolean
-from tython.errors import TypeError
+from tython.errors import RuntimeError, TypeError
 
 
 class Int(Number):
@@ -23,7 +23,10 @@ class Int(Number):
             return Int(self.value + other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                self.pos_start, other.pos_end, "Cannot add non Int to Int"
+                self.pos_start,
+                other.pos_end,
+                "Cannot add non Int to Int",
+                self.context,
             )
 
     def subtract(self, other):
@@ -31,7 +34,10 @@ class Int(Number):
             return Int(self.value - other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                self.pos_start, other.pos_end, "Cannot subtract non <Int> from <Int>"
+                self.pos_start,
+                other.pos_end,
+                "Cannot subtract non <Int> from <Int>",
+                self.context,
             )
 
     def multiply(self, other):
@@ -39,7 +45,10 @@ class Int(Number):
             return Int(self.value * other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                self.pos_start, other.pos_end, "Cannot multiply <Int> by non <Int>"
+                self.pos_start,
+                other.pos_end,
+                "Cannot multiply <Int> by non <Int>",
+                self.context,
             )
 
     def divide(self, other):
@@ -54,7 +63,10 @@ class Int(Number):
             return Int(self.value / other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                self.pos_start, other.pos_end, "Cannot divide <Int> by non <Int>"
+                self.pos_start,
+                other.pos_end,
+                "Cannot divide <Int> by non <Int>",
+                self.context,
             )
 
     def power(self, other):
@@ -62,7 +74,10 @@ class Int(Number):
             return Int(self.value ** other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                self.pos_start, other.pos_end, "Cannot raise Int to non Int"
+                self.pos_start,
+                other.pos_end,
+                "Cannot raise Int to non Int",
+                self.context,
             )
 
     def compare_eq(self, other):
@@ -71,6 +86,7 @@ class Int(Number):
                 Boolean(int(self.value == other.value)).set_context(self.context),
                 None,
             )
+        return super().compare_eq(other)
 
     def compare_ne(self, other):
         if isinstance(other, Int):
@@ -78,6 +94,7 @@ class Int(Number):
                 Boolean(int(self.value != other.value)).set_context(self.context),
                 None,
             )
+        return super().compare_ne(other)
 
     def compare_lt(self, other):
         if isinstance(other, Int):
@@ -85,6 +102,7 @@ class Int(Number):
                 Boolean(int(self.value < other.value)).set_context(self.context),
                 None,
             )
+        return super().compare_lt(other)
 
     def compare_gt(self, other):
         if isinstance(other, Int):
@@ -92,6 +110,7 @@ class Int(Number):
                 Boolean(int(self.value > other.value)).set_context(self.context),
                 None,
             )
+        return super().compare_gt(other)
 
     def compare_lte(self, other):
         if isinstance(other, Int):
@@ -99,6 +118,7 @@ class Int(Number):
                 Boolean(int(self.value <= other.value)).set_context(self.context),
                 None,
             )
+        return super().compare_lte(other)
 
     def compare_gte(self, other):
         if isinstance(other, Int):
@@ -106,6 +126,7 @@ class Int(Number):
                 Boolean(int(self.value >= other.value)).set_context(self.context),
                 None,
             )
+        return super().compare_gte(other)
 
     def and_(self, other):
         if isinstance(other, Int):
@@ -113,6 +134,7 @@ class Int(Number):
                 Boolean(int(self.value and other.value)).set_context(self.context),
                 None,
             )
+        return super().and_(other)
 
     def or_(self, other):
         if isinstance(other, Int):
@@ -120,6 +142,7 @@ class Int(Number):
                 Boolean(int(self.value or other.value)).set_context(self.context),
                 None,
             )
+        return super().or_(other)
 
     def not_(self):
         return Int(1 if self.value == 0 else 0).set_context(self.context), None
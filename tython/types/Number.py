@@ -1,5 +1,5 @@
 from tython.types.base import Value, Types
-from tython.errors import RuntimeError
+from tython.errors import RuntimeError, TypeError
 
 
 class Number(Value):
@@ -26,7 +26,10 @@ class Number(Value):
             return Number(self.value + other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                other.pos_start, other.pos_end, "Cannot add non Number to Number"
+                other.pos_start,
+                other.pos_end,
+                "Cannot add non Number to Number",
+                self.context,
             )
 
     def subtract(self, other):
@@ -34,7 +37,10 @@ class Number(Value):
             return Number(self.value - other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                other.pos_start, other.pos_end, "Cannot subtract non Number from Number"
+                other.pos_start,
+                other.pos_end,
+                "Cannot subtract non Number from Number",
+                self.context,
             )
 
     def multiply(self, other):
@@ -42,7 +48,10 @@ class Number(Value):
             return Number(self.value * other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                other.pos_start, other.pos_end, "Cannot multiply non Number and Number"
+                other.pos_start,
+                other.pos_end,
+                "Cannot multiply non Number and Number",
+                self.context,
             )
 
     def divide(self, other):
@@ -57,7 +66,10 @@ class Number(Value):
             return Number(self.value / other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                other.pos_start, other.pos_end, "Cannot divide Number by non Number"
+                other.pos_start,
+                other.pos_end,
+                "Cannot divide Number by non Number",
+                self.context,
             )
 
     def power(self, other):
@@ -65,7 +77,10 @@ class Number(Value):
             return Number(self.value ** other.value).set_context(self.context), None
         else:
             return None, TypeError(
-                other.pos_start, other.pos_end, "Cannot raise Number to non Number"
+                other.pos_start,
+                other.pos_end,
+                "Cannot raise Number to non Number",
+                self.context,
             )
 
     def compare_eq(self, other):
@@ -74,6 +89,7 @@ class Number(Value):
                 Number(int(self.value == other.value)).set_context(self.context),
                 None,
             )
+        return None, self.illegal_operation(other)
 
     def compare_ne(self, other):
         if isinstance(other, Number):
@@ -81,14 +97,17 @@ class Number(Value):
                 Number(int(self.value != other.value)).set_context(self.context),
                 None,
             )
+        return None, self.illegal_operation(other)
 
     def compare_lt(self, other):
         if isinstance(other, Number):
             return Number(int(self.value < other.value)).set_context(self.context), None
+        return None, self.illegal_operation(other)
 
     def compare_gt(self, other):
         if isinstance(other, Number):
             return Number(int(self.value > other.value)).set_context(self.context), None
+        return None, self.illegal_operation(other)
 
     def compare_lte(self, other):
         if isinstance(other, Number):
@@ -96,6 +115,7 @@ class Number(Value):
                 Number(int(self.value <= other.value)).set_context(self.context),
                 None,
             )
+        return None, self.illegal_operation(other)
 
     def compare_gte(self, other):
         if isinstance(other, Number):
@@ -103,6 +123,7 @@ class Number(Value):
                 Number(int(self.value >= other.value)).set_context(self.context),
                 None,
             )
+        return None, self.illegal_operation(other)
 
     def and_(self, other):
         if isinstance(other, Number):
@@ -110,6 +131,7 @@ class Number(Value):
                 Number(int(self.value and other.value)).set_context(self.context),
                 None,
             )
+        return None, self.illegal_operation(other)
 
     def or_(self, other):
         if isinstance(other, Number):
@@ -117,6 +139,7 @@ class Number(Value):
                 Number(int(self.value or other.value)).set_context(self.context),
                 None,
             )
+        return None, self.illegal_operation(other)
 
     def not_(self):
         return Number(1 if self.value == 0 else 0).set_context(self.context), None
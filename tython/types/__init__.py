@@ -9,3 +9,15 @@ from .Float import Float
 from .String import String
 from .List import List
 from .Function import Function, SystemFunction
+
+# The Types of the values of each class whose values all have one
+VALUE_TYPES = {
+    Int: Types.Int,
+    Float: Types.Float,
+    Number: Types.Number,
+    String: Types.String,
+    Boolean: Types.Boolean,
+    Null: Types.Null,
+    List: Types.List,
+    Any: Types.Any,
+}
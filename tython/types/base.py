@@ -72,6 +72,12 @@ class Value:
     def not_(self):
         return None, self.illegal_operation()
 
+    def negate(self):
+        """
+        What a minus sign gives: the value multiplied by the Number -1
+        """
+        return self.multiply(Number(-1))
+
     def execute(self):
         return None, self.illegal_operation()
 
@@ -87,3 +93,7 @@ class Value:
         return RuntimeError(
             self.pos_start, other.pos_end, "Illegal operation", self.context
         )
+
+
+# Number is a Value itself
+from tython.types.Number import Number
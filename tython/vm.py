@@ -0,0 +1,398 @@
+from tython.bytecode import *
+from tython.bytecode import BytecodeCompiler
+from tython.types import *
+from tython.context import Context, SymbolTable
+from tython.runtime.result import RuntimeResult
+from tython.errors import RuntimeError, TypeError
+
+CONSTANT_TYPES = {INT: Int, FLOAT: Float, NUMBER: Number, ANY: Any, STRING: String}
+
+# What a call is taken to cost in memory: its context, symbol table, value
+# stack and frame, with a couple of arguments
+FRAME_SIZE = 1024
+
+# The memory the calls being run may take, in bytes, unless told otherwise
+MEMORY_LIMIT = 256 * 1024 * 1024
+
+NO_NAMES = frozenset()
+
+
+############################################
+# VM FUNCTION
+############################################
+
+
+class VMFunction(Function):
+    """
+    A function whose body has been compiled to bytecode
+    """
+
+    def __init__(self, info, source):
+        super().__init__(
+            info.name,
+            None,
+            info.arg_names,
+            VirtualMachine,
+            info.should_auto_return,
+            source,
+        )
+        self.info = info
+
+    def copy(self):
+        # Every variable read copies the function: skip the constructors,
+        # the copy has nothing but the same attributes
+        copy = object.__new__(VMFunction)
+        copy.__dict__.update(self.__dict__)
+        return copy
+
+    def enter(self, args):
+        """
+        The context to run the body in with args, or the error from passing
+        the wrong number of them
+        """
+        arg_names = self.arg_names
+        if len(args) != len(arg_names):
+            return None, self.check_args(arg_names, args).error
+
+        exec_ctx = self.generate_new_context()
+        symbols = exec_ctx.symbol_table.symbols
+        for arg_name, arg_value in zip(arg_names, args):
+            arg_value.context = exec_ctx
+            symbols[arg_name] = arg_value
+        return exec_ctx, None
+
+    def execute(self, args):
+        exec_ctx, error = self.enter(args)
+        if error:
+            return RuntimeResult().failure(error)
+        return VirtualMachine().run(self.info.code, exec_ctx, function=True)
+
+
+############################################
+# VIRTUAL MACHINE
+############################################
+
+
+class VirtualMachine:
+    """
+    Runs Code on a value stack per frame. Calls between VMFunctions push a
+    frame instead of recursing in Python; errors, return, break and continue
+    unwind frames the way the RuntimeResult flags unwind Interpreter.visit()
+    calls, break and continue stopping at the innermost loop (see
+    Code.loops) around the instruction they come from.
+
+    Recursion is only limited by memory_limit: each call counts as
+    FRAME_SIZE bytes, and the call that would take more than the limit is
+    a RuntimeError.
+
+    visit() compiles and runs a node, giving the same RuntimeResult as
+    Interpreter.visit().
+    """
+
+    def __init__(self, memory_limit=None):
+        self.memory_limit = memory_limit or MEMORY_LIMIT
+
+    def visit(self, node, context):
+        return self.run(BytecodeCompiler.compile_program(node), context)
+
+    def run(self, code, context, function=False):
+        """
+        Runs code in context. A function's code gives its return value as
+        the RuntimeResult's value.
+        """
+        res = RuntimeResult()
+        frames = []
+        stack = []
+        pc = 0
+        ops = code.ops
+        args = code.args
+        consts = code.consts
+        starts = code.starts
+        ends = code.ends
+        max_frames = self.memory_limit // FRAME_SIZE
+        # Names are looked up through the symbol tables of the calls that
+        # led here, which are as many as the calls. While each call's table
+        # is the child of its caller's, those tables cannot change until
+        # the call returns: names holds every name they have, and a name
+        # they do not have is looked up straight from root, the table of
+        # the first call that was not made that way.
+        names = NO_NAMES
+        root = context.symbol_table
+
+        while True:
+            op = ops[pc]
+            arg = args[pc]
+            pc += 1
+
+            if op == LOAD:
+                var_name = consts[arg]
+                symbol_table = context.symbol_table
+                value = symbol_table.symbols.get(var_name)
+                if value is None:
+                    if var_name in names:
+                        value = symbol_table.get(var_name)
+                    else:
+                        value = root.get(var_name)
+                    if value is None:
+                        return res.failure(
+                            RuntimeError(
+                                starts[pc - 1],
+                                ends[pc - 1],
+                                f"{var_name} is not defined",
+                                context,
+                            )
+                        )
+                value = value.copy()
+                value.pos_start = starts[pc - 1]
+                value.pos_end = ends[pc - 1]
+                value.context = context
+                stack.append(value)
+
+            elif op <= STRING:
+                value = CONSTANT_TYPES[op](consts[arg])
+                value.context = context
+                value.pos_start = starts[pc - 1]
+                value.pos_end = ends[pc - 1]
+                stack.append(value)
+
+            elif op == BINARY:
+                right = stack.pop()
+                left = stack[-1]
+                result, error = getattr(left, BINARY_METHODS[arg])(right)
+                if error:
+                    return res.failure(error)
+                result.pos_start = starts[pc - 1]
+                result.pos_end = ends[pc - 1]
+                stack[-1] = result
+
+            elif op == JUMP_IF_FALSE:
+                if not stack.pop().is_true():
+                    pc = arg
+
+            elif op == JUMP:
+                pc = arg
+
+            elif op == POP:
+                stack.pop()
+
+            elif op == STORE:
+                context.symbol_table.symbols[consts[arg]] = stack[-1]
+
+            elif op == STORE_TYPED:
+                var_name, var_type = consts[arg]
+                value = stack[-1]
+                value_type = value.type
+                if value_type != var_type and not (
+                    var_type == Types.Number and value_type in (Types.Int, Types.Float)
+                ):
+                    return res.failure(
+                        TypeError(
+                            starts[pc - 1],
+                            ends[pc - 1],
+                            f"Cannot assign '{var_name}' <{var_type.name}> to variable of type <{value_type.name}>",
+                            context,
+                        )
+                    )
+                context.symbol_table.symbols[var_name] = value
+
+            elif op == FOR_ITER:
+                # The loop's counter, end value, step, direction and variable
+                state = stack[-1]
+                i = state[0]
+                if i < state[1].value if state[3] else i > state[1].value:
+                    context.symbol_table.symbols[state[4]] = Int(i)
+                    state[0] = i + state[2]
+                else:
+                    pc = arg
+
+            elif op == LIST_APPEND:
+                value = stack.pop()
+                stack[-arg].append(value)
+
+            elif op == CALL:
+                argc = arg >> 1
+                call_args = stack[len(stack) - argc :]
+                del stack[len(stack) - argc :]
+                value_to_call = stack.pop()
+
+                if type(value_to_call) is VMFunction and len(call_args) == len(
+                    value_to_call.arg_names
+                ):
+                    # What enter() does, without copying the function to
+                    # give it the call's position
+                    if len(frames) >= max_frames:
+                        return res.failure(
+                            RuntimeError(
+                                starts[pc - 1],
+                                ends[pc - 1],
+                                f"Maximum recursion depth exceeded: more than "
+                                f"{max_frames} nested calls do not fit in the "
+                                f"memory limit of {self.memory_limit} bytes",
+                                context,
+                            )
+                        )
+
+                    parent = value_to_call.context
+                    exec_ctx = Context(
+                        value_to_call.name,
+                        parent,
+                        starts[pc - 1],
+                        value_to_call.source or parent.source,
+                    )
+                    symbol_table = SymbolTable(parent.symbol_table)
+                    exec_ctx.symbol_table = symbol_table
+                    symbols = symbol_table.symbols
+                    for arg_name, arg_value in zip(value_to_call.arg_names, call_args):
+                        arg_value.context = exec_ctx
+                        symbols[arg_name] = arg_value
+
+                    frames.append((code, pc, stack, context, names, root))
+                    if parent is not context:
+                        names = NO_NAMES
+                        root = parent.symbol_table
+                    elif context.symbol_table is not root:
+                        names = names.union(context.symbol_table.symbols)
+
+                    code = value_to_call.info.code
+                    ops = code.ops
+                    args = code.args
+                    consts = code.consts
+                    starts = code.starts
+                    ends = code.ends
+                    context = exec_ctx
+                    stack = []
+                    pc = 0
+                    continue
+
+                if not arg & 1:
+                    value_to_call = value_to_call.copy()
+                value_to_call.pos_start = starts[pc - 1]
+                value_to_call.pos_end = ends[pc - 1]
+
+                call_res = value_to_call.execute(call_args)
+                if call_res.error:
+                    return res.failure(call_res.error)
+                if call_res.loop_should_continue or call_res.loop_should_break:
+                    op = BREAK if call_res.loop_should_break else CONTINUE
+                else:
+                    return_value = call_res.value.copy()
+                    return_value.pos_start = starts[pc - 1]
+                    return_value.pos_end = ends[pc - 1]
+                    return_value.context = context
+                    stack.append(return_value)
+                    continue
+
+            elif op == RETURN or op == END:
+                value = stack.pop()
+                if not frames:
+                    if op == RETURN and not function:
+                        return res.success_return(value)
+                    return res.success(value)
+
+                code, pc, stack, context, names, root = frames.pop()
+                ops = code.ops
+                args = code.args
+                consts = code.consts
+                starts = code.starts
+                ends = code.ends
+
+                value = value.copy()
+                value.pos_start = starts[pc - 1]
+                value.pos_end = ends[pc - 1]
+                value.context = context
+                stack.append(value)
+                continue
+
+            elif op == NEGATE:
+                number, error = stack[-1].multiply(Number(-1))
+                if error:
+                    return res.failure(error)
+                number.pos_start = starts[pc - 1]
+                number.pos_end = ends[pc - 1]
+                stack[-1] = number
+
+            elif op == NOT:
+                number, error = stack[-1].not_()
+                if error:
+                    return res.failure(error)
+                number.pos_start = starts[pc - 1]
+                number.pos_end = ends[pc - 1]
+                stack[-1] = number
+
+            elif op == SET_POS:
+                stack[-1].set_pos(starts[pc - 1], ends[pc - 1])
+
+            elif op == NULL:
+                stack.append(Null())
+
+            elif op == BUILD_LIST:
+                elements = stack[len(stack) - arg :]
+                del stack[len(stack) - arg :]
+                value = List(elements)
+                value.context = context
+                value.pos_start = starts[pc - 1]
+                value.pos_end = ends[pc - 1]
+                stack.append(value)
+
+            elif op == NEW_ELEMENTS:
+                stack.append([])
+
+            elif op == MAKE_LIST:
+                value = List(stack[-1])
+                value.context = context
+                value.pos_start = starts[pc - 1]
+                value.pos_end = ends[pc - 1]
+                stack[-1] = value
+
+            elif op == FOR_SETUP:
+                step_value = stack.pop()
+                end_value = stack.pop()
+                start_value = stack.pop()
+                step = step_value.value
+                stack.append(
+                    [start_value.value, end_value, step, step >= 0, consts[arg]]
+                )
+
+            elif op == MAKE_FUNCTION:
+                info = consts[arg]
+                func_value = VMFunction(info, context.source)
+                func_value.context = context
+                func_value.pos_start = starts[pc - 1]
+                func_value.pos_end = ends[pc - 1]
+                if info.name:
+                    context.symbol_table.symbols[info.name] = func_value
+                stack.append(func_value)
+
+            # BREAK and CONTINUE, also when a call returned with them: go to
+            # the innermost loop around the instruction, leaving frames that
+            # have none
+            if op == BREAK or op == CONTINUE:
+                while True:
+                    target = self.find_loop(code, pc - 1, op == BREAK)
+                    if target is not None:
+                        depth, pc = target
+                        del stack[depth:]
+                        break
+
+                    if not frames:
+                        if op == BREAK:
+                            return res.success_break()
+                        return res.success_continue()
+
+                    code, pc, stack, context, names, root = frames.pop()
+                    ops = code.ops
+                    args = code.args
+                    consts = code.consts
+                    starts = code.starts
+                    ends = code.ends
+
+    def find_loop(self, code, pc, is_break):
+        """
+        The stack depth and the instruction break (or continue) goes to
+        from pc, or None outside any loop
+        """
+        loops = code.loops
+        for idx in range(0, len(loops), 5):
+            if loops[idx] <= pc < loops[idx + 1]:
+                return loops[idx + 2], loops[idx + 4 if is_break else idx + 3]
+        return None